@@ -0,0 +1,23 @@
+-- Bulk-load mode, step 1: strip reviews/ratings down to bare heaps.
+-- Run after the schema and before the data loaders; the two bulk_load_*
+-- scripts below rebuild everything dropped here once the data is in.
+ALTER TABLE ratings DROP CONSTRAINT IF EXISTS fk_ratings_review;
+ALTER TABLE ratings DROP CONSTRAINT IF EXISTS ratings_hotel_id_fkey;
+ALTER TABLE reviews DROP CONSTRAINT IF EXISTS reviews_hotel_id_fkey;
+
+ALTER TABLE ratings DROP CONSTRAINT IF EXISTS uq_ratings_review;
+ALTER TABLE ratings DROP CONSTRAINT IF EXISTS ratings_pkey;
+ALTER TABLE reviews DROP CONSTRAINT IF EXISTS pk_reviews;
+
+DROP INDEX IF EXISTS idx_reviews_hotel_id;
+DROP INDEX IF EXISTS idx_ratings_hotel_id;
+DROP INDEX IF EXISTS idx_reviews_search;
+DROP INDEX IF EXISTS idx_reviews_hotel_date;
+
+-- ratings_average and hotel_monthly_ratings keep their current figures
+-- during the load; the incremental triggers are switched off and
+-- bulk_load_constraints.sql re-enables them and rebuilds both in one pass.
+ALTER TABLE ratings DISABLE TRIGGER USER;
+ALTER TABLE reviews DISABLE TRIGGER USER;
+
+TRUNCATE ratings, reviews;
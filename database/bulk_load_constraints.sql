@@ -0,0 +1,17 @@
+-- Bulk-load mode, step 3: add the foreign keys. Each ADD FOREIGN KEY
+-- validates the whole table in a single anti-join instead of one lookup per
+-- inserted row.
+ALTER TABLE reviews ADD CONSTRAINT reviews_hotel_id_fkey
+    FOREIGN KEY (hotel_id) REFERENCES hotels(hotel_id) ON DELETE CASCADE;
+ALTER TABLE ratings ADD CONSTRAINT ratings_hotel_id_fkey
+    FOREIGN KEY (hotel_id) REFERENCES hotels(hotel_id) ON DELETE CASCADE;
+ALTER TABLE ratings ADD CONSTRAINT fk_ratings_review
+    FOREIGN KEY (hotel_id, review_id) REFERENCES reviews(hotel_id, review_id) ON DELETE CASCADE;
+
+ALTER TABLE ratings ENABLE TRIGGER USER;
+ALTER TABLE reviews ENABLE TRIGGER USER;
+SELECT rebuild_ratings_average();
+SELECT refresh_hotel_monthly_ratings();
+
+ANALYZE reviews;
+ANALYZE ratings;
@@ -0,0 +1,15 @@
+-- Bulk-load mode, step 2: build the keys and indexes from the loaded data.
+-- reviews and ratings are hash-partitioned (migration 0008): run on the
+-- parent, each statement builds every partition in turn. The Python loader
+-- first runs it against every partition in parallel, after which the
+-- parent statement only attaches what is already there.
+-- Statements on different tables may run concurrently; those on the same
+-- parent wait for each other's lock (one statement per line; the loaders
+-- split on that).
+ALTER TABLE reviews ADD CONSTRAINT pk_reviews PRIMARY KEY (hotel_id, review_id);
+ALTER TABLE ratings ADD CONSTRAINT ratings_pkey PRIMARY KEY (hotel_id, rating_id);
+ALTER TABLE ratings ADD CONSTRAINT uq_ratings_review UNIQUE (hotel_id, review_id);
+CREATE INDEX idx_reviews_hotel_id ON reviews (hotel_id);
+CREATE INDEX idx_ratings_hotel_id ON ratings (hotel_id);
+CREATE INDEX idx_reviews_search ON reviews USING GIN (search_vector);
+CREATE INDEX idx_reviews_hotel_date ON reviews (hotel_id, review_date);
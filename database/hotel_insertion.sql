@@ -1,5 +1,15 @@
 \echo 'Loading hotels from processed_data/hotels.csv'
-\copy hotels (hotel_id, name, city, country) FROM '/app/processed_data/hotels.csv' WITH (FORMAT csv, HEADER true);
+CREATE TEMP TABLE stage_hotels AS
+SELECT hotel_id, name, city, country FROM hotels WITH NO DATA;
+
+\copy stage_hotels (hotel_id, name, city, country) FROM '/app/processed_data/hotels.csv' WITH (FORMAT csv, HEADER true);
+
+INSERT INTO hotels (hotel_id, name, city, country)
+SELECT hotel_id, name, city, country FROM stage_hotels
+ON CONFLICT (hotel_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    city = EXCLUDED.city,
+    country = EXCLUDED.country;
 
 \echo 'Hotels table row count:'
-SELECT COUNT(*) FROM hotels;
+SELECT COUNT(*) FROM hotels;
\ No newline at end of file
@@ -1,11 +1,8 @@
 -- PostgreSQL schema for CIT444 project
-DROP VIEW IF EXISTS hotel_ratings_view;
-DROP TABLE IF EXISTS ratings_average CASCADE;
-DROP TABLE IF EXISTS ratings CASCADE;
-DROP TABLE IF EXISTS reviews CASCADE;
-DROP TABLE IF EXISTS hotels CASCADE;
+-- Written with IF NOT EXISTS so a database created by the old
+-- drop-and-recreate schema script can be adopted without losing data.
 
-CREATE TABLE hotels (
+CREATE TABLE IF NOT EXISTS hotels (
     hotel_id BIGINT PRIMARY KEY,
     name VARCHAR(200) NOT NULL,
     city VARCHAR(100),
@@ -14,7 +11,7 @@ CREATE TABLE hotels (
     created_date TIMESTAMPTZ DEFAULT NOW()
 );
 
-CREATE TABLE reviews (
+CREATE TABLE IF NOT EXISTS reviews (
     review_id BIGINT NOT NULL,
     hotel_id BIGINT NOT NULL REFERENCES hotels(hotel_id) ON DELETE CASCADE,
     review_text TEXT,
@@ -24,7 +21,7 @@ CREATE TABLE reviews (
     CONSTRAINT pk_reviews PRIMARY KEY (hotel_id, review_id)
 );
 
-CREATE TABLE ratings (
+CREATE TABLE IF NOT EXISTS ratings (
     rating_id BIGSERIAL PRIMARY KEY,
     review_id BIGINT NOT NULL,
     hotel_id BIGINT NOT NULL REFERENCES hotels(hotel_id) ON DELETE CASCADE,
@@ -39,7 +36,7 @@ CREATE TABLE ratings (
         REFERENCES reviews(hotel_id, review_id) ON DELETE CASCADE
 );
 
-CREATE TABLE ratings_average (
+CREATE TABLE IF NOT EXISTS ratings_average (
     hotel_id BIGINT PRIMARY KEY REFERENCES hotels(hotel_id) ON DELETE CASCADE,
     avg_service NUMERIC(5,2),
     avg_price NUMERIC(5,2),
@@ -50,8 +47,8 @@ CREATE TABLE ratings_average (
     last_updated TIMESTAMPTZ DEFAULT NOW()
 );
 
-CREATE INDEX idx_reviews_hotel_id ON reviews(hotel_id);
-CREATE INDEX idx_ratings_hotel_id ON ratings(hotel_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_hotel_id ON reviews(hotel_id);
+CREATE INDEX IF NOT EXISTS idx_ratings_hotel_id ON ratings(hotel_id);
 
 CREATE OR REPLACE VIEW hotel_ratings_view AS
 SELECT
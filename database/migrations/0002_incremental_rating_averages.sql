@@ -0,0 +1,222 @@
+-- Maintain ratings_average incrementally from running sums and counts.
+--
+-- Statement-level triggers on ratings fold each statement's changes (from
+-- its transition tables) into per-hotel sums and counts, so a load only
+-- touches the hotels it changed and readers never see an empty table.
+-- The avg_* columns are generated from the sums and keep their names.
+
+DROP VIEW IF EXISTS hotel_ratings_view;
+
+ALTER TABLE ratings_average
+    DROP COLUMN avg_service,
+    DROP COLUMN avg_price,
+    DROP COLUMN avg_room,
+    DROP COLUMN avg_location,
+    DROP COLUMN avg_overall,
+    ADD COLUMN sum_service BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN cnt_service INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN sum_price BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN cnt_price INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN sum_room BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN cnt_room INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN sum_location BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN cnt_location INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN sum_overall BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN cnt_overall INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE ratings_average
+    ALTER COLUMN total_reviews SET DEFAULT 0,
+    ADD COLUMN avg_service NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_service::numeric / NULLIF(cnt_service, 0), 2)) STORED,
+    ADD COLUMN avg_price NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_price::numeric / NULLIF(cnt_price, 0), 2)) STORED,
+    ADD COLUMN avg_room NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_room::numeric / NULLIF(cnt_room, 0), 2)) STORED,
+    ADD COLUMN avg_location NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_location::numeric / NULLIF(cnt_location, 0), 2)) STORED,
+    ADD COLUMN avg_overall NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_overall::numeric / NULLIF(cnt_overall, 0), 2)) STORED;
+
+-- Signed per-hotel aggregate of a row source that has a "sign" column.
+-- Rows come out in hotel_id order so concurrent loads lock hotels in the
+-- same order.
+CREATE OR REPLACE FUNCTION ratings_average_delta_sql(source TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT format(
+        'SELECT d.hotel_id,
+                COALESCE(SUM(d.sign * d.service_score), 0) AS sum_service,
+                SUM(d.sign * (d.service_score IS NOT NULL)::int) AS cnt_service,
+                COALESCE(SUM(d.sign * d.price_score), 0) AS sum_price,
+                SUM(d.sign * (d.price_score IS NOT NULL)::int) AS cnt_price,
+                COALESCE(SUM(d.sign * d.room_score), 0) AS sum_room,
+                SUM(d.sign * (d.room_score IS NOT NULL)::int) AS cnt_room,
+                COALESCE(SUM(d.sign * d.location_score), 0) AS sum_location,
+                SUM(d.sign * (d.location_score IS NOT NULL)::int) AS cnt_location,
+                COALESCE(SUM(d.sign * d.overall_score), 0) AS sum_overall,
+                SUM(d.sign * (d.overall_score IS NOT NULL)::int) AS cnt_overall,
+                SUM(d.sign) AS total_reviews
+         FROM (%s) d
+         JOIN hotels h ON h.hotel_id = d.hotel_id
+         GROUP BY d.hotel_id
+         ORDER BY d.hotel_id',
+        source
+    )
+$$;
+
+CREATE OR REPLACE FUNCTION ratings_average_apply_delta() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    source TEXT;
+BEGIN
+    -- Transition tables are visible to EXECUTE, which lets one upsert
+    -- serve all three events.
+    source := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS sign, * FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT -1 AS sign, * FROM old_rows'
+        ELSE 'SELECT 1 AS sign, * FROM new_rows UNION ALL SELECT -1 AS sign, * FROM old_rows'
+    END;
+
+    EXECUTE format(
+        'INSERT INTO ratings_average AS ra (
+             hotel_id,
+             sum_service, cnt_service, sum_price, cnt_price, sum_room, cnt_room,
+             sum_location, cnt_location, sum_overall, cnt_overall,
+             total_reviews, last_updated
+         )
+         SELECT delta.*, NOW() FROM (%s) delta
+         ON CONFLICT (hotel_id) DO UPDATE SET
+             sum_service = ra.sum_service + EXCLUDED.sum_service,
+             cnt_service = ra.cnt_service + EXCLUDED.cnt_service,
+             sum_price = ra.sum_price + EXCLUDED.sum_price,
+             cnt_price = ra.cnt_price + EXCLUDED.cnt_price,
+             sum_room = ra.sum_room + EXCLUDED.sum_room,
+             cnt_room = ra.cnt_room + EXCLUDED.cnt_room,
+             sum_location = ra.sum_location + EXCLUDED.sum_location,
+             cnt_location = ra.cnt_location + EXCLUDED.cnt_location,
+             sum_overall = ra.sum_overall + EXCLUDED.sum_overall,
+             cnt_overall = ra.cnt_overall + EXCLUDED.cnt_overall,
+             total_reviews = ra.total_reviews + EXCLUDED.total_reviews,
+             last_updated = EXCLUDED.last_updated',
+        ratings_average_delta_sql(source)
+    );
+
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM ratings_average WHERE total_reviews <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ratings_average_clear() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM ratings_average;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_ratings_average_insert
+    AFTER INSERT ON ratings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+
+CREATE TRIGGER trg_ratings_average_update
+    AFTER UPDATE ON ratings
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+
+CREATE TRIGGER trg_ratings_average_delete
+    AFTER DELETE ON ratings
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+
+CREATE TRIGGER trg_ratings_average_truncate
+    AFTER TRUNCATE ON ratings
+    FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_clear();
+
+-- Full recomputation, used after bulk loads (which disable the triggers) and
+-- as a verification pass. It rewrites only hotels whose figures differ and
+-- removes hotels that no longer have ratings, so ratings_average is never
+-- empty in between. Returns the number of hotels it had to correct.
+CREATE OR REPLACE FUNCTION rebuild_ratings_average() RETURNS INTEGER
+LANGUAGE sql AS $$
+    WITH fresh AS (
+        SELECT
+            hotel_id,
+            COALESCE(SUM(service_score), 0) AS sum_service,
+            COUNT(service_score) AS cnt_service,
+            COALESCE(SUM(price_score), 0) AS sum_price,
+            COUNT(price_score) AS cnt_price,
+            COALESCE(SUM(room_score), 0) AS sum_room,
+            COUNT(room_score) AS cnt_room,
+            COALESCE(SUM(location_score), 0) AS sum_location,
+            COUNT(location_score) AS cnt_location,
+            COALESCE(SUM(overall_score), 0) AS sum_overall,
+            COUNT(overall_score) AS cnt_overall,
+            COUNT(*) AS total_reviews
+        FROM ratings
+        GROUP BY hotel_id
+    ),
+    upserted AS (
+        INSERT INTO ratings_average AS ra (
+            hotel_id,
+            sum_service, cnt_service, sum_price, cnt_price, sum_room, cnt_room,
+            sum_location, cnt_location, sum_overall, cnt_overall,
+            total_reviews, last_updated
+        )
+        SELECT fresh.*, NOW() FROM fresh
+        ON CONFLICT (hotel_id) DO UPDATE SET
+            sum_service = EXCLUDED.sum_service,
+            cnt_service = EXCLUDED.cnt_service,
+            sum_price = EXCLUDED.sum_price,
+            cnt_price = EXCLUDED.cnt_price,
+            sum_room = EXCLUDED.sum_room,
+            cnt_room = EXCLUDED.cnt_room,
+            sum_location = EXCLUDED.sum_location,
+            cnt_location = EXCLUDED.cnt_location,
+            sum_overall = EXCLUDED.sum_overall,
+            cnt_overall = EXCLUDED.cnt_overall,
+            total_reviews = EXCLUDED.total_reviews,
+            last_updated = EXCLUDED.last_updated
+        WHERE (ra.sum_service, ra.cnt_service, ra.sum_price, ra.cnt_price, ra.sum_room,
+               ra.cnt_room, ra.sum_location, ra.cnt_location, ra.sum_overall,
+               ra.cnt_overall, ra.total_reviews)
+            IS DISTINCT FROM
+              (EXCLUDED.sum_service, EXCLUDED.cnt_service, EXCLUDED.sum_price,
+               EXCLUDED.cnt_price, EXCLUDED.sum_room, EXCLUDED.cnt_room,
+               EXCLUDED.sum_location, EXCLUDED.cnt_location, EXCLUDED.sum_overall,
+               EXCLUDED.cnt_overall, EXCLUDED.total_reviews)
+        RETURNING ra.hotel_id
+    ),
+    removed AS (
+        DELETE FROM ratings_average ra
+        WHERE NOT EXISTS (SELECT 1 FROM fresh WHERE fresh.hotel_id = ra.hotel_id)
+        RETURNING ra.hotel_id
+    )
+    SELECT ((SELECT COUNT(*) FROM upserted) + (SELECT COUNT(*) FROM removed))::integer
+$$;
+
+SELECT rebuild_ratings_average();
+
+CREATE OR REPLACE VIEW hotel_ratings_view AS
+SELECT
+    h.hotel_id,
+    h.name AS hotel_name,
+    h.city,
+    h.country,
+    ra.avg_service,
+    ra.avg_price,
+    ra.avg_room,
+    ra.avg_location,
+    ra.avg_overall,
+    ra.total_reviews,
+    ra.last_updated,
+    CASE
+        WHEN ra.avg_overall >= 4.5 THEN 'Excellent'
+        WHEN ra.avg_overall >= 4.0 THEN 'Very Good'
+        WHEN ra.avg_overall >= 3.0 THEN 'Good'
+        WHEN ra.avg_overall >= 2.0 THEN 'Fair'
+        ELSE 'Poor'
+    END AS rating_category
+FROM hotels h
+LEFT JOIN ratings_average ra ON h.hotel_id = ra.hotel_id;
@@ -0,0 +1,36 @@
+-- Turn hotel_ratings_view into a materialized view.
+--
+-- Reads no longer re-join hotels with ratings_average and re-evaluate the
+-- rating_category CASE each time. The loaders refresh it CONCURRENTLY once
+-- a load finishes (database/refresh_views.sql), which needs the unique index
+-- on hotel_id and lets readers keep using the old contents meanwhile.
+
+DROP VIEW IF EXISTS hotel_ratings_view;
+
+CREATE MATERIALIZED VIEW hotel_ratings_view AS
+SELECT
+    h.hotel_id,
+    h.name AS hotel_name,
+    h.city,
+    h.country,
+    ra.avg_service,
+    ra.avg_price,
+    ra.avg_room,
+    ra.avg_location,
+    ra.avg_overall,
+    ra.total_reviews,
+    ra.last_updated,
+    CASE
+        WHEN ra.avg_overall >= 4.5 THEN 'Excellent'
+        WHEN ra.avg_overall >= 4.0 THEN 'Very Good'
+        WHEN ra.avg_overall >= 3.0 THEN 'Good'
+        WHEN ra.avg_overall >= 2.0 THEN 'Fair'
+        ELSE 'Poor'
+    END AS rating_category
+FROM hotels h
+LEFT JOIN ratings_average ra ON h.hotel_id = ra.hotel_id;
+
+CREATE UNIQUE INDEX idx_hotel_ratings_view_hotel_id ON hotel_ratings_view (hotel_id);
+CREATE INDEX idx_hotel_ratings_view_city ON hotel_ratings_view (city);
+CREATE INDEX idx_hotel_ratings_view_country ON hotel_ratings_view (country);
+CREATE INDEX idx_hotel_ratings_view_category ON hotel_ratings_view (rating_category);
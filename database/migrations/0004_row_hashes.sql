@@ -0,0 +1,79 @@
+-- Content hashes for change detection.
+--
+-- row_hash is an MD5 of a row's content columns, generated by Postgres so
+-- every loader (Python and psql) gets the same value. The upserts compare it
+-- with EXCLUDED.row_hash and skip rows whose content is unchanged, so a
+-- re-load only writes new and modified rows. For reviews only the text
+-- counts as content; file_source/line_number record where it was read from.
+-- NULLs hash as \N so they differ from empty strings.
+
+ALTER TABLE reviews
+    ADD COLUMN row_hash BYTEA GENERATED ALWAYS AS (
+        decode(md5(COALESCE(review_text, '\N')), 'hex')
+    ) STORED;
+
+ALTER TABLE ratings
+    ADD COLUMN row_hash BYTEA GENERATED ALWAYS AS (
+        decode(md5(
+            COALESCE(service_score::text, '\N') || ',' ||
+            COALESCE(price_score::text, '\N') || ',' ||
+            COALESCE(room_score::text, '\N') || ',' ||
+            COALESCE(location_score::text, '\N') || ',' ||
+            COALESCE(overall_score::text, '\N')
+        ), 'hex')
+    ) STORED;
+
+-- Upserts that skip every row still fire the ratings statement triggers, and
+-- with change detection that is the common case; return before building the
+-- dynamic aggregate when there is nothing to fold in.
+CREATE OR REPLACE FUNCTION ratings_average_apply_delta() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    source TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF NOT EXISTS (SELECT 1 FROM old_rows) THEN
+            RETURN NULL;
+        END IF;
+    ELSIF NOT EXISTS (SELECT 1 FROM new_rows) THEN
+        RETURN NULL;
+    END IF;
+
+    -- Transition tables are visible to EXECUTE, which lets one upsert
+    -- serve all three events.
+    source := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS sign, * FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT -1 AS sign, * FROM old_rows'
+        ELSE 'SELECT 1 AS sign, * FROM new_rows UNION ALL SELECT -1 AS sign, * FROM old_rows'
+    END;
+
+    EXECUTE format(
+        'INSERT INTO ratings_average AS ra (
+             hotel_id,
+             sum_service, cnt_service, sum_price, cnt_price, sum_room, cnt_room,
+             sum_location, cnt_location, sum_overall, cnt_overall,
+             total_reviews, last_updated
+         )
+         SELECT delta.*, NOW() FROM (%s) delta
+         ON CONFLICT (hotel_id) DO UPDATE SET
+             sum_service = ra.sum_service + EXCLUDED.sum_service,
+             cnt_service = ra.cnt_service + EXCLUDED.cnt_service,
+             sum_price = ra.sum_price + EXCLUDED.sum_price,
+             cnt_price = ra.cnt_price + EXCLUDED.cnt_price,
+             sum_room = ra.sum_room + EXCLUDED.sum_room,
+             cnt_room = ra.cnt_room + EXCLUDED.cnt_room,
+             sum_location = ra.sum_location + EXCLUDED.sum_location,
+             cnt_location = ra.cnt_location + EXCLUDED.cnt_location,
+             sum_overall = ra.sum_overall + EXCLUDED.sum_overall,
+             cnt_overall = ra.cnt_overall + EXCLUDED.cnt_overall,
+             total_reviews = ra.total_reviews + EXCLUDED.total_reviews,
+             last_updated = EXCLUDED.last_updated',
+        ratings_average_delta_sql(source)
+    );
+
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM ratings_average WHERE total_reviews <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- Full-text search over review text.
+--
+-- search_vector is generated from review_text with the english
+-- configuration, so both loaders keep it current without extra work, and
+-- the GIN index serves @@ queries (see scripts/review_search.py) instead of
+-- sequential ILIKE scans. Bulk-load mode drops and rebuilds the index with
+-- the others.
+
+ALTER TABLE reviews
+    ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('english', COALESCE(review_text, ''))
+    ) STORED;
+
+CREATE INDEX idx_reviews_search ON reviews USING GIN (search_vector);
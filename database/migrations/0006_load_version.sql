@@ -0,0 +1,13 @@
+-- Single-row load stamp for read-side caches.
+--
+-- refresh_views.sql bumps version at the end of every load (docker and
+-- Python alike), so scripts/query_service.py can keep query results until
+-- the stamp moves instead of guessing how long they stay valid.
+
+CREATE TABLE load_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO load_version DEFAULT VALUES;
@@ -0,0 +1,143 @@
+-- Precomputed rating rollups per city, per country and overall.
+--
+-- ratings_average stops at the hotel level, so "best cities for service"
+-- or "country averages" used to aggregate all of ratings joined to hotels.
+-- rating_rollups keeps one row per (country, city), per country and one
+-- global row, with review-weighted averages (sum / count of non-null
+-- scores) and a 1..5 histogram per score. refresh_rating_rollups() rebuilds
+-- it in a single GROUPING SETS pass at the end of each load
+-- (database/refresh_views.sql) and only rewrites rows whose figures moved.
+
+CREATE TABLE rating_rollups (
+    level VARCHAR(8) NOT NULL CHECK (level IN ('city', 'country', 'global')),
+    country VARCHAR(100) NOT NULL DEFAULT '',
+    city VARCHAR(100) NOT NULL DEFAULT '',
+    hotels INTEGER NOT NULL,
+    total_reviews BIGINT NOT NULL,
+    sum_service BIGINT NOT NULL,
+    cnt_service BIGINT NOT NULL,
+    sum_price BIGINT NOT NULL,
+    cnt_price BIGINT NOT NULL,
+    sum_room BIGINT NOT NULL,
+    cnt_room BIGINT NOT NULL,
+    sum_location BIGINT NOT NULL,
+    cnt_location BIGINT NOT NULL,
+    sum_overall BIGINT NOT NULL,
+    cnt_overall BIGINT NOT NULL,
+    -- hist_x[i] is the number of reviews that gave score i
+    hist_service INTEGER[] NOT NULL,
+    hist_price INTEGER[] NOT NULL,
+    hist_room INTEGER[] NOT NULL,
+    hist_location INTEGER[] NOT NULL,
+    hist_overall INTEGER[] NOT NULL,
+    last_updated TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    avg_service NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_service::numeric / NULLIF(cnt_service, 0), 2)) STORED,
+    avg_price NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_price::numeric / NULLIF(cnt_price, 0), 2)) STORED,
+    avg_room NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_room::numeric / NULLIF(cnt_room, 0), 2)) STORED,
+    avg_location NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_location::numeric / NULLIF(cnt_location, 0), 2)) STORED,
+    avg_overall NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_overall::numeric / NULLIF(cnt_overall, 0), 2)) STORED,
+    PRIMARY KEY (level, country, city)
+);
+
+-- Returns the number of rollup rows it inserted, changed or removed.
+CREATE OR REPLACE FUNCTION refresh_rating_rollups() RETURNS INTEGER
+LANGUAGE sql AS $$
+    WITH fresh AS (
+        SELECT
+            CASE GROUPING(h.country, h.city)
+                WHEN 0 THEN 'city' WHEN 1 THEN 'country' ELSE 'global'
+            END AS level,
+            CASE WHEN GROUPING(h.country) = 0 THEN COALESCE(h.country, '') ELSE '' END AS country,
+            CASE WHEN GROUPING(h.city) = 0 THEN COALESCE(h.city, '') ELSE '' END AS city,
+            COUNT(DISTINCT r.hotel_id) AS hotels,
+            COUNT(*) AS total_reviews,
+            COALESCE(SUM(r.service_score), 0) AS sum_service,
+            COUNT(r.service_score) AS cnt_service,
+            COALESCE(SUM(r.price_score), 0) AS sum_price,
+            COUNT(r.price_score) AS cnt_price,
+            COALESCE(SUM(r.room_score), 0) AS sum_room,
+            COUNT(r.room_score) AS cnt_room,
+            COALESCE(SUM(r.location_score), 0) AS sum_location,
+            COUNT(r.location_score) AS cnt_location,
+            COALESCE(SUM(r.overall_score), 0) AS sum_overall,
+            COUNT(r.overall_score) AS cnt_overall,
+            ARRAY[COUNT(*) FILTER (WHERE r.service_score = 1), COUNT(*) FILTER (WHERE r.service_score = 2),
+                  COUNT(*) FILTER (WHERE r.service_score = 3), COUNT(*) FILTER (WHERE r.service_score = 4),
+                  COUNT(*) FILTER (WHERE r.service_score = 5)]::integer[] AS hist_service,
+            ARRAY[COUNT(*) FILTER (WHERE r.price_score = 1), COUNT(*) FILTER (WHERE r.price_score = 2),
+                  COUNT(*) FILTER (WHERE r.price_score = 3), COUNT(*) FILTER (WHERE r.price_score = 4),
+                  COUNT(*) FILTER (WHERE r.price_score = 5)]::integer[] AS hist_price,
+            ARRAY[COUNT(*) FILTER (WHERE r.room_score = 1), COUNT(*) FILTER (WHERE r.room_score = 2),
+                  COUNT(*) FILTER (WHERE r.room_score = 3), COUNT(*) FILTER (WHERE r.room_score = 4),
+                  COUNT(*) FILTER (WHERE r.room_score = 5)]::integer[] AS hist_room,
+            ARRAY[COUNT(*) FILTER (WHERE r.location_score = 1), COUNT(*) FILTER (WHERE r.location_score = 2),
+                  COUNT(*) FILTER (WHERE r.location_score = 3), COUNT(*) FILTER (WHERE r.location_score = 4),
+                  COUNT(*) FILTER (WHERE r.location_score = 5)]::integer[] AS hist_location,
+            ARRAY[COUNT(*) FILTER (WHERE r.overall_score = 1), COUNT(*) FILTER (WHERE r.overall_score = 2),
+                  COUNT(*) FILTER (WHERE r.overall_score = 3), COUNT(*) FILTER (WHERE r.overall_score = 4),
+                  COUNT(*) FILTER (WHERE r.overall_score = 5)]::integer[] AS hist_overall
+        FROM ratings r
+        JOIN hotels h ON h.hotel_id = r.hotel_id
+        GROUP BY GROUPING SETS ((h.country, h.city), (h.country), ())
+    ),
+    upserted AS (
+        INSERT INTO rating_rollups AS rr (
+            level, country, city, hotels, total_reviews,
+            sum_service, cnt_service, sum_price, cnt_price, sum_room, cnt_room,
+            sum_location, cnt_location, sum_overall, cnt_overall,
+            hist_service, hist_price, hist_room, hist_location, hist_overall,
+            last_updated
+        )
+        SELECT fresh.*, NOW() FROM fresh
+        -- An empty ratings table still yields a global row; skip it
+        WHERE fresh.total_reviews > 0
+        ON CONFLICT (level, country, city) DO UPDATE SET
+            hotels = EXCLUDED.hotels,
+            total_reviews = EXCLUDED.total_reviews,
+            sum_service = EXCLUDED.sum_service,
+            cnt_service = EXCLUDED.cnt_service,
+            sum_price = EXCLUDED.sum_price,
+            cnt_price = EXCLUDED.cnt_price,
+            sum_room = EXCLUDED.sum_room,
+            cnt_room = EXCLUDED.cnt_room,
+            sum_location = EXCLUDED.sum_location,
+            cnt_location = EXCLUDED.cnt_location,
+            sum_overall = EXCLUDED.sum_overall,
+            cnt_overall = EXCLUDED.cnt_overall,
+            hist_service = EXCLUDED.hist_service,
+            hist_price = EXCLUDED.hist_price,
+            hist_room = EXCLUDED.hist_room,
+            hist_location = EXCLUDED.hist_location,
+            hist_overall = EXCLUDED.hist_overall,
+            last_updated = EXCLUDED.last_updated
+        WHERE (rr.hotels, rr.total_reviews, rr.sum_service, rr.cnt_service, rr.sum_price,
+               rr.cnt_price, rr.sum_room, rr.cnt_room, rr.sum_location, rr.cnt_location,
+               rr.sum_overall, rr.cnt_overall, rr.hist_service, rr.hist_price, rr.hist_room,
+               rr.hist_location, rr.hist_overall)
+            IS DISTINCT FROM
+              (EXCLUDED.hotels, EXCLUDED.total_reviews, EXCLUDED.sum_service,
+               EXCLUDED.cnt_service, EXCLUDED.sum_price, EXCLUDED.cnt_price, EXCLUDED.sum_room,
+               EXCLUDED.cnt_room, EXCLUDED.sum_location, EXCLUDED.cnt_location,
+               EXCLUDED.sum_overall, EXCLUDED.cnt_overall, EXCLUDED.hist_service,
+               EXCLUDED.hist_price, EXCLUDED.hist_room, EXCLUDED.hist_location,
+               EXCLUDED.hist_overall)
+        RETURNING 1
+    ),
+    removed AS (
+        DELETE FROM rating_rollups rr
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fresh
+            WHERE fresh.total_reviews > 0
+              AND (fresh.level, fresh.country, fresh.city) = (rr.level, rr.country, rr.city)
+        )
+        RETURNING 1
+    )
+    SELECT ((SELECT COUNT(*) FROM upserted) + (SELECT COUNT(*) FROM removed))::integer
+$$;
+
+SELECT refresh_rating_rollups();
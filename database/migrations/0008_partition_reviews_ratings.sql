@@ -0,0 +1,134 @@
+-- Hash-partition reviews and ratings by hotel_id.
+--
+-- Vacuum, reindex and the bulk-load index rebuild then work partition by
+-- partition (the Python loader builds partitions in parallel), and
+-- per-hotel aggregates can be computed partition-wise. Both tables always
+-- use the same modulus, so a hotel's reviews and ratings land in partitions
+-- with the same number. A partitioned table's keys must include the
+-- partition key, so ratings_pkey becomes (hotel_id, rating_id).
+--
+-- partition_reviews_and_ratings(n) rebuilds both tables with n partitions
+-- (named <table>_p0 .. <table>_p<n-1>), keeping their rows, and does nothing
+-- when they already have n. This migration starts with 8; change it with
+-- REVIEW_PARTITIONS=n (docker) or postgres_loader.py --partitions n.
+
+-- partition_reviews_and_ratings() swaps in new tables, so everything
+-- attached to reviews and ratings has to be created again on them.
+CREATE OR REPLACE FUNCTION attach_reviews_ratings_keys() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Same keys, indexes and foreign keys as bulk_load_indexes.sql and
+    -- bulk_load_constraints.sql build
+    ALTER TABLE reviews ADD CONSTRAINT pk_reviews PRIMARY KEY (hotel_id, review_id);
+    ALTER TABLE ratings ADD CONSTRAINT ratings_pkey PRIMARY KEY (hotel_id, rating_id);
+    ALTER TABLE ratings ADD CONSTRAINT uq_ratings_review UNIQUE (hotel_id, review_id);
+    CREATE INDEX idx_reviews_hotel_id ON reviews (hotel_id);
+    CREATE INDEX idx_ratings_hotel_id ON ratings (hotel_id);
+    CREATE INDEX idx_reviews_search ON reviews USING GIN (search_vector);
+
+    ALTER TABLE reviews ADD CONSTRAINT reviews_hotel_id_fkey
+        FOREIGN KEY (hotel_id) REFERENCES hotels(hotel_id) ON DELETE CASCADE;
+    ALTER TABLE ratings ADD CONSTRAINT ratings_hotel_id_fkey
+        FOREIGN KEY (hotel_id) REFERENCES hotels(hotel_id) ON DELETE CASCADE;
+    ALTER TABLE ratings ADD CONSTRAINT fk_ratings_review
+        FOREIGN KEY (hotel_id, review_id) REFERENCES reviews(hotel_id, review_id) ON DELETE CASCADE;
+END;
+$$;
+
+-- The ratings_average triggers of migration 0002
+CREATE OR REPLACE FUNCTION attach_ratings_average() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    CREATE TRIGGER trg_ratings_average_insert
+        AFTER INSERT ON ratings
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+    CREATE TRIGGER trg_ratings_average_update
+        AFTER UPDATE ON ratings
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+    CREATE TRIGGER trg_ratings_average_delete
+        AFTER DELETE ON ratings
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_apply_delta();
+    CREATE TRIGGER trg_ratings_average_truncate
+        AFTER TRUNCATE ON ratings
+        FOR EACH STATEMENT EXECUTE FUNCTION ratings_average_clear();
+END;
+$$;
+
+-- Everything partition_reviews_and_ratings() recreates. Migrations that
+-- attach more to the two tables replace this function.
+CREATE OR REPLACE FUNCTION recreate_reviews_ratings_dependents() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM attach_reviews_ratings_keys();
+    PERFORM attach_ratings_average();
+    -- The new triggers are enabled even if an interrupted bulk load had
+    -- switched the old ones off, so bring the averages in line once
+    PERFORM rebuild_ratings_average();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partition_reviews_and_ratings(partitions INTEGER) RETURNS BOOLEAN
+LANGUAGE plpgsql AS $$
+DECLARE
+    tbl TEXT;
+    cols TEXT;
+    i INTEGER;
+BEGIN
+    IF partitions IS NULL OR partitions < 1 THEN
+        RAISE EXCEPTION 'partition count must be at least 1, got %', partitions;
+    END IF;
+    IF (SELECT bool_and(c.relkind = 'p') FROM pg_class c WHERE c.oid IN ('reviews'::regclass, 'ratings'::regclass))
+       AND (SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'reviews'::regclass) = partitions
+       AND (SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'ratings'::regclass) = partitions THEN
+        RETURN FALSE;
+    END IF;
+
+    LOCK TABLE reviews, ratings IN ACCESS EXCLUSIVE MODE;
+
+    FOREACH tbl IN ARRAY ARRAY['reviews', 'ratings'] LOOP
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) '
+            'PARTITION BY HASH (hotel_id)',
+            tbl || '_repartitioned', tbl
+        );
+        FOR i IN 0 .. partitions - 1 LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+                format('%s_new_p%s', tbl, i), tbl || '_repartitioned', partitions, i
+            );
+        END LOOP;
+        -- Generated columns (row_hash, search_vector) are recomputed on insert
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO cols
+        FROM pg_attribute
+        WHERE attrelid = tbl::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+        EXECUTE format('INSERT INTO %I (%s) SELECT %s FROM %I', tbl || '_repartitioned', cols, cols, tbl);
+    END LOOP;
+
+    -- Keep rating ids running: the new ratings table shares the old sequence
+    ALTER SEQUENCE ratings_rating_id_seq OWNED BY NONE;
+    DROP TABLE ratings;
+    DROP TABLE reviews;
+
+    FOREACH tbl IN ARRAY ARRAY['reviews', 'ratings'] LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl || '_repartitioned', tbl);
+        FOR i IN 0 .. partitions - 1 LOOP
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', format('%s_new_p%s', tbl, i), format('%s_p%s', tbl, i));
+        END LOOP;
+    END LOOP;
+    ALTER SEQUENCE ratings_rating_id_seq OWNED BY ratings.rating_id;
+
+    PERFORM recreate_reviews_ratings_dependents();
+    ANALYZE reviews;
+    ANALYZE ratings;
+    RETURN TRUE;
+END;
+$$;
+
+-- ratings_average groups by hotel_id, the partition key, so each partition
+-- can be aggregated on its own
+ALTER FUNCTION rebuild_ratings_average() SET enable_partitionwise_aggregate = on;
+
+SELECT partition_reviews_and_ratings(8);
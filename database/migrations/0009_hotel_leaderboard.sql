@@ -0,0 +1,61 @@
+-- Bayesian-ranked hotel leaderboards.
+--
+-- Raw averages put one-review hotels on top, so each aspect's score is
+-- shrunk towards the overall mean for that aspect: (sum + C * mean) / (n + C),
+-- where n is the hotel's number of scores for the aspect and C = 10 reviews
+-- of prior weight (roughly the lower quartile of reviews per hotel). A hotel
+-- needs a fair number of reviews before its own average outweighs the mean.
+--
+-- One row per (aspect, hotel) carries the score with its dense rank within
+-- the city, the country and overall, and the indexes below match the
+-- leaderboard queries ("top 20 in London by room") so they read one index
+-- range in rank order instead of sorting every hotel. The loaders refresh
+-- it CONCURRENTLY with hotel_ratings_view (database/refresh_views.sql).
+
+CREATE MATERIALIZED VIEW hotel_leaderboard AS
+WITH prior AS (
+    SELECT
+        SUM(sum_overall)::numeric / NULLIF(SUM(cnt_overall), 0) AS overall,
+        SUM(sum_service)::numeric / NULLIF(SUM(cnt_service), 0) AS service,
+        SUM(sum_price)::numeric / NULLIF(SUM(cnt_price), 0) AS price,
+        SUM(sum_room)::numeric / NULLIF(SUM(cnt_room), 0) AS room,
+        SUM(sum_location)::numeric / NULLIF(SUM(cnt_location), 0) AS location,
+        10 AS weight
+    FROM ratings_average
+),
+scored AS (
+    SELECT
+        a.aspect,
+        h.hotel_id,
+        h.name AS hotel_name,
+        h.city,
+        h.country,
+        a.reviews,
+        ROUND(a.total::numeric / a.reviews, 2) AS raw_avg,
+        ROUND((a.total + prior.weight * a.mean) / (a.reviews + prior.weight), 3) AS score
+    FROM ratings_average ra
+    JOIN hotels h ON h.hotel_id = ra.hotel_id
+    CROSS JOIN prior
+    CROSS JOIN LATERAL (VALUES
+        ('overall', ra.sum_overall, ra.cnt_overall, prior.overall),
+        ('service', ra.sum_service, ra.cnt_service, prior.service),
+        ('price', ra.sum_price, ra.cnt_price, prior.price),
+        ('room', ra.sum_room, ra.cnt_room, prior.room),
+        ('location', ra.sum_location, ra.cnt_location, prior.location)
+    ) AS a(aspect, total, reviews, mean)
+    WHERE a.reviews > 0
+)
+SELECT
+    scored.*,
+    DENSE_RANK() OVER (PARTITION BY aspect, city ORDER BY score DESC) AS city_rank,
+    DENSE_RANK() OVER (PARTITION BY aspect, country ORDER BY score DESC) AS country_rank,
+    DENSE_RANK() OVER (PARTITION BY aspect ORDER BY score DESC) AS global_rank
+FROM scored;
+
+CREATE UNIQUE INDEX idx_hotel_leaderboard_aspect_hotel ON hotel_leaderboard (aspect, hotel_id);
+CREATE INDEX idx_hotel_leaderboard_city_rank
+    ON hotel_leaderboard (aspect, lower(city), city_rank, hotel_id);
+CREATE INDEX idx_hotel_leaderboard_country_rank
+    ON hotel_leaderboard (aspect, lower(country), country_rank, hotel_id);
+CREATE INDEX idx_hotel_leaderboard_global_rank
+    ON hotel_leaderboard (aspect, global_rank, hotel_id);
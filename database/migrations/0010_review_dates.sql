@@ -0,0 +1,253 @@
+-- Review dates and titles, with per-hotel monthly rating rollups.
+--
+-- Every review starts with the date it was written and its title
+-- ("Nov 17 2009 \t<title>\t<body>"). data_processor.py parses them into the
+-- chunk CSVs and the loaders store them in reviews.review_date and
+-- review_title; rows loaded before this migration are parsed here from
+-- their text. Both follow row_hash, which only covers review_text: the
+-- header is part of the text, so a review whose date changes is rewritten.
+--
+-- hotel_monthly_ratings holds each hotel's sums and counts per calendar
+-- month of review_date, so year-over-year trends read a few hundred rows
+-- instead of every review. Statement-level triggers on ratings, and on
+-- reviews when a date changes, recompute the months of just the hotels a
+-- statement touched; bulk loads switch them off and rebuild everything once
+-- (database/bulk_load_constraints.sql).
+
+ALTER TABLE reviews
+    ADD COLUMN review_date DATE,
+    ADD COLUMN review_title TEXT;
+
+-- Same header as scripts/review_headers.py; a date that does not parse
+-- (say Feb 30) leaves both columns NULL, as it does there
+CREATE OR REPLACE FUNCTION review_header_date(review_text TEXT) RETURNS DATE
+LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+DECLARE
+    header TEXT[];
+BEGIN
+    header := regexp_match(review_text, '^([A-Z][a-z]{2} \d{1,2} \d{4}) *\t');
+    IF header IS NULL THEN
+        RETURN NULL;
+    END IF;
+    RETURN to_date(header[1], 'Mon DD YYYY');
+EXCEPTION
+    WHEN invalid_datetime_format OR datetime_field_overflow THEN
+        RETURN NULL;
+END;
+$$;
+
+-- Titles lose leading and trailing spaces only, the same rule as the
+-- strip(' ') in review_headers.py and data_processor.py: other whitespace
+-- (tabs end the title anyway, no-break spaces) is kept on both sides
+UPDATE reviews r
+SET review_date = header.review_date, review_title = NULLIF(btrim(header.title, ' '), '')
+FROM (
+    SELECT hotel_id, review_id, review_header_date(review_text) AS review_date,
+           (regexp_match(review_text, '^[A-Z][a-z]{2} \d{1,2} \d{4} *\t([^\t\r\n]*)'))[1] AS title
+    FROM reviews
+) header
+WHERE header.hotel_id = r.hotel_id AND header.review_id = r.review_id
+  AND header.review_date IS NOT NULL;
+
+CREATE TABLE hotel_monthly_ratings (
+    hotel_id BIGINT NOT NULL REFERENCES hotels(hotel_id) ON DELETE CASCADE,
+    -- First day of the month the reviews were written in
+    month DATE NOT NULL,
+    total_reviews INTEGER NOT NULL,
+    sum_service BIGINT NOT NULL,
+    cnt_service INTEGER NOT NULL,
+    sum_price BIGINT NOT NULL,
+    cnt_price INTEGER NOT NULL,
+    sum_room BIGINT NOT NULL,
+    cnt_room INTEGER NOT NULL,
+    sum_location BIGINT NOT NULL,
+    cnt_location INTEGER NOT NULL,
+    sum_overall BIGINT NOT NULL,
+    cnt_overall INTEGER NOT NULL,
+    last_updated TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    avg_service NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_service::numeric / NULLIF(cnt_service, 0), 2)) STORED,
+    avg_price NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_price::numeric / NULLIF(cnt_price, 0), 2)) STORED,
+    avg_room NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_room::numeric / NULLIF(cnt_room, 0), 2)) STORED,
+    avg_location NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_location::numeric / NULLIF(cnt_location, 0), 2)) STORED,
+    avg_overall NUMERIC(5,2)
+        GENERATED ALWAYS AS (ROUND(sum_overall::numeric / NULLIF(cnt_overall, 0), 2)) STORED,
+    PRIMARY KEY (hotel_id, month)
+);
+
+-- Recompute the months of ``hotel_ids`` (every hotel when NULL) from ratings
+-- joined to their reviews' dates. Returns the number of rows it inserted,
+-- changed or removed; unchanged months are left alone.
+--
+-- The figures are absolute, so two transactions recomputing the same hotel
+-- from their own snapshots would overwrite each other's changes (the loader
+-- upserts review chunks concurrently, and a hotel often spans two chunks).
+-- Each call therefore first locks the hotels' rows, in hotel_id order, and
+-- only then recomputes: under READ COMMITTED that next statement sees
+-- everything the previous holder committed. Row locks rather than advisory
+-- locks, so a statement touching every hotel does not fill the lock table;
+-- FOR NO KEY UPDATE does not block the foreign-key checks of other loads.
+CREATE OR REPLACE FUNCTION refresh_hotel_monthly_ratings(hotel_ids BIGINT[] DEFAULT NULL) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed INTEGER;
+BEGIN
+    PERFORM 1 FROM hotels
+    WHERE hotel_ids IS NULL OR hotel_id = ANY (hotel_ids)
+    ORDER BY hotel_id
+    FOR NO KEY UPDATE;
+
+    WITH fresh AS (
+        SELECT
+            r.hotel_id,
+            date_trunc('month', v.review_date)::date AS month,
+            COUNT(*) AS total_reviews,
+            COALESCE(SUM(r.service_score), 0) AS sum_service,
+            COUNT(r.service_score) AS cnt_service,
+            COALESCE(SUM(r.price_score), 0) AS sum_price,
+            COUNT(r.price_score) AS cnt_price,
+            COALESCE(SUM(r.room_score), 0) AS sum_room,
+            COUNT(r.room_score) AS cnt_room,
+            COALESCE(SUM(r.location_score), 0) AS sum_location,
+            COUNT(r.location_score) AS cnt_location,
+            COALESCE(SUM(r.overall_score), 0) AS sum_overall,
+            COUNT(r.overall_score) AS cnt_overall
+        FROM ratings r
+        JOIN reviews v ON v.hotel_id = r.hotel_id AND v.review_id = r.review_id
+        WHERE v.review_date IS NOT NULL
+          AND (hotel_ids IS NULL OR r.hotel_id = ANY (hotel_ids))
+        GROUP BY r.hotel_id, date_trunc('month', v.review_date)::date
+    ),
+    upserted AS (
+        INSERT INTO hotel_monthly_ratings AS m (
+            hotel_id, month, total_reviews,
+            sum_service, cnt_service, sum_price, cnt_price, sum_room, cnt_room,
+            sum_location, cnt_location, sum_overall, cnt_overall,
+            last_updated
+        )
+        SELECT fresh.*, NOW() FROM fresh ORDER BY fresh.hotel_id, fresh.month
+        ON CONFLICT (hotel_id, month) DO UPDATE SET
+            total_reviews = EXCLUDED.total_reviews,
+            sum_service = EXCLUDED.sum_service,
+            cnt_service = EXCLUDED.cnt_service,
+            sum_price = EXCLUDED.sum_price,
+            cnt_price = EXCLUDED.cnt_price,
+            sum_room = EXCLUDED.sum_room,
+            cnt_room = EXCLUDED.cnt_room,
+            sum_location = EXCLUDED.sum_location,
+            cnt_location = EXCLUDED.cnt_location,
+            sum_overall = EXCLUDED.sum_overall,
+            cnt_overall = EXCLUDED.cnt_overall,
+            last_updated = EXCLUDED.last_updated
+        WHERE (m.total_reviews, m.sum_service, m.cnt_service, m.sum_price, m.cnt_price,
+               m.sum_room, m.cnt_room, m.sum_location, m.cnt_location, m.sum_overall,
+               m.cnt_overall)
+            IS DISTINCT FROM
+              (EXCLUDED.total_reviews, EXCLUDED.sum_service, EXCLUDED.cnt_service,
+               EXCLUDED.sum_price, EXCLUDED.cnt_price, EXCLUDED.sum_room, EXCLUDED.cnt_room,
+               EXCLUDED.sum_location, EXCLUDED.cnt_location, EXCLUDED.sum_overall,
+               EXCLUDED.cnt_overall)
+        RETURNING 1
+    ),
+    removed AS (
+        DELETE FROM hotel_monthly_ratings m
+        WHERE (hotel_ids IS NULL OR m.hotel_id = ANY (hotel_ids))
+          AND NOT EXISTS (SELECT 1 FROM fresh WHERE (fresh.hotel_id, fresh.month) = (m.hotel_id, m.month))
+        RETURNING 1
+    )
+    SELECT ((SELECT COUNT(*) FROM upserted) + (SELECT COUNT(*) FROM removed))::integer INTO changed;
+    RETURN changed;
+END;
+$$;
+
+-- One function for every event on both tables; each branch only reads the
+-- transition tables its trigger declares.
+CREATE OR REPLACE FUNCTION hotel_monthly_ratings_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    touched BIGINT[];
+BEGIN
+    IF TG_TABLE_NAME = 'reviews' THEN
+        -- Reviews only matter once rated, and then only if their month moves
+        SELECT array_agg(DISTINCT n.hotel_id) INTO touched
+        FROM new_rows n
+        JOIN old_rows o ON o.hotel_id = n.hotel_id AND o.review_id = n.review_id
+        WHERE n.review_date IS DISTINCT FROM o.review_date;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT hotel_id) INTO touched FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT hotel_id) INTO touched FROM old_rows;
+    ELSE
+        SELECT array_agg(hotel_id) INTO touched
+        FROM (SELECT hotel_id FROM new_rows UNION SELECT hotel_id FROM old_rows) changed;
+    END IF;
+
+    IF touched IS NOT NULL THEN
+        PERFORM refresh_hotel_monthly_ratings(touched);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION hotel_monthly_ratings_clear() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM hotel_monthly_ratings;
+    RETURN NULL;
+END;
+$$;
+
+-- The date index and the triggers that keep hotel_monthly_ratings current;
+-- created here, and again whenever partition_reviews_and_ratings() rebuilds
+-- reviews and ratings
+CREATE OR REPLACE FUNCTION attach_hotel_monthly_ratings() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    CREATE INDEX idx_reviews_hotel_date ON reviews (hotel_id, review_date);
+
+    CREATE TRIGGER trg_hotel_monthly_ratings_insert
+        AFTER INSERT ON ratings
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION hotel_monthly_ratings_apply();
+    CREATE TRIGGER trg_hotel_monthly_ratings_update
+        AFTER UPDATE ON ratings
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION hotel_monthly_ratings_apply();
+    CREATE TRIGGER trg_hotel_monthly_ratings_delete
+        AFTER DELETE ON ratings
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION hotel_monthly_ratings_apply();
+    CREATE TRIGGER trg_hotel_monthly_ratings_truncate
+        AFTER TRUNCATE ON ratings
+        FOR EACH STATEMENT EXECUTE FUNCTION hotel_monthly_ratings_clear();
+    -- Deleted reviews take their ratings with them (fk_ratings_review), which
+    -- the ratings triggers above already see
+    CREATE TRIGGER trg_hotel_monthly_ratings_review_dates
+        AFTER UPDATE ON reviews
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION hotel_monthly_ratings_apply();
+END;
+$$;
+
+SELECT attach_hotel_monthly_ratings();
+
+-- partition_reviews_and_ratings() (migration 0008) rebuilds both tables, so
+-- its helper now also attaches the above
+CREATE OR REPLACE FUNCTION recreate_reviews_ratings_dependents() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM attach_reviews_ratings_keys();
+    PERFORM attach_ratings_average();
+    PERFORM attach_hotel_monthly_ratings();
+    -- The new triggers are enabled even if an interrupted bulk load had
+    -- switched the old ones off, so bring the rollups in line once
+    PERFORM rebuild_ratings_average();
+    PERFORM refresh_hotel_monthly_ratings();
+END;
+$$;
+
+SELECT refresh_hotel_monthly_ratings();
+ANALYZE reviews;
@@ -0,0 +1,32 @@
+-- Trigram index for fuzzy hotel-name lookup.
+--
+-- Hotel names come from folder names ("China  Aloft  Haidian") and are
+-- searched with partial or misspelled input. A pg_trgm GIN index on
+-- hotels.name serves name ILIKE '%aloft%' without a sequential scan, and
+-- similarity searches (name % 'hiltn', 'aloft' <% name) as well.
+-- scripts/hotel_search.py builds the same trigrams in memory for offline use.
+--
+-- pg_trgm ships with the postgres:16 image, but not with every server, so
+-- the index is only created where the extension can be installed; run
+-- SELECT enable_hotel_name_trigrams(); once it is available to add it later.
+
+CREATE OR REPLACE FUNCTION enable_hotel_name_trigrams() RETURNS BOOLEAN
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        RAISE NOTICE 'pg_trgm is not available; hotel names are not trigram indexed';
+        RETURN FALSE;
+    END IF;
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    EXCEPTION
+        WHEN insufficient_privilege THEN
+            RAISE NOTICE 'Not allowed to create pg_trgm; hotel names are not trigram indexed';
+            RETURN FALSE;
+    END;
+    CREATE INDEX IF NOT EXISTS idx_hotels_name_trgm ON hotels USING GIN (name gin_trgm_ops);
+    RETURN TRUE;
+END;
+$$;
+
+SELECT enable_hotel_name_trigrams();
@@ -1,8 +1,38 @@
-\echo 'Clearing reviews table'
-TRUNCATE reviews CASCADE;
+\if :{?bulk_load}
+\else
+\set bulk_load 0
+\endif
+\if :{?binary_copy}
+\else
+\set binary_copy 0
+\endif
 
 \echo 'Loading reviews from processed_data/reviews_chunk_*.csv'
-\copy reviews (review_id, hotel_id, review_text) FROM PROGRAM 'python3 /app/scripts/emit_reviews_csv.py' WITH (FORMAT text);
+\if :bulk_load
+\echo 'Bulk load: copying straight into the bare reviews table'
+\if :binary_copy
+\copy reviews (review_id, hotel_id, review_text, review_date, review_title) FROM PROGRAM 'python3 /app/scripts/emit_copy_binary.py reviews' WITH (FORMAT binary);
+\else
+\copy reviews (review_id, hotel_id, review_text, review_date, review_title) FROM PROGRAM 'python3 /app/scripts/emit_reviews_csv.py' WITH (FORMAT text);
+\endif
+\else
+CREATE TEMP TABLE stage_reviews AS
+SELECT review_id, hotel_id, review_text, review_date, review_title FROM reviews WITH NO DATA;
+
+\if :binary_copy
+\copy stage_reviews (review_id, hotel_id, review_text, review_date, review_title) FROM PROGRAM 'python3 /app/scripts/emit_copy_binary.py reviews' WITH (FORMAT binary);
+\else
+\copy stage_reviews (review_id, hotel_id, review_text, review_date, review_title) FROM PROGRAM 'python3 /app/scripts/emit_reviews_csv.py' WITH (FORMAT text);
+\endif
+
+INSERT INTO reviews (review_id, hotel_id, review_text, review_date, review_title)
+SELECT review_id, hotel_id, review_text, review_date, review_title FROM stage_reviews
+ON CONFLICT (hotel_id, review_id) DO UPDATE SET
+    review_text = EXCLUDED.review_text,
+    review_date = EXCLUDED.review_date,
+    review_title = EXCLUDED.review_title
+WHERE reviews.row_hash IS DISTINCT FROM EXCLUDED.row_hash;
+\endif
 
 \echo 'Reviews table stats:'
 SELECT COUNT(*) AS total_reviews FROM reviews;
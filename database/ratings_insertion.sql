@@ -1,32 +1,45 @@
-\echo 'Clearing ratings table'
-TRUNCATE ratings RESTART IDENTITY;
+\if :{?bulk_load}
+\else
+\set bulk_load 0
+\endif
+\if :{?binary_copy}
+\else
+\set binary_copy 0
+\endif
 
 \echo 'Loading ratings from processed_data/final_ratings.csv'
+\if :bulk_load
+\echo 'Bulk load: copying straight into the bare ratings table'
+\if :binary_copy
+\copy ratings (review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score) FROM PROGRAM 'python3 /app/scripts/emit_copy_binary.py ratings' WITH (FORMAT binary);
+\else
 \copy ratings (review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score) FROM '/app/processed_data/final_ratings.csv' WITH (FORMAT csv, HEADER true);
+\endif
+\else
+CREATE TEMP TABLE stage_ratings AS
+SELECT review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score
+FROM ratings WITH NO DATA;
 
-\echo 'Refreshing ratings_average table'
-TRUNCATE ratings_average;
-INSERT INTO ratings_average (
-    hotel_id,
-    avg_service,
-    avg_price,
-    avg_room,
-    avg_location,
-    avg_overall,
-    total_reviews,
-    last_updated
-)
-SELECT
-    hotel_id,
-    ROUND(AVG(service_score)::numeric, 2),
-    ROUND(AVG(price_score)::numeric, 2),
-    ROUND(AVG(room_score)::numeric, 2),
-    ROUND(AVG(location_score)::numeric, 2),
-    ROUND(AVG(overall_score)::numeric, 2),
-    COUNT(*),
-    NOW()
-FROM ratings
-GROUP BY hotel_id;
+\if :binary_copy
+\copy stage_ratings (review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score) FROM PROGRAM 'python3 /app/scripts/emit_copy_binary.py ratings' WITH (FORMAT binary);
+\else
+\copy stage_ratings (review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score) FROM '/app/processed_data/final_ratings.csv' WITH (FORMAT csv, HEADER true);
+\endif
+
+INSERT INTO ratings (review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score)
+SELECT review_id, hotel_id, service_score, price_score, room_score, location_score, overall_score
+FROM stage_ratings
+ON CONFLICT (hotel_id, review_id) DO UPDATE SET
+    service_score = EXCLUDED.service_score,
+    price_score = EXCLUDED.price_score,
+    room_score = EXCLUDED.room_score,
+    location_score = EXCLUDED.location_score,
+    overall_score = EXCLUDED.overall_score
+WHERE ratings.row_hash IS DISTINCT FROM EXCLUDED.row_hash;
+\endif
+
+-- ratings_average is kept current by the triggers on ratings
+-- (database/migrations/0002_incremental_rating_averages.sql).
 
 \echo 'Ratings summary'
 SELECT COUNT(*) AS total_ratings FROM ratings;
@@ -0,0 +1,13 @@
+-- Refresh the materialized read models once a load has finished.
+-- CONCURRENTLY builds the new contents alongside the old ones, so readers
+-- are never blocked; it relies on each view's unique index.
+REFRESH MATERIALIZED VIEW CONCURRENTLY hotel_ratings_view;
+ANALYZE hotel_ratings_view;
+REFRESH MATERIALIZED VIEW CONCURRENTLY hotel_leaderboard;
+ANALYZE hotel_leaderboard;
+
+-- City, country and global rollups (migration 0007); only moved rows are rewritten
+SELECT refresh_rating_rollups();
+
+-- Tell read-side caches (scripts/query_service.py) that the data changed
+UPDATE load_version SET version = version + 1, loaded_at = NOW();
@@ -69,12 +69,14 @@ CREATE TABLE hotel (
 
 -- Create Review table
 CREATE TABLE review (
-    IDREVIEW NUMBER PRIMARY KEY,
+    IDREVIEW NUMBER NOT NULL,
     HOTELID NUMBER NOT NULL,
     REVIEW CLOB,
     FILE_SOURCE VARCHAR2(150 BYTE),
     LINE_NUMBER NUMBER,
     PROCESSED_DATE DATE DEFAULT SYSDATE,
+    -- Review ids restart for every hotel, so the key is the pair
+    CONSTRAINT pk_review PRIMARY KEY (HOTELID, IDREVIEW),
     CONSTRAINT fk_review_hotel FOREIGN KEY (HOTELID) REFERENCES hotel (HOTELID) ON DELETE CASCADE
 );
 
@@ -89,7 +91,7 @@ CREATE TABLE ratings (
     LOCATION_SCORE NUMBER(2,0) CHECK (LOCATION_SCORE BETWEEN 1 AND 5),
     OVERALL_SCORE NUMBER(2,0) CHECK (OVERALL_SCORE BETWEEN 1 AND 5),
     ANALYSIS_DATE DATE DEFAULT SYSDATE,
-    CONSTRAINT fk_ratings_review FOREIGN KEY (IDREVIEW) REFERENCES review(IDREVIEW) ON DELETE CASCADE,
+    CONSTRAINT fk_ratings_review FOREIGN KEY (HOTELID, IDREVIEW) REFERENCES review(HOTELID, IDREVIEW) ON DELETE CASCADE,
     CONSTRAINT fk_ratings_hotel FOREIGN KEY (HOTELID) REFERENCES hotel(HOTELID) ON DELETE CASCADE
 );
 
@@ -109,7 +111,8 @@ CREATE TABLE ratingsaverage (
 -- Create sequences for auto-incrementing IDs
 CREATE SEQUENCE hotel_seq START WITH 1 INCREMENT BY 1 NOCACHE NOCYCLE;
 CREATE SEQUENCE review_seq START WITH 1 INCREMENT BY 1 NOCACHE NOCYCLE;
-CREATE SEQUENCE rating_seq START WITH 1 INCREMENT BY 1 NOCACHE NOCYCLE;
+-- Cached so array-bound inserts do not update the dictionary for every NEXTVAL
+CREATE SEQUENCE rating_seq START WITH 1 INCREMENT BY 1 CACHE 1000 NOCYCLE;
 
 -- Create indexes for performance
 CREATE INDEX idx_review_hotelid ON review(HOTELID);
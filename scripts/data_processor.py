@@ -1,9 +1,14 @@
+import argparse
 import os
+import sys
 import pandas as pd
 import re
 from pathlib import Path
 import logging
 
+from review_headers import DATE_COLUMN, REVIEW_DATE_FORMAT, REVIEW_HEADER_PATTERN, TITLE_COLUMN
+from sharding import parse_shard
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -14,8 +19,22 @@ logging.basicConfig(
     ]
 )
 
+def parse_review_headers(reviews):
+    """Split the 'Nov 17 2009 \\t<title>\\t' header off a Series of reviews.
+
+    Returns a frame with REVIEW_DATE (ISO date string) and TITLE columns,
+    empty where a review has no header or its date does not parse.
+    """
+    headers = reviews.astype(str).str.extract(REVIEW_HEADER_PATTERN)
+    dates = pd.to_datetime(headers[0], format=REVIEW_DATE_FORMAT, errors='coerce')
+    titles = headers[1].str.strip(' ')  # spaces only, as in review_headers.py
+    return pd.DataFrame({
+        DATE_COLUMN: dates.dt.strftime('%Y-%m-%d'),
+        TITLE_COLUMN: titles.where(dates.notna() & titles.ne('')),
+    }, index=reviews.index)
+
 class DataProcessor:
-    def __init__(self, raw_data_path='raw_data', output_path='processed_data'):
+    def __init__(self, raw_data_path='raw_data', output_path='processed_data', shard=None):
         # Use absolute paths based on script location
         self.scripts_dir = Path(__file__).parent
         self.project_root = self.scripts_dir.parent
@@ -27,6 +46,12 @@ class DataProcessor:
         # Create output directory if it doesn't exist
         self.output_path.mkdir(parents=True, exist_ok=True)
         
+        # With a sharding.Shard, only that shard's hotels are extracted and
+        # the files are written shard-suffixed under processed_data/shards
+        self.shard = shard
+        if shard:
+            (self.output_path / 'shards').mkdir(exist_ok=True)
+        
         self.logger = logging.getLogger(__name__)
         
         # Common review file patterns (files in city folders)
@@ -51,14 +76,15 @@ class DataProcessor:
             return hotels
         
         try:
-            for city in os.listdir(self.raw_data_path):
+            # Sorted, so hotel IDs are the same on every machine (--shard relies on it)
+            for city in sorted(os.listdir(self.raw_data_path)):
                 city_path = self.raw_data_path / city
                 if city_path.is_dir():
                     self.logger.info(f"Processing city: {city}")
                     
                     # Find all files in this city folder (not subfolders)
                     city_files = []
-                    for item in city_path.iterdir():
+                    for item in sorted(city_path.iterdir()):
                         if item.is_file():
                             city_files.append(item)
                             self.logger.info(f"  Found file: {item.name}")
@@ -108,6 +134,16 @@ class DataProcessor:
         
         return name
     
+    def _output_file(self, stem):
+        """Path of ``<stem>.csv``, shard-suffixed when running as one shard"""
+        if self.shard:
+            return self.shard.path(self.output_path, stem)
+        return self.output_path / f'{stem}.csv'
+    
+    def _in_shard(self, hotel):
+        # Keyed by the hotel's city/file path, which is the same on every node
+        return self.shard.owns(hotel['FILE_PATH'].relative_to(self.raw_data_path).as_posix())
+    
     def _infer_country(self, city):
         """Simple country inference based on city name"""
         country_map = {
@@ -360,7 +396,8 @@ class DataProcessor:
         # Remove the FILE_PATH column for the final CSV
         hotels_export = hotels_df[['HOTELID', 'NAME', 'CITY', 'COUNTRY']]
         
-        output_file = self.output_path / 'hotels.csv'
+        # Every shard writes the full list, so IDs can be checked at merge time
+        output_file = self._output_file('hotels')
         hotels_export.to_csv(output_file, index=False)
         self.logger.info(f"Generated hotels CSV with {len(hotels)} hotels: {output_file}")
         
@@ -376,6 +413,10 @@ class DataProcessor:
             self.logger.error("No hotels found to process!")
             return 0
         
+        if self.shard:
+            hotels = [hotel for hotel in hotels if self._in_shard(hotel)]
+            self.logger.info(f"Shard {self.shard}: extracting {len(hotels)} hotels")
+        
         total_hotels = len(hotels)
         for i, hotel in enumerate(hotels, 1):
             self.logger.info(f"Processing hotel {i}/{total_hotels}: {hotel['NAME']}")
@@ -386,27 +427,99 @@ class DataProcessor:
             self.logger.error("No reviews found in any hotel files!")
             return 0
         
-        # Split into chunks
+        # Parse every review's date and title in one vectorized pass
+        reviews_df = pd.DataFrame(all_reviews)
+        reviews_df = reviews_df.join(parse_review_headers(reviews_df['REVIEW']))
+        
+        # Split into chunks; the frames are kept for in-process pipeline runs
+        self.review_chunks = []
         total_chunks = (len(all_reviews) + chunk_size - 1) // chunk_size
         self.logger.info(f"Splitting {len(all_reviews)} reviews into {total_chunks} chunks...")
         
         for i in range(0, len(all_reviews), chunk_size):
             chunk = all_reviews[i:i + chunk_size]
-            chunk_df = pd.DataFrame(chunk)
-            chunk_file = self.output_path / f'reviews_chunk_{i//chunk_size + 1}.csv'
+            chunk_df = reviews_df.iloc[i:i + chunk_size]
+            chunk_file = self._output_file(f'reviews_chunk_{i//chunk_size + 1}')
             
             # Only keep essential columns for processing
-            chunk_export = chunk_df[['IDREVIEW', 'HOTELID', 'REVIEW']]
+            chunk_export = chunk_df[['IDREVIEW', 'HOTELID', 'REVIEW', DATE_COLUMN, TITLE_COLUMN]]
             chunk_export.to_csv(chunk_file, index=False)
+            self.review_chunks.append((chunk_file.name, chunk_export))
             
             self.logger.info(f"Generated chunk {i//chunk_size + 1}: {len(chunk)} reviews -> {chunk_file}")
         
         self.logger.info(f"Total reviews processed: {len(all_reviews)}")
         return len(all_reviews)
+    
+    def annotate_review_chunks(self):
+        """Add REVIEW_DATE and TITLE columns to chunks written before they existed"""
+        self.logger.info("\n=== Adding Review Dates to Chunks ===")
+        chunk_files = sorted(self.output_path.glob('reviews_chunk_*.csv'))
+        dated = total = 0
+        for chunk_file in chunk_files:
+            # Read every field as text through the python engine, which keeps
+            # reviews with embedded NULs intact so they are rewritten unchanged
+            chunk_df = pd.read_csv(chunk_file, dtype=str, keep_default_na=False, engine='python')
+            headers = parse_review_headers(chunk_df['REVIEW'])
+            chunk_df[DATE_COLUMN] = headers[DATE_COLUMN]
+            chunk_df[TITLE_COLUMN] = headers[TITLE_COLUMN]
+            chunk_df.to_csv(chunk_file, index=False)
+            dated += int(headers[DATE_COLUMN].notna().sum())
+            total += len(chunk_df)
+        self.logger.info(f"Dated {dated} of {total} reviews in {len(chunk_files)} chunks")
+        return dated
+
+def print_expected_layout():
+    """Explain where raw_data should be, after no hotels were found"""
+    print("\nProcessing failed - no hotels found.")
+    print("\nYour current folder structure:")
+    print("CIT444_Final_Project/")
+    print("├── raw_data/")
+    print("│   ├── beijing/")
+    print("│   │   ├── china_hotel_file     <- This should be a file with reviews")
+    print("│   │   └── other_hotel_file")
+    print("│   ├── chicago/")
+    print("│   │   └── chicago_hotel_file")
+    print("│   └── ...")
+    print("├── scripts/")
+    print("├── processed_data/")
+    print("└── ...")
+    print("\nPlease make sure your hotel files contain review text (one review per line).")
+
+def run_in_pipeline(handoff):
+    """Pipeline entry point for run_project.py --in-process
+    
+    Writes hotels.csv and the review chunks as usual and also leaves the
+    chunk DataFrames in ``handoff['review_chunks']`` as (file name, frame)
+    pairs, so later steps in the same process do not read them back.
+    Succeeds and fails exactly when main() does.
+    """
+    processor = DataProcessor()
+    hotels_df = processor.generate_hotels_csv()
+    if hotels_df is None:
+        print_expected_layout()
+        return False
+    
+    total_reviews = processor.generate_reviews_chunks()
+    handoff['review_chunks'] = getattr(processor, 'review_chunks', [])
+    print(f"Processing complete! Found {len(hotels_df)} hotels and {total_reviews} reviews.")
+    return True
 
 def main():
     """Main function to run data processing"""
-    processor = DataProcessor()
+    parser = argparse.ArgumentParser(description="Build hotels.csv and review chunks from raw_data.")
+    parser.add_argument('--annotate-chunks', action='store_true',
+                        help="add REVIEW_DATE and TITLE to existing chunks instead")
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help="extract only the hotels of shard I of N (see sharding.py)")
+    # Passed by 'run_project.py sample'; the run is the same as without it
+    parser.add_argument('--sample', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    processor = DataProcessor(shard=args.shard)
+    
+    if args.annotate_chunks:
+        processor.annotate_review_chunks()
+        return 0
     
     print("Starting CIT444 Data Processing")
     print("=" * 60)
@@ -422,22 +535,15 @@ def main():
     if hotels_df is not None:
         total_reviews = processor.generate_reviews_chunks()
         print(f"\nProcessing complete! Found {len(hotels_df)} hotels and {total_reviews} reviews.")
-        print(f"Check the 'processed_data' folder for output files.")
-    else:
-        print("\nProcessing failed - no hotels found.")
-        print("\nYour current folder structure:")
-        print("CIT444_Final_Project/")
-        print("├── raw_data/")
-        print("│   ├── beijing/")
-        print("│   │   ├── china_hotel_file     <- This should be a file with reviews")
-        print("│   │   └── other_hotel_file")
-        print("│   ├── chicago/")
-        print("│   │   └── chicago_hotel_file")
-        print("│   └── ...")
-        print("├── scripts/")
-        print("├── processed_data/")
-        print("└── ...")
-        print("\nPlease make sure your hotel files contain review text (one review per line).")
+        if args.shard:
+            print(f"Shard {args.shard} written to processed_data/shards; run sharding.py merge once every shard is in.")
+        else:
+            print(f"Check the 'processed_data' folder for output files.")
+        return 0
+    
+    # Non-zero, so run_project.py stops here as it does in process
+    print_expected_layout()
+    return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
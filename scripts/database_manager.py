@@ -1,9 +1,53 @@
+import csv
 import os
-from typing import List
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List
 
 import oracledb
 import pandas as pd
 
+PROCESSED_DATA_DIR = Path("processed_data")
+# Written after a successful setup; the pipeline caches Database Setup on it
+LOAD_STAMP = PROCESSED_DATA_DIR / "database_load.stamp"
+BULK_BATCH_SIZE = 5000
+
+# Rows per round trip when reading results; prefetching the same number with
+# the execute saves the first fetch its own round trip
+FETCH_ARRAYSIZE = 5000
+PREVIEW_ROWS = 20
+DEFAULT_POOL_SIZE = min(8, os.cpu_count() or 1)
+
+HOTEL_INSERT = (
+    "INSERT INTO hotel (HOTELID, NAME, CITY, COUNTRY, SOURCE_FOLDER) "
+    "VALUES (:1, :2, :3, :4, :5)"
+)
+REVIEW_INSERT = (
+    "INSERT INTO review (IDREVIEW, HOTELID, REVIEW, FILE_SOURCE, LINE_NUMBER) "
+    "VALUES (:1, :2, :3, :4, :5)"
+)
+RATING_INSERT = (
+    "INSERT INTO ratings (RATINGID, IDREVIEW, HOTELID, SERVICE_SCORE, PRICE_SCORE, "
+    "ROOM_SCORE, LOCATION_SCORE, OVERALL_SCORE) "
+    "VALUES (rating_seq.NEXTVAL, :1, :2, :3, :4, :5, :6, :7)"
+)
+RATINGS_AVERAGE_REFRESH = (
+    "INSERT INTO ratingsaverage (HOTELID, AVG_SERVICE, AVG_PRICE, AVG_ROOM, AVG_LOCATION, "
+    "AVG_OVERALL, TOTAL_REVIEWS, LAST_UPDATED) "
+    "SELECT HOTELID, ROUND(AVG(SERVICE_SCORE), 2), ROUND(AVG(PRICE_SCORE), 2), "
+    "ROUND(AVG(ROOM_SCORE), 2), ROUND(AVG(LOCATION_SCORE), 2), ROUND(AVG(OVERALL_SCORE), 2), "
+    "COUNT(*), SYSDATE FROM ratings GROUP BY HOTELID"
+)
+
+# Reviews run up to ~15 KB, past the 4000-byte limit of a VARCHAR2 bind, so
+# the text is bound as LONG, which Oracle accepts for CLOB inserts
+REVIEW_INPUT_SIZES = (None, None, oracledb.DB_TYPE_LONG, None, None)
+
+csv.field_size_limit(sys.maxsize)
+
 class DatabaseManager:
     """Handle Oracle connections and run project SQL scripts."""
 
@@ -21,19 +65,18 @@ class DatabaseManager:
         self.port = int(port or os.getenv("ORACLE_PORT", 1521))
         self.service_name = service_name or os.getenv("ORACLE_SERVICE", "XEPDB1")
         self.connection = None
+        self.pool = None
     
+    def _dsn(self) -> str:
+        return oracledb.makedsn(self.host, self.port, service_name=self.service_name)
+
     def connect(self):
         """Connect to Oracle database"""
         try:
-            dsn = oracledb.makedsn(
-                self.host,
-                self.port,
-                service_name=self.service_name,
-            )
             self.connection = oracledb.connect(
                 user=self.username,
                 password=self.password,
-                dsn=dsn,
+                dsn=self._dsn(),
             )
             print("✅ Connected to Oracle Database")
             return True
@@ -109,24 +152,57 @@ class DatabaseManager:
 
         return statements
 
-    def execute_sql_file(self, file_path):
-        """Execute SQL file from VS Code"""
+    def _cursor(self, batch_size: int = FETCH_ARRAYSIZE):
+        cursor = self.connection.cursor()
+        cursor.arraysize = batch_size
+        cursor.prefetchrows = batch_size
+        return cursor
+
+    def iter_query(self, sql: str, params=None, batch_size: int = FETCH_ARRAYSIZE) -> Iterator[pd.DataFrame]:
+        """Run a query and yield its result as DataFrames of up to ``batch_size`` rows.
+
+        Only one batch is held in memory at a time, however large the result.
+        """
+        cursor = self._cursor(batch_size)
+        try:
+            cursor.execute(sql, params or [])
+            yield from _result_batches(cursor, batch_size)
+        finally:
+            cursor.close()
+
+    def query_to_csv(self, sql: str, csv_path, params=None, batch_size: int = FETCH_ARRAYSIZE) -> int:
+        """Stream a query result straight into ``csv_path`` and return the row count."""
+        return _write_csv(self.iter_query(sql, params, batch_size), Path(csv_path))
+
+    def execute_sql_file(self, file_path, results_dir=None, batch_size: int = FETCH_ARRAYSIZE):
+        """Execute SQL file from VS Code
+
+        Query results are fetched in batches of ``batch_size`` rows: the first
+        rows are printed as a preview and, when ``results_dir`` is given, every
+        row is written to ``<results_dir>/<script>_<n>.csv``.
+        """
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 sql_content = file.read()
 
             statements = self._prepare_statements(sql_content)
 
-            cursor = self.connection.cursor()
+            cursor = self._cursor(batch_size)
+            query_number = 0
             for statement in statements:
                 try:
                     cursor.execute(statement)
                     if cursor.description:
-                        results = cursor.fetchall()
-                        columns = [desc[0] for desc in cursor.description]
-                        df = pd.DataFrame(results, columns=columns)
+                        query_number += 1
+                        batches = _result_batches(cursor, batch_size)
                         print(f"📊 Results for: {statement[:60]}...")
-                        print(df)
+                        if results_dir is not None:
+                            csv_path = Path(results_dir) / f"{Path(file_path).stem}_{query_number}.csv"
+                            total = _write_csv(_print_preview(batches), csv_path)
+                            print(f"({total} rows, saved to {csv_path})")
+                        else:
+                            total = sum(len(batch) for batch in _print_preview(batches))
+                            print(f"({total} rows)")
                     else:
                         print(f"✅ Executed: {statement[:60]}...")
                 except Exception as stmt_err:
@@ -154,25 +230,228 @@ class DatabaseManager:
             else:
                 print(f"⚠️ Script not found: {script_path}")
     
+    def create_pool(self, size: int = DEFAULT_POOL_SIZE):
+        """Create the session pool the bulk loader spreads its work over"""
+        if self.pool is None:
+            self.pool = oracledb.create_pool(
+                user=self.username,
+                password=self.password,
+                dsn=self._dsn(),
+                min=1,
+                max=max(1, size),
+                increment=1,
+            )
+        return self.pool
+
+    def bulk_load(
+        self,
+        data_dir: Path | str = PROCESSED_DATA_DIR,
+        batch_size: int = BULK_BATCH_SIZE,
+        workers: int = DEFAULT_POOL_SIZE,
+    ) -> bool:
+        """Replace hotel/review/ratings rows with the processed CSVs using array binding.
+
+        Rows go in with ``cursor.executemany`` in batches of ``batch_size``.
+        Hotels load first, then review chunks and rating batches are spread
+        over a session pool of ``workers`` sessions (the foreign keys fix that
+        table order), and ratingsaverage is rebuilt at the end.
+        """
+        data_dir = Path(data_dir)
+        hotels_csv = data_dir / "hotels.csv"
+        chunk_files = sorted(data_dir.glob("reviews_chunk_*.csv"))
+        ratings_csv = data_dir / "final_ratings.csv"
+        missing = [str(p) for p in (hotels_csv, ratings_csv) if not p.exists()]
+        if missing or not chunk_files:
+            print(f"❌ Processed data incomplete in {data_dir}: missing {missing or 'review chunks'}")
+            return False
+
+        started = time.perf_counter()
+        pool = self.create_pool(workers)
+        try:
+            with pool.acquire() as conn:
+                cursor = conn.cursor()
+                for table in ("ratingsaverage", "ratings", "review", "hotel"):
+                    cursor.execute(f"DELETE FROM {table}")
+                count = _insert_batches(cursor, HOTEL_INSERT, _hotel_rows(hotels_csv), batch_size)
+                conn.commit()
+            print(f"✅ Loaded {count} hotels ({time.perf_counter() - started:.2f}s)")
+
+            self._load_parallel(
+                "reviews",
+                [(REVIEW_INSERT, _review_rows(path), REVIEW_INPUT_SIZES) for path in chunk_files],
+                batch_size,
+                workers,
+            )
+            self._load_parallel(
+                "ratings",
+                ((RATING_INSERT, batch, None) for batch in _batches(_rating_rows(ratings_csv), batch_size)),
+                batch_size,
+                workers,
+            )
+
+            with pool.acquire() as conn:
+                cursor = conn.cursor()
+                cursor.execute(RATINGS_AVERAGE_REFRESH)
+                conn.commit()
+            print(f"🎉 Oracle bulk load complete ({time.perf_counter() - started:.2f}s)")
+            return True
+        except oracledb.Error as e:
+            print(f"❌ Oracle bulk load failed: {e}")
+            return False
+
+    def _load_parallel(self, label: str, jobs: Iterable, batch_size: int, workers: int) -> int:
+        """Run ``(sql, rows, input_sizes)`` jobs concurrently, one pooled session and commit each."""
+
+        def run(job) -> int:
+            sql, rows, input_sizes = job
+            with self.pool.acquire() as conn:
+                count = _insert_batches(conn.cursor(), sql, rows, batch_size, input_sizes)
+                conn.commit()
+            return count
+
+        started = time.perf_counter()
+        total = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for future in as_completed([executor.submit(run, job) for job in jobs]):
+                total += future.result()
+        elapsed = time.perf_counter() - started
+        print(f"✅ Loaded {total} {label} on {workers} sessions ({elapsed:.2f}s, {total / elapsed:,.0f} rows/s)")
+        return total
+
     def close(self):
         """Close database connection"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
         if self.connection:
             self.connection.close()
             print("✅ Database connection closed")
 
+def _insert_batches(cursor, sql: str, rows: Iterable[tuple], batch_size: int, input_sizes=None) -> int:
+    count = 0
+    for batch in _batches(rows, batch_size):
+        if input_sizes:
+            cursor.setinputsizes(*input_sizes)
+        cursor.executemany(sql, batch)
+        count += len(batch)
+    cursor.close()
+    return count
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _hotel_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            yield (_to_int(row.get("HOTELID")), row.get("NAME"), row.get("CITY"),
+                   row.get("COUNTRY"), row.get("SOURCE_FOLDER"))
+
+
+def _review_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        for line_no, row in enumerate(csv.DictReader(fh), 1):
+            text = row.get("REVIEW")
+            yield (_to_int(row.get("IDREVIEW")), _to_int(row.get("HOTELID")),
+                   text.replace("\x00", "") if text else text, path.name, line_no)
+
+
+def _rating_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            yield tuple(_to_int(row.get(name)) for name in
+                        ("REVIEWID", "HOTELID", "SERVICE", "PRICE", "ROOM", "LOCATION", "OVERALL"))
+
+
+def _to_int(value: str | None) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+
+
+def _result_batches(cursor, batch_size: int) -> Iterator[pd.DataFrame]:
+    columns = [desc[0] for desc in cursor.description]
+    while rows := cursor.fetchmany(batch_size):
+        yield pd.DataFrame(rows, columns=columns)
+
+
+def _print_preview(batches: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Pass batches through, printing the first rows of the result on the way."""
+    printed = False
+    for batch in batches:
+        if not printed:
+            print(batch.head(PREVIEW_ROWS))
+            printed = True
+        yield batch
+    if not printed:
+        print("(no rows)")
+
+
+def _write_csv(batches: Iterable[pd.DataFrame], csv_path: Path) -> int:
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    total = 0
+    with csv_path.open('w', newline='', encoding='utf-8') as fh:
+        for batch in batches:
+            batch.to_csv(fh, index=False, header=total == 0)
+            total += len(batch)
+    return total
+
+
 # VS Code integration function
 def setup_database_from_vscode():
-    """Run this from VS Code to set up the entire database"""
+    """Run this from VS Code to set up the entire database
+
+    Paths are taken from the project root, so this works from any working
+    directory (run_project.py runs the script from scripts/). Returns True
+    on success, after writing LOAD_STAMP; the stamp is removed first, so a
+    failed or interrupted setup never leaves one behind.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    stamp = project_root / LOAD_STAMP
+    stamp.unlink(missing_ok=True)
     db_manager = DatabaseManager()
     
+    ok = False
     if db_manager.connect():
         try:
-            db_manager.run_all_sql_scripts()
-            print("🎉 Database setup complete!")
+            # The data scripts in database/ are psql scripts, so Oracle gets
+            # its schema from schema.sql and its data from the bulk loader
+            ok = bool(
+                db_manager.execute_sql_file(project_root / 'database' / 'schema.sql')
+                and db_manager.bulk_load(project_root / PROCESSED_DATA_DIR)
+            )
         finally:
             db_manager.close()
-    else:
-        print("❌ Database setup failed!")
+    
+    if ok:
+        stamp.parent.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(
+            f"{db_manager.username}@{db_manager.host}:{db_manager.port}/{db_manager.service_name} "
+            f"loaded {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+            encoding='utf-8',
+        )
+    print("🎉 Database setup complete!" if ok else "❌ Database setup failed!")
+    return ok
+
+def run_in_pipeline(handoff):
+    """Pipeline entry point for run_project.py --in-process
+
+    The bulk load reads the CSVs the earlier steps wrote, so it runs the
+    same setup as the script and reports the same status.
+    """
+    return setup_database_from_vscode()
+
+def main():
+    return 0 if setup_database_from_vscode() else 1
 
 if __name__ == "__main__":
-    setup_database_from_vscode()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Stream reviews or ratings in PostgreSQL binary COPY format.
+
+Binary COPY hands the server ready-made values: int8 ids, int2 scores and
+length-prefixed UTF-8 text, so it skips the per-field text parsing and
+unescaping that ``FORMAT text``/``csv`` need. Column types must match the
+target table exactly, which they do for reviews (review_id, hotel_id,
+review_text, review_date, review_title) and ratings (review_id, hotel_id and the five scores), and for
+their staging tables created from them.
+
+    python3 emit_copy_binary.py reviews   # from processed_data/reviews_chunk_*.csv
+    python3 emit_copy_binary.py ratings   # from processed_data/final_ratings.csv
+
+processed_reviews.sql and ratings_insertion.sql use it when the docker load
+runs with ``COPY_FORMAT=binary``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import os
+import struct
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Iterator
+
+from emit_reviews_csv import DATA_DIR, OUTPUT_BUFFER_BYTES, chunk_files, review_rows
+
+RATINGS_FILE = "final_ratings.csv"
+SCORE_NAMES = ("SERVICE", "PRICE", "ROOM", "LOCATION", "OVERALL")
+
+# Signature, flags and header-extension length, then a field count of -1 as the trailer
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+# Field count followed by the two int8 ids; review text length follows the ids
+REVIEW_PREFIX = struct.Struct(">hiqiqi")
+RATING_PREFIX = struct.Struct(">hiqiq")
+SCORE = struct.Struct(">ih")
+# Binary dates are int4 days since 2000-01-01
+DATE = struct.Struct(">ii")
+POSTGRES_EPOCH = date(2000, 1, 1).toordinal()
+TEXT_LENGTH = struct.Struct(">i")
+NULL_FIELD = struct.pack(">i", -1)
+
+csv.field_size_limit(sys.maxsize)
+
+
+def review_tuples(path: Path) -> Iterator[bytes]:
+    """Yield one binary COPY tuple per review in ``path``."""
+    for review_id, hotel_id, text, review_date, title in review_rows(path):
+        # Postgres text cannot hold NUL
+        data = text.replace("\x00", "").encode("utf-8")
+        day = NULL_FIELD if review_date is None else DATE.pack(4, review_date.toordinal() - POSTGRES_EPOCH)
+        if title is None:
+            heading = NULL_FIELD
+        else:
+            encoded = title.replace("\x00", "").encode("utf-8")
+            heading = TEXT_LENGTH.pack(len(encoded)) + encoded
+        yield REVIEW_PREFIX.pack(5, 8, int(review_id), 8, int(hotel_id), len(data)) + data + day + heading
+
+
+def rating_tuples(path: Path) -> Iterator[bytes]:
+    """Yield one binary COPY tuple per rating in ``path``; empty scores become NULL."""
+    with path.open(encoding="utf-8", newline="") as fh:
+        reader = csv.DictReader(fh)
+        for row in reader:
+            review_id = _to_int(row.get("REVIEWID"))
+            hotel_id = _to_int(row.get("HOTELID"))
+            if review_id is None or hotel_id is None:
+                continue
+            parts = [RATING_PREFIX.pack(7, 8, review_id, 8, hotel_id)]
+            for name in SCORE_NAMES:
+                score = _to_int(row.get(name)) or _to_int(row.get(f"{name}_SCORE"))
+                parts.append(NULL_FIELD if score is None else SCORE.pack(2, score))
+            yield b"".join(parts)
+
+
+def _to_int(value: str | None) -> int | None:
+    # Same lenient parsing as postgres_loader._to_int ("4", "4.0", "")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+
+
+def _sources(table: str, data_dir: Path, ratings_file: Path | None) -> list[tuple[Path, object]]:
+    if table == "reviews":
+        return [(path, review_tuples) for path in chunk_files(data_dir)]
+    path = ratings_file or data_dir / RATINGS_FILE
+    return [(path, rating_tuples)] if path.exists() else []
+
+
+def stream(table: str, data_dir: Path = DATA_DIR, ratings_file: Path | None = None) -> int:
+    sources = _sources(table, data_dir, ratings_file)
+    if not sources:
+        print(f"No source files found for {table}", file=sys.stderr)
+        return 1
+
+    print(f"Streaming {table} from {len(sources)} file(s) in binary COPY format", file=sys.stderr)
+
+    out = io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "wb", closefd=False), OUTPUT_BUFFER_BYTES)
+    try:
+        out.write(COPY_HEADER)
+        for path, tuples in sources:
+            out.write(b"".join(tuples(path)))
+        out.write(COPY_TRAILER)
+    finally:
+        out.flush()
+    return 0
+
+
+def benchmark(table: str, data_dir: Path = DATA_DIR, ratings_file: Path | None = None) -> int:
+    """Time the emitter with its output discarded."""
+    sources = _sources(table, data_dir, ratings_file)
+    if not sources:
+        print(f"No source files found for {table}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    rows = 0
+    size = 0
+    with open(os.devnull, "wb", buffering=OUTPUT_BUFFER_BYTES) as sink:
+        for path, tuples in sources:
+            encoded = list(tuples(path))
+            rows += len(encoded)
+            size += sink.write(b"".join(encoded))
+    seconds = time.perf_counter() - started
+    print(
+        f"{table}: {rows} rows, {size / 1e6:.1f} MB in {seconds:.2f}s "
+        f"({rows / seconds:,.0f} rows/s, {size / 1e6 / seconds:.1f} MB/s)"
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=("reviews", "ratings"))
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help=f"processed data directory (default: {DATA_DIR})")
+    parser.add_argument("--ratings-file", type=Path, default=None, help=f"ratings CSV (default: <data-dir>/{RATINGS_FILE})")
+    parser.add_argument("--benchmark", action="store_true", help="measure throughput instead of emitting rows")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        return benchmark(args.table, args.data_dir, args.ratings_file)
+    return stream(args.table, args.data_dir, args.ratings_file)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
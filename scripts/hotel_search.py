@@ -0,0 +1,261 @@
+"""Fuzzy hotel-name lookup with an in-memory trigram index.
+
+Hotel names come from folder names (``China  Aloft  Haidian``) and users
+type partial or misspelled ones (``aloft``, ``hiltn``). Every name is split
+into trigrams the way pg_trgm does it (lower-cased alphanumeric words, each
+padded with two spaces in front and one behind) and a posting list per
+trigram points at the names containing it. A query only visits the postings
+of its own trigrams; hotels are ranked by the share of the query's trigrams
+found in their name, then by pg_trgm ``similarity``. Migration 0011 adds the
+matching GIN index on ``hotels.name`` to the database; this index needs
+nothing but ``processed_data/hotels.csv``.
+
+    python scripts/hotel_search.py "aloft haidian"
+    python scripts/hotel_search.py hiltn --city London
+    python scripts/hotel_search.py --benchmark --synthetic 100000
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+HOTELS_CSV = Path("processed_data/hotels.csv")
+DEFAULT_LIMIT = 10
+# Share of the query's trigrams a name must contain to be returned
+DEFAULT_THRESHOLD = 0.4
+WORD = re.compile(r"[^\W_]+")
+
+BENCHMARK_QUERIES = (
+    ("aloft haidian", None),
+    ("hiltn", None),
+    ("holliday in express", None),
+    ("ascot", "Beijing"),
+    ("marriot", "London"),
+    ("bamboo gardn", None),
+)
+
+
+def trigrams(text: str | None) -> set[str]:
+    """pg_trgm's trigrams of ``text``: ``show_trgm()`` returns the same set."""
+    grams: set[str] = set()
+    for word in WORD.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class Hotel:
+    hotel_id: int
+    name: str
+    city: str | None
+    country: str | None
+
+
+@dataclass(frozen=True)
+class HotelMatch:
+    hotel_id: int
+    name: str
+    city: str | None
+    country: str | None
+    # Share of the query's trigrams found in the name, and pg_trgm similarity()
+    score: float
+    similarity: float
+
+
+class TrigramIndex:
+    """Trigram posting lists over hotel names, searched with ``search_hotels``."""
+
+    def __init__(self, hotels: Iterable[Hotel]) -> None:
+        self.hotels = list(hotels)
+        postings: dict[str, list[int]] = defaultdict(list)
+        sizes = []
+        for position, hotel in enumerate(self.hotels):
+            grams = trigrams(hotel.name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = np.asarray(sizes, dtype=np.int32)
+        # Cities as small integer codes, so a city filter is one vector compare
+        self._city_codes: dict[str, int] = {}
+        self._city_of = np.asarray(
+            [self._city_codes.setdefault((hotel.city or "").lower(), len(self._city_codes)) for hotel in self.hotels],
+            dtype=np.int32,
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path = HOTELS_CSV) -> "TrigramIndex":
+        """Index the hotels data_processor.py wrote, without a database."""
+        with path.open(encoding="utf-8", newline="") as fh:
+            return cls(
+                Hotel(int(row["HOTELID"]), row["NAME"], row.get("CITY") or None, row.get("COUNTRY") or None)
+                for row in csv.DictReader(fh)
+                if (row.get("HOTELID") or "").isdigit()
+            )
+
+    @classmethod
+    def from_database(cls, conn) -> "TrigramIndex":
+        rows = conn.execute("SELECT hotel_id, name, city, country FROM hotels ORDER BY hotel_id").fetchall()
+        conn.commit()
+        return cls(Hotel(*row) for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.hotels)
+
+    def search_hotels(
+        self,
+        query: str,
+        city: str | None = None,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[HotelMatch]:
+        """Hotels whose names best match ``query``, optionally within one city (case-insensitive)."""
+        grams = trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists or limit < 1:
+            return []
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.hotels))
+        score = shared / len(grams)
+        similarity = shared / (self._sizes + len(grams) - shared)
+        mask = score >= threshold
+        if city is not None:
+            code = self._city_codes.get(city.lower())
+            if code is None:
+                return []
+            mask &= self._city_of == code
+
+        candidates = np.flatnonzero(mask)
+        # lexsort keys run last-to-first: score, then similarity, then index order
+        order = np.lexsort((candidates, -similarity[candidates], -score[candidates]))[:limit]
+        matches = []
+        for position in candidates[order]:
+            hotel = self.hotels[position]
+            matches.append(
+                HotelMatch(
+                    hotel.hotel_id,
+                    hotel.name,
+                    hotel.city,
+                    hotel.country,
+                    round(float(score[position]), 3),
+                    round(float(similarity[position]), 3),
+                )
+            )
+        return matches
+
+
+# ----------------------------------------------------------------------
+def synthetic_hotels(hotels: list[Hotel], count: int, seed: int = 444) -> list[Hotel]:
+    """``count`` made-up hotels whose names mix words of the real ones, in the real cities."""
+    rng = random.Random(seed)
+    words = [word for hotel in hotels for word in hotel.name.split()]
+    places = [(hotel.city, hotel.country) for hotel in hotels]
+    synthetic = []
+    for hotel_id in range(1, count + 1):
+        city, country = rng.choice(places)
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(2, 5)))
+        synthetic.append(Hotel(hotel_id, name, city, country))
+    return synthetic
+
+
+def _scan(names: list[set[str]], hotels: list[Hotel], query: str, city: str | None, limit: int) -> list[int]:
+    # What a lookup costs without the index: every name is compared
+    grams = trigrams(query)
+    city = city.lower() if city else None
+    scored = []
+    for position, name in enumerate(names):
+        if city and (hotels[position].city or "").lower() != city:
+            continue
+        shared = len(grams & name)
+        if shared >= DEFAULT_THRESHOLD * len(grams):
+            scored.append((-shared / len(grams), -shared / (len(name) + len(grams) - shared), position))
+    scored.sort()
+    return [position for *_, position in scored[:limit]]
+
+
+def _latency(fn, runs: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))]
+
+
+def benchmark(hotels: list[Hotel], synthetic: int = 100_000, runs: int = 50) -> None:
+    """Print index build time and per-query latency, indexed and by full scan."""
+    for label, dataset in (("current hotels", hotels), (f"{synthetic:,} synthetic", synthetic_hotels(hotels, synthetic))):
+        started = time.perf_counter()
+        index = TrigramIndex(dataset)
+        build = time.perf_counter() - started
+        names = [trigrams(hotel.name) for hotel in dataset]
+        print(f"\n=== {label}: {len(index):,} hotels, {len(index._postings):,} trigrams, built in {build:.2f}s ===")
+        print(f"{'query':<22}{'city':<10}{'index ms':>10}{'p95':>8}{'scan ms':>10}{'hits':>6}  best match")
+        for query, city in BENCHMARK_QUERIES:
+            index_ms, index_p95 = _latency(lambda: index.search_hotels(query, city), runs)
+            scan_ms, _ = _latency(lambda: _scan(names, dataset, query, city, DEFAULT_LIMIT), max(1, runs // 10))
+            matches = index.search_hotels(query, city)
+            best = " ".join(matches[0].name.split()) if matches else "-"
+            print(
+                f"{query:<22}{city or '-':<10}{index_ms:>10.3f}{index_p95:>8.3f}{scan_ms:>10.2f}"
+                f"{len(matches):>6}  {best[:40]}"
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Find hotels by partial or misspelled name.")
+    parser.add_argument("query", nargs="?", help='part of a hotel name, e.g. "aloft" or "hiltn"')
+    parser.add_argument("--city")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"share of the query's trigrams a name must contain (default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--hotels-csv", type=Path, default=HOTELS_CSV)
+    parser.add_argument("--database", action="store_true", help="read hotels from Postgres instead of the CSV")
+    parser.add_argument("--benchmark", action="store_true", help="report lookup latency instead of searching")
+    parser.add_argument("--synthetic", type=int, default=100_000, help="synthetic hotels for --benchmark")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per benchmark query")
+    args = parser.parse_args(argv)
+    if not args.benchmark and not args.query:
+        parser.error("a query is required unless --benchmark is given")
+
+    if args.database:
+        from postgres_loader import PostgresLoader
+
+        loader = PostgresLoader()
+        try:
+            loader.connect()
+            index = TrigramIndex.from_database(loader.conn)
+        finally:
+            loader.close()
+    else:
+        index = TrigramIndex.from_csv(args.hotels_csv)
+
+    if args.benchmark:
+        benchmark(index.hotels, args.synthetic, args.runs)
+        return 0
+
+    matches = index.search_hotels(args.query, args.city, args.limit, args.threshold)
+    for match in matches:
+        print(
+            f"[{match.score:.2f} / {match.similarity:.2f}] {' '.join(match.name.split())} "
+            f"({match.city}, {match.country}) #{match.hotel_id}"
+        )
+    print(f"\n{len(matches)} match(es) among {len(index)} hotels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
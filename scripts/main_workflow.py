@@ -1,46 +1,55 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import pandas as pd
 from collections import Counter
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
 import os
 
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-except:
-    print("NLTK downloads may require internet connection")
+from nltk_resources import NltkResources
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+CUSTOM_STOP_WORDS = ['hotel', 'room', 'stay', 'stayed', 'would', 'could', 'also', 'us', 'we', 'i', 'the', 'a', 'an']
 
 class WordFrequencyAnalyzer:
-    def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
-        
-        # Add custom stop words
-        self.stop_words.update(['hotel', 'room', 'stay', 'stayed', 'would', 'could', 'also', 'us', 'we', 'i', 'the', 'a', 'an'])
+    def __init__(self, resources=None):
+        # NLTK data is resolved lazily on first use (see nltk_resources.py)
+        self.resources = resources or NltkResources()
+        self._stop_words = None
+    
+    @property
+    def lemmatizer(self):
+        return self.resources.lemmatizer()
+    
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = self.resources.stop_words() | set(CUSTOM_STOP_WORDS)
+        return self._stop_words
     
     def process_review_text(self, review_text):
         """Process and tokenize review text"""
         if not isinstance(review_text, str):
             return []
         
-        try:
-            tokens = word_tokenize(review_text.lower())
-            
-            processed_tokens = [
-                self.lemmatizer.lemmatize(word)
-                for word in tokens 
-                if word.isalnum() 
-                and word not in self.stop_words
-                and len(word) > 2  # Remove very short words
-            ]
-            
-            return processed_tokens
-        except:
-            return []
+        # No blanket except here: a missing NLTK table (LookupError) must stop
+        # the run instead of turning every review into zero words
+        tokenize = self.resources.tokenizer()
+        lemmatize = self.lemmatizer.lemmatize
+        stop_words = self.stop_words
+        
+        tokens = tokenize(review_text.lower())
+        
+        processed_tokens = [
+            lemmatize(word)
+            for word in tokens 
+            if word.isalnum() 
+            and word not in stop_words
+            and len(word) > 2  # Remove very short words
+        ]
+        
+        return processed_tokens
     
     def analyze_reviews_file(self, reviews_file):
         """Analyze word frequencies in reviews file"""
@@ -78,6 +87,15 @@ class WordFrequencyAnalyzer:
         
         print(f"Found {len(chunk_files)} review chunks to analyze")
         
+        try:
+            # Resolve the NLTK data before the per-chunk error handling, which would hide a missing table
+            self.resources.tokenizer()
+            self.lemmatizer
+            self.stop_words
+        except (LookupError, OSError) as e:  # OSError: a partially copied data directory
+            print(f"❌ {e}")
+            return None
+        
         combined_counter = Counter()
         total_words = 0
         
@@ -116,8 +134,11 @@ class WordFrequencyAnalyzer:
         return results_df
 
 def main():
+    started = time.perf_counter()
     analyzer = WordFrequencyAnalyzer()
+    print(f"⏱️ Import {IMPORT_SECONDS:.2f}s, startup {IMPORT_SECONDS + time.perf_counter() - started:.2f}s")
     analyzer.analyze_all_chunks()
+    print(f"⏱️ NLTK resources: {analyzer.resources.report()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Apply versioned SQL migrations from database/migrations to PostgreSQL.
+
+Each ``NNNN_description.sql`` file is applied once, in version order, inside
+its own transaction, and recorded in ``schema_migrations`` together with a
+SHA-256 checksum of its contents. Already-applied migrations are skipped; a
+migration whose file changed after it was applied is reported as an error
+rather than silently re-run. The docker ``run-psql-scripts.sh`` flow applies
+the same files and records the same checksums.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import psycopg
+
+# Next to the scripts, so runs from any working directory find the same files
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "database" / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d{4})_[\w-]+\.sql$")
+
+# Arbitrary key for pg_advisory_lock so concurrent runners apply migrations one at a time
+MIGRATION_LOCK_ID = 444_2024
+
+METADATA_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(16) PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+)
+"""
+
+
+class MigrationError(RuntimeError):
+    """Raised when the migration files and the database history disagree."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    path: Path
+    checksum: str
+
+    @classmethod
+    def from_path(cls, path: Path) -> "Migration":
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise MigrationError(f"Migration file name must look like 0001_name.sql: {path.name}")
+        return cls(match.group(1), path.name, path, file_checksum(path))
+
+    def read_sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+def file_checksum(path: Path) -> str:
+    # Drop carriage returns so a Windows checkout hashes the same as Linux
+    # (run-psql-scripts.sh does the same with tr -d '\r')
+    return hashlib.sha256(path.read_bytes().replace(b"\r", b"")).hexdigest()
+
+
+class MigrationRunner:
+    def __init__(self, conn: psycopg.Connection, directory: Path = MIGRATIONS_DIR) -> None:
+        self.conn = conn
+        self.directory = directory
+
+    # ------------------------------------------------------------------
+    def discover(self) -> list[Migration]:
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f"Migrations directory not found: {self.directory}")
+        migrations = [Migration.from_path(path) for path in sorted(self.directory.glob("*.sql"))]
+        versions = [m.version for m in migrations]
+        duplicates = {v for v in versions if versions.count(v) > 1}
+        if duplicates:
+            raise MigrationError(f"Duplicate migration versions: {', '.join(sorted(duplicates))}")
+        return migrations
+
+    def applied(self) -> dict[str, str]:
+        """Return ``{version: checksum}`` for every recorded migration."""
+        with self.conn.transaction():
+            self.conn.execute(METADATA_DDL)
+            rows = self.conn.execute("SELECT version, checksum FROM schema_migrations").fetchall()
+        return {version: checksum for version, checksum in rows}
+
+    def pending(self) -> list[Migration]:
+        applied = self.applied()
+        migrations = self.discover()
+        _verify_checksums(migrations, applied)
+        return [m for m in migrations if m.version not in applied]
+
+    # ------------------------------------------------------------------
+    def migrate(self) -> list[Migration]:
+        """Apply all pending migrations and return the ones that ran."""
+        self.conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        self.conn.commit()
+        try:
+            pending = self.pending()
+            for migration in pending:
+                # The whole file runs as one simple-protocol query, so function
+                # bodies and DO blocks need no client-side statement splitting.
+                with self.conn.transaction():
+                    self.conn.execute(migration.read_sql())
+                    self.conn.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (migration.version, migration.name, migration.checksum),
+                    )
+                print(f"  ✓ Applied migration {migration.name}")
+            return pending
+        finally:
+            self.conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            self.conn.commit()
+
+    def status(self) -> list[tuple[Migration, str]]:
+        applied = self.applied()
+        result = []
+        for migration in self.discover():
+            recorded = applied.get(migration.version)
+            if recorded is None:
+                state = "pending"
+            elif recorded != migration.checksum:
+                state = "CHANGED"
+            else:
+                state = "applied"
+            result.append((migration, state))
+        return result
+
+
+def _verify_checksums(migrations: list[Migration], applied: dict[str, str]) -> None:
+    changed = [m.name for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    if changed:
+        raise MigrationError(
+            "Applied migrations were modified afterwards: "
+            + ", ".join(changed)
+            + ". Add a new migration instead of editing an applied one."
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    from postgres_loader import PostgresLoader
+
+    parser = argparse.ArgumentParser(description="Apply or inspect PostgreSQL schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying")
+    args = parser.parse_args(argv)
+
+    loader = PostgresLoader()
+    try:
+        loader.connect()
+        runner = MigrationRunner(loader.conn)
+        if args.status:
+            for migration, state in runner.status():
+                print(f"{state:<8} {migration.name}")
+            return 0
+        applied = runner.migrate()
+        print(f"✅ {len(applied)} migration(s) applied" if applied else "✅ Schema is up to date")
+        return 0
+    except MigrationError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        loader.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Lazy, offline-first access to the NLTK data used by the word analysis.
+
+NLTK itself is only imported the first time a resource is requested, and the
+stop-word list, WordNet lemmatizer and Punkt tokenizer are resolved on first
+use from a project-local data directory. The network is only touched when a
+resource is genuinely missing and downloads are allowed.
+
+Run ``python nltk_resources.py`` once on a connected machine to populate the
+data directory, then ship it to the air-gapped workers with ``NLTK_OFFLINE=1``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from pathlib import Path
+
+NLTK_DATA_DIR = Path(
+    os.getenv("CIT444_NLTK_DATA", Path(__file__).resolve().parent.parent / "nltk_data")
+)
+
+# package name -> candidate paths inside an NLTK data directory. Only
+# ``punkt_tab`` counts for Punkt: word_tokenize in NLTK >= 3.8.2 cannot use
+# the old pickled ``punkt`` package, so finding that alone proves nothing.
+RESOURCES = {
+    "stopwords": ("stopwords", ("corpora/stopwords",)),
+    "wordnet": ("wordnet", ("corpora/wordnet", "corpora/wordnet.zip")),
+    "punkt": ("punkt_tab", ("tokenizers/punkt_tab/english/",)),
+}
+
+
+def offline_mode() -> bool:
+    """Return True when downloads are disabled via ``NLTK_OFFLINE``."""
+    return os.getenv("NLTK_OFFLINE", "").lower() in {"1", "true", "yes"}
+
+
+class NltkResources:
+    """Resolve NLTK corpora lazily and cache the loaded objects."""
+
+    def __init__(self, data_dir: Path | str = NLTK_DATA_DIR, offline: bool | None = None):
+        self.data_dir = Path(data_dir)
+        self.offline = offline_mode() if offline is None else offline
+        self.timings: dict[str, float] = {}
+        self._nltk = None
+        self._stop_words: set[str] | None = None
+        self._lemmatizer = None
+        self._tokenize = None
+
+    # ------------------------------------------------------------------
+    def _import_nltk(self):
+        if self._nltk is None:
+            started = time.perf_counter()
+            import nltk
+
+            data_dir = str(self.data_dir)
+            if data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, data_dir)
+            self._nltk = nltk
+            self.timings["import nltk"] = time.perf_counter() - started
+        return self._nltk
+
+    def ensure(self, name: str) -> None:
+        """Make sure resource ``name`` is available locally, downloading if allowed."""
+        nltk = self._import_nltk()
+        package, paths = RESOURCES[name]
+
+        for path in paths:
+            try:
+                nltk.data.find(path)
+                return
+            except LookupError:
+                continue
+
+        if self.offline:
+            raise LookupError(
+                f"NLTK resource '{name}' not found in {self.data_dir} and NLTK_OFFLINE is set. "
+                f"Run 'python scripts/nltk_resources.py' on a connected machine first."
+            )
+
+        started = time.perf_counter()
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        for candidate in dict.fromkeys((package, name)):
+            if nltk.download(candidate, download_dir=str(self.data_dir), quiet=True):
+                break
+        else:
+            raise LookupError(f"Unable to download NLTK resource '{name}'")
+        self.timings[f"download {name}"] = time.perf_counter() - started
+
+    # ------------------------------------------------------------------
+    def stop_words(self) -> set[str]:
+        if self._stop_words is None:
+            self.ensure("stopwords")
+            started = time.perf_counter()
+            from nltk.corpus import stopwords
+
+            self._stop_words = set(stopwords.words("english"))
+            self.timings["load stopwords"] = time.perf_counter() - started
+        return self._stop_words
+
+    def lemmatizer(self):
+        if self._lemmatizer is None:
+            self.ensure("wordnet")
+            started = time.perf_counter()
+            from nltk.stem import WordNetLemmatizer
+
+            lemmatizer = WordNetLemmatizer()
+            lemmatizer.lemmatize("warmup")  # forces the WordNet corpus to load now
+            self._lemmatizer = lemmatizer
+            self.timings["load wordnet"] = time.perf_counter() - started
+        return self._lemmatizer
+
+    def tokenizer(self):
+        if self._tokenize is None:
+            self.ensure("punkt")
+            started = time.perf_counter()
+            from nltk.tokenize import word_tokenize
+
+            word_tokenize("warmup")  # loads the tables this NLTK actually uses, or raises now
+            self._tokenize = word_tokenize
+            self.timings["load punkt"] = time.perf_counter() - started
+        return self._tokenize
+
+    def ensure_all(self) -> None:
+        for name in RESOURCES:
+            self.ensure(name)
+
+    def report(self) -> str:
+        if not self.timings:
+            return "no NLTK resources loaded"
+        return ", ".join(f"{label} {seconds:.2f}s" for label, seconds in self.timings.items())
+
+
+def main() -> int:
+    """Populate the local NLTK data directory for offline use."""
+    resources = NltkResources(offline=False)
+    print(f"NLTK data directory: {resources.data_dir}")
+    try:
+        resources.ensure_all()
+    except LookupError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ NLTK resources ready ({resources.report()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Compare a plain ratings table with hash-partitioned ones at synthetic scale.
+
+The loaded ratings are multiplied ``scale`` times, each copy under its own
+range of hotel ids (as if that many more cities were added), into a
+scratch table laid out like ``ratings``: unpartitioned, or hash-partitioned
+by hotel_id the way migration 0008 partitions the real one. For each layout
+the run times
+
+* load: COPY of every row, one stream for the plain table and one
+  connection per partition for the partitioned ones,
+* keys: primary key and hotel_id index, built per partition in parallel and
+  attached to the parent as finish_bulk_load does,
+* aggregate: the per-hotel sums and counts rebuild_ratings_average computes,
+* vacuum: VACUUM ANALYZE of the whole table, then of a single partition,
+  which is what routine maintenance of one slice costs.
+
+    python scripts/partition_benchmark.py --scales 10 100 --partitions 8 16
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from postgres_loader import PostgresLoader, _partition_statements
+
+BENCH_TABLE = "ratings_partition_bench"
+SCORE_COLUMNS = ("service_score", "price_score", "room_score", "location_score", "overall_score")
+BENCH_COLUMNS = ("review_id", "hotel_id") + SCORE_COLUMNS
+# Synthetic copy k of hotel h becomes hotel h + k * HOTEL_ID_STRIDE
+HOTEL_ID_STRIDE = 1_000_000
+
+KEY_STATEMENTS = (
+    f"ALTER TABLE {BENCH_TABLE} ADD CONSTRAINT {BENCH_TABLE}_pkey PRIMARY KEY (hotel_id, review_id)",
+    f"CREATE INDEX {BENCH_TABLE}_hotel_id ON {BENCH_TABLE} (hotel_id)",
+)
+AGGREGATE_SQL = f"""
+    SELECT COUNT(*) FROM (
+        SELECT hotel_id,
+               SUM(service_score), COUNT(service_score), SUM(price_score), COUNT(price_score),
+               SUM(room_score), COUNT(room_score), SUM(location_score), COUNT(location_score),
+               SUM(overall_score), COUNT(overall_score), COUNT(*)
+        FROM {BENCH_TABLE}
+        GROUP BY hotel_id
+    ) per_hotel
+"""
+STAGES = ("load", "keys", "aggregate", "vacuum", "vacuum 1 part")
+
+
+class PartitionBenchmark:
+    def __init__(self, loader: PostgresLoader) -> None:
+        self.loader = loader
+        rows = loader.conn.execute(f"SELECT {', '.join(BENCH_COLUMNS)} FROM ratings").fetchall()
+        loader.conn.commit()
+        self.base_rows = len(rows)
+        self.by_hotel: dict[int, list[tuple]] = defaultdict(list)
+        for row in rows:
+            self.by_hotel[row[1]].append(row[:1] + row[2:])
+
+    # ------------------------------------------------------------------
+    def run(self, scale: int, partitions: int) -> dict[str, float]:
+        """Build and measure one layout; ``partitions`` 0 means a plain table."""
+        timings: dict[str, float] = {}
+        self._create_table(partitions)
+        try:
+            timings["load"] = self._timed(self._load, scale, partitions)
+            timings["keys"] = self._timed(self._build_keys, partitions)
+            timings["aggregate"] = self._timed(self._aggregate)
+            timings["vacuum"] = self._timed(self._vacuum, partitions)
+            if partitions:
+                timings["vacuum 1 part"] = self._timed(self._vacuum_one, f"{BENCH_TABLE}_p0")
+        finally:
+            self.loader.conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+            self.loader.conn.commit()
+        return timings
+
+    def _create_table(self, partitions: int) -> None:
+        conn = self.loader.conn
+        conn.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        columns = "review_id BIGINT NOT NULL, hotel_id BIGINT NOT NULL, " + ", ".join(
+            f"{name} SMALLINT" for name in SCORE_COLUMNS
+        )
+        suffix = " PARTITION BY HASH (hotel_id)" if partitions else ""
+        conn.execute(f"CREATE TABLE {BENCH_TABLE} ({columns}){suffix}")
+        for remainder in range(partitions):
+            conn.execute(
+                f"CREATE TABLE {BENCH_TABLE}_p{remainder} PARTITION OF {BENCH_TABLE} "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            )
+        conn.commit()
+
+    def _synthetic_rows(self, hotels: list[tuple[int, int]]):
+        for copy_no, hotel_id in hotels:
+            synthetic_id = hotel_id + copy_no * HOTEL_ID_STRIDE
+            for review_id, *scores in self.by_hotel[hotel_id]:
+                yield (review_id, synthetic_id, *scores)
+
+    def _load(self, scale: int, partitions: int) -> None:
+        hotels = [(copy_no, hotel_id) for copy_no in range(scale) for hotel_id in self.by_hotel]
+        if not partitions:
+            self._copy(BENCH_TABLE, hotels)
+            return
+        # Route whole hotels client-side, like PostgresLoader._copy_partitions
+        buckets: dict[int, list[tuple[int, int]]] = defaultdict(list)
+        synthetic = {hotel_id + copy_no * HOTEL_ID_STRIDE: (copy_no, hotel_id) for copy_no, hotel_id in hotels}
+        rows = self.loader.conn.execute(
+            "SELECT h, r FROM unnest(%s::bigint[]) AS h CROSS JOIN generate_series(0, %s - 1) AS r "
+            "WHERE satisfies_hash_partition(%s::regclass, %s, r, h)",
+            (list(synthetic), partitions, BENCH_TABLE, partitions),
+        ).fetchall()
+        self.loader.conn.commit()
+        for hotel, remainder in rows:
+            buckets[remainder].append(synthetic[hotel])
+        with ThreadPoolExecutor(max_workers=self.loader.pool.size) as executor:
+            list(executor.map(lambda item: self._copy(f"{BENCH_TABLE}_p{item[0]}", item[1]), buckets.items()))
+
+    def _copy(self, target: str, hotels: list[tuple[int, int]]) -> None:
+        with self.loader.pool.connection() as conn:
+            with conn.transaction(), conn.cursor() as cur:
+                with cur.copy(f"COPY {target} ({', '.join(BENCH_COLUMNS)}) FROM STDIN") as copy:
+                    for row in self._synthetic_rows(hotels):
+                        copy.write_row(row)
+
+    def _build_keys(self, partitions: int) -> None:
+        parts = {BENCH_TABLE: [f"{BENCH_TABLE}_p{r}" for r in range(partitions)]}
+        per_partition = [stmt for key in KEY_STATEMENTS for stmt in _partition_statements(key, parts)]
+        with ThreadPoolExecutor(max_workers=self.loader.pool.size) as executor:
+            list(executor.map(self.loader._run_timed, per_partition))
+        for stmt in KEY_STATEMENTS:
+            self.loader._run_timed(stmt)
+
+    def _aggregate(self) -> None:
+        conn = self.loader.conn
+        conn.execute("SET enable_partitionwise_aggregate = on")
+        conn.execute(AGGREGATE_SQL).fetchone()
+        conn.execute("RESET enable_partitionwise_aggregate")
+        conn.commit()
+
+    def _vacuum(self, partitions: int) -> None:
+        targets = [f"{BENCH_TABLE}_p{r}" for r in range(partitions)] or [BENCH_TABLE]
+        with ThreadPoolExecutor(max_workers=self.loader.pool.size) as executor:
+            list(executor.map(self._vacuum_one, targets))
+        if partitions:
+            # The parent's own statistics cover the whole tree
+            self._vacuum_one(BENCH_TABLE, analyze_only=True)
+
+    def _vacuum_one(self, table: str, analyze_only: bool = False) -> None:
+        with self.loader.pool.connection() as conn:
+            conn.autocommit = True
+            try:
+                conn.execute(f"ANALYZE {table}" if analyze_only else f"VACUUM ANALYZE {table}")
+            finally:
+                conn.autocommit = False
+
+    @staticmethod
+    def _timed(fn, *args) -> float:
+        started = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time loads and aggregates on plain vs hash-partitioned ratings.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100], help="copies of ratings to load (default: 10 100)")
+    parser.add_argument("--partitions", type=int, nargs="+", default=[8], help="partition counts to compare with a plain table")
+    parser.add_argument("--workers", type=int, default=None, help="connections for the parallel steps")
+    args = parser.parse_args(argv)
+
+    loader = PostgresLoader(workers=args.workers)
+    try:
+        loader.connect()
+        bench = PartitionBenchmark(loader)
+        layouts = [0] + args.partitions
+        for scale in args.scales:
+            results = {}
+            for partitions in layouts:
+                label = f"{partitions} parts" if partitions else "plain"
+                print(f"  … scale {scale}x, {label}", flush=True)
+                results[label] = bench.run(scale, partitions)
+            print(
+                f"\n=== {scale}x ratings ({bench.base_rows * scale:,} rows) on "
+                f"{loader.pool.size} connection(s), seconds ==="
+            )
+            print(f"{'stage':<15}" + "".join(f"{label:>12}" for label in results))
+            for stage in STAGES:
+                cells = "".join(
+                    f"{timings[stage]:>12.2f}" if stage in timings else f"{'-':>12}" for timings in results.values()
+                )
+                print(f"{stage:<15}{cells}")
+            print()
+    finally:
+        loader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""Dependency-ordered pipeline steps and a scheduler that overlaps them.
+
+Each ``Step`` names the script it runs, the files it reads and writes
+(glob patterns relative to the project root) and the steps it must wait for.
+``PipelineScheduler`` starts every step whose dependencies have finished,
+up to ``workers`` at a time, so sentiment scoring and word frequency both
+start as soon as data processing has written the review chunks. After the
+run, ``PipelineResult.report()`` prints when each step ran and the critical
+path: the chain of dependent steps that set the wall-clock time.
+
+With a ``StepCache`` the scheduler skips, make-style, every step whose
+fingerprint (the content of its input files and of its script and the local
+modules that script imports) matches the one stored when it last succeeded,
+as long as its outputs are still the files it wrote then. Like make's phony
+targets, steps without declared outputs always run. Database Setup, whose
+result lives in the database, declares the stamp database_manager.py writes
+after a successful load, and its fingerprint includes the ``ORACLE_*``
+settings naming the target database; after the database itself is wiped,
+force it to reload.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+CACHE_DIR = PROJECT_ROOT / "processed_data" / ".pipeline_cache"
+DEFAULT_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "2"))
+# Bump to invalidate every stored fingerprint
+CACHE_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    script: str
+    args: tuple[str, ...] = ()
+    # Glob patterns relative to the project root
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    depends_on: tuple[str, ...] = ()
+    # Environment variables whose values are part of the fingerprint
+    env: tuple[str, ...] = ()
+
+
+# The full pipeline, as run by run_project.py
+DATA_PROCESSING = Step(
+    "Data Processing",
+    "data_processor.py",
+    inputs=("raw_data",),
+    outputs=("processed_data/hotels.csv", "processed_data/reviews_chunk_*.csv"),
+)
+SENTIMENT_ANALYSIS = Step(
+    "Sentiment Analysis",
+    "sentiment_analyzer.py",
+    inputs=("processed_data/reviews_chunk_*.csv",),
+    outputs=("processed_data/final_ratings.csv",),
+    depends_on=(DATA_PROCESSING.name,),
+)
+WORD_FREQUENCY = Step(
+    "Word Frequency Analysis",
+    "word_dictionary.py",
+    inputs=("processed_data/reviews_chunk_*.csv",),
+    outputs=("processed_data/word_frequency_analysis.csv",),
+    depends_on=(DATA_PROCESSING.name,),
+)
+DATABASE_SETUP = Step(
+    "Database Setup",
+    "database_manager.py",
+    inputs=(
+        "database/schema.sql",
+        "processed_data/hotels.csv",
+        "processed_data/reviews_chunk_*.csv",
+        "processed_data/final_ratings.csv",
+    ),
+    # database_manager.LOAD_STAMP
+    outputs=("processed_data/database_load.stamp",),
+    depends_on=(DATA_PROCESSING.name, SENTIMENT_ANALYSIS.name),
+    env=("ORACLE_USER", "ORACLE_HOST", "ORACLE_PORT", "ORACLE_SERVICE"),
+)
+PIPELINE_STEPS = (DATA_PROCESSING, SENTIMENT_ANALYSIS, WORD_FREQUENCY, DATABASE_SETUP)
+
+
+def find_step(steps: Iterable[Step], label: str) -> Step:
+    """The step called ``label``: its name, script or script stem, in any case."""
+    wanted = label.lower()
+    for step in steps:
+        if wanted in (step.name.lower(), step.script.lower(), Path(step.script).stem.lower()):
+            return step
+    raise ValueError(f"No pipeline step called {label!r}")
+
+
+def missing_inputs(step: Step, root: Path = PROJECT_ROOT) -> list[str]:
+    """Input patterns of ``step`` that match nothing under ``root``."""
+    return [pattern for pattern in step.inputs if not any(root.glob(pattern))]
+
+
+def expand(patterns: Iterable[str], root: Path = PROJECT_ROOT) -> list[Path]:
+    """Files matched by ``patterns``, directories expanded recursively, sorted."""
+    files = set()
+    for pattern in patterns:
+        for match in root.glob(pattern):
+            if match.is_dir():
+                files.update(path for path in match.rglob("*") if path.is_file())
+            elif match.is_file():
+                files.add(match)
+    return sorted(files)
+
+
+def code_files(script: str, scripts_dir: Path = SCRIPTS_DIR) -> list[Path]:
+    """``script`` and the modules from ``scripts_dir`` it imports, directly or not."""
+    seen: dict[str, Path] = {}
+    todo = [Path(script).stem]
+    while todo:
+        module = todo.pop()
+        path = scripts_dir / f"{module}.py"
+        if module in seen or not path.is_file():
+            continue
+        seen[module] = path
+        try:
+            tree = ast.parse(path.read_bytes(), filename=str(path))
+        except SyntaxError:
+            # Still hashed; the step itself will report the error
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                todo.extend(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module.split(".")[0])
+    return sorted(seen.values())
+
+
+class StepCache:
+    """Fingerprints of steps that succeeded, one JSON stamp per step in ``directory``.
+
+    A stamp records the fingerprint and, for every input, code and output
+    file, its size, mtime and SHA-256. Files whose size and mtime are
+    unchanged are not read again, so checking an up-to-date step costs a
+    ``stat`` per file.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, root: Path = PROJECT_ROOT) -> None:
+        self.directory = directory
+        self.root = root
+
+    def _stamp_path(self, step: Step) -> Path:
+        return self.directory / (re.sub(r"\W+", "_", step.name.lower()).strip("_") + ".json")
+
+    def _load(self, step: Step) -> dict:
+        try:
+            stamp = json.loads(self._stamp_path(step).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return stamp if stamp.get("format") == CACHE_FORMAT else {}
+
+    def _digests(self, paths: list[Path], known: dict) -> dict[str, list]:
+        digests = {}
+        for path in paths:
+            key = path.relative_to(self.root).as_posix()
+            stat = path.stat()
+            entry = known.get(key)
+            if not entry or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+                digest = hashlib.sha256()
+                with path.open("rb") as fh:
+                    for block in iter(lambda: fh.read(1 << 20), b""):
+                        digest.update(block)
+                entry = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+            digests[key] = entry
+        return digests
+
+    def fingerprint(self, step: Step) -> dict:
+        """Hash ``step``'s script, arguments, environment, input files and code files, taken before it runs."""
+        stamp = self._load(step)
+        known = {**stamp.get("inputs", {}), **stamp.get("code", {})}
+        inputs = self._digests(expand(step.inputs, self.root), known)
+        code = self._digests(code_files(step.script, self.root / "scripts"), known)
+        settings = [CACHE_FORMAT, step.script, step.args]
+        if step.env:
+            settings.append({name: os.environ.get(name) for name in step.env})
+        digest = hashlib.sha256(json.dumps(settings).encode())
+        for key, entry in sorted({**inputs, **code}.items()):
+            digest.update(f"{key}\0{entry[2]}\n".encode())
+        return {"fingerprint": digest.hexdigest(), "inputs": inputs, "code": code}
+
+    def is_fresh(self, step: Step, fingerprint: dict) -> bool:
+        """Whether ``step`` last succeeded with this fingerprint and its outputs are unchanged."""
+        if not step.outputs:
+            # Nothing here shows whether its side effects are still in place
+            return False
+        stamp = self._load(step)
+        if stamp.get("fingerprint") != fingerprint["fingerprint"]:
+            return False
+        outputs = self._digests(expand(step.outputs, self.root), stamp["outputs"])
+        return _hashes(outputs) == _hashes(stamp["outputs"])
+
+    def record(self, step: Step, fingerprint: dict) -> None:
+        """Store the fingerprint a step that just succeeded ran with, next to its outputs' hashes."""
+        stamp = {
+            "format": CACHE_FORMAT,
+            "step": step.name,
+            **fingerprint,
+            "outputs": self._digests(expand(step.outputs, self.root), {}),
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._stamp_path(step)
+        partial = path.with_name(path.name + ".partial")
+        partial.write_text(json.dumps(stamp, indent=1), encoding="utf-8")
+        os.replace(partial, path)
+
+
+def _hashes(digests: dict[str, list]) -> dict[str, str]:
+    # Touching a file changes its mtime but not what a step sees
+    return {key: entry[2] for key, entry in digests.items()}
+
+
+@dataclass
+class StepTiming:
+    step: Step
+    started: float
+    finished: float
+    ok: bool
+    # Skipped because its fingerprint matched
+    cached: bool = False
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass
+class PipelineResult:
+    steps: dict[str, Step]
+    started: float
+    finished: float = 0.0
+    timings: dict[str, StepTiming] = field(default_factory=dict)
+    # Steps never started because a dependency failed
+    skipped: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.skipped and all(timing.ok for timing in self.timings.values())
+
+    def critical_path(self) -> list[StepTiming]:
+        """The dependency chain ending at the last step to finish.
+
+        Walking back from it, each step's predecessor is the dependency that
+        finished last, i.e. the one it was actually waiting for.
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings.values(), key=lambda timing: timing.finished)
+        path = [current]
+        while True:
+            waited_for = [self.timings[name] for name in current.step.depends_on if name in self.timings]
+            if not waited_for:
+                return path[::-1]
+            current = max(waited_for, key=lambda timing: timing.finished)
+            path.append(current)
+
+    def report(self) -> None:
+        wall = self.finished - self.started
+        busy = sum(timing.seconds for timing in self.timings.values())
+        print(f"\n⏱️ {'step':<26}{'start':>8}{'seconds':>10}")
+        for timing in sorted(self.timings.values(), key=lambda timing: timing.started):
+            status = "  up to date" if timing.cached else "" if timing.ok else "  ❌"
+            print(f"   {timing.step.name:<26}{timing.started - self.started:>8.1f}{timing.seconds:>10.1f}{status}")
+        for name in self.skipped:
+            print(f"   {name:<26}{'-':>8}{'-':>10}  skipped")
+        path = self.critical_path()
+        print(f"⏱️ Critical path: {' → '.join(timing.step.name for timing in path)} "
+              f"({sum(timing.seconds for timing in path):.1f}s)")
+        print(f"⏱️ Wall clock {wall:.1f}s for {busy:.1f}s of step time")
+
+
+class PipelineScheduler:
+    """Run steps as soon as their dependencies succeed, ``workers`` at a time.
+
+    Given a ``cache``, steps that are up to date are not run, unless named in
+    ``force``; steps that succeed have their fingerprint recorded.
+    """
+
+    def __init__(
+        self,
+        steps: Iterable[Step],
+        workers: int = DEFAULT_WORKERS,
+        cache: StepCache | None = None,
+        force: Iterable[str] = (),
+    ) -> None:
+        self.steps = {step.name: step for step in steps}
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.force = set(force)
+        unknown = self.force - set(self.steps)
+        if unknown:
+            raise ValueError(f"Cannot force unknown step(s): {', '.join(sorted(unknown))}")
+        for step in self.steps.values():
+            unknown = [name for name in step.depends_on if name not in self.steps]
+            if unknown:
+                raise ValueError(f"{step.name} depends on unknown step(s): {', '.join(unknown)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list[str]:
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, chain: tuple[str, ...]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' → '.join(chain + (name,))}")
+            state[name] = "visiting"
+            for dependency in self.steps[name].depends_on:
+                visit(dependency, chain + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.steps:
+            visit(name, ())
+        return order
+
+    def run(self, run_step: Callable[[Step], bool]) -> PipelineResult:
+        """Call ``run_step`` for every step that is not up to date, in dependency order.
+
+        Once a step fails no new steps are started; those already running
+        are allowed to finish.
+        """
+        result = PipelineResult(self.steps, started=time.perf_counter())
+        pending = list(self.order)
+        running = {}
+        failed = False
+
+        def timed(step: Step) -> StepTiming:
+            started = time.perf_counter()
+            fingerprint = self.cache.fingerprint(step) if self.cache else None
+            if fingerprint and step.name not in self.force and self.cache.is_fresh(step, fingerprint):
+                return StepTiming(step, started, time.perf_counter(), True, cached=True)
+            ok = run_step(step)
+            if ok and fingerprint:
+                self.cache.record(step, fingerprint)
+            return StepTiming(step, started, time.perf_counter(), ok)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                if not failed:
+                    for name in list(pending):
+                        if len(running) >= self.workers:
+                            break
+                        if all(d in result.timings and result.timings[d].ok for d in self.steps[name].depends_on):
+                            pending.remove(name)
+                            running[executor.submit(timed, self.steps[name])] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    timing = future.result()
+                    result.timings[running.pop(future)] = timing
+                    failed = failed or not timing.ok
+
+        result.skipped = pending
+        result.finished = time.perf_counter()
+        return result
@@ -1,51 +1,282 @@
 """Load project schema and CSV data into PostgreSQL."""
 from __future__ import annotations
 
+import argparse
 import csv
 import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 
 import psycopg
 
-SCHEMA_FILE = Path("database/schema_postgres.sql")
+from migrations import MigrationError, MigrationRunner
+from ratings_snapshot import SNAPSHOT_DIR, write_snapshot
+from review_headers import header_from_columns
+
+# The SQL ships with the scripts; processed_data is wherever the loader runs
+DATABASE_DIR = Path(__file__).resolve().parent.parent / "database"
+BULK_LOAD_BEGIN_FILE = DATABASE_DIR / "bulk_load_begin.sql"
+BULK_LOAD_INDEXES_FILE = DATABASE_DIR / "bulk_load_indexes.sql"
+BULK_LOAD_CONSTRAINTS_FILE = DATABASE_DIR / "bulk_load_constraints.sql"
+REFRESH_VIEWS_FILE = DATABASE_DIR / "refresh_views.sql"
 PROCESSED_DATA_DIR = Path("processed_data")
 
+HOTEL_COLUMNS = ("hotel_id", "name", "city", "country", "source_folder")
+REVIEW_COLUMNS = (
+    "review_id",
+    "hotel_id",
+    "review_text",
+    "file_source",
+    "line_number",
+    "review_date",
+    "review_title",
+)
+RATING_COLUMNS = (
+    "review_id",
+    "hotel_id",
+    "service_score",
+    "price_score",
+    "room_score",
+    "location_score",
+    "overall_score",
+)
+
+HOTEL_KEY = ("hotel_id",)
+REVIEW_KEY = ("hotel_id", "review_id")
+RATING_KEY = ("hotel_id", "review_id")
+
+# Tables with a generated row_hash column (migration 0004); other tables are
+# compared column by column when deciding whether an upsert changes a row.
+HASHED_TABLES = frozenset({"reviews", "ratings"})
+
+# Hash-partitioned by hotel_id with the same modulus (migration 0008)
+PARTITIONED_TABLES = ("reviews", "ratings")
+PARTITION_INDEX_DDL = re.compile(r"^(CREATE (?:UNIQUE )?INDEX) (\w+) ON (\w+) (.*)$", re.S)
+PARTITION_CONSTRAINT_DDL = re.compile(r"^ALTER TABLE (\w+) ADD CONSTRAINT (\w+) ((?:PRIMARY KEY|UNIQUE) .*)$", re.S)
+
+LOAD_METHODS = ("copy", "rows")
+DEFAULT_LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+csv.field_size_limit(sys.maxsize)
+
+
+class ConnectionPool:
+    """Small thread-safe pool that opens up to ``size`` connections on demand."""
+
+    def __init__(self, connect, size: int) -> None:
+        self._connect = connect
+        self.size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._all: list[psycopg.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self) -> psycopg.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        return self._idle.get()
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._idle = queue.LifoQueue()
+
+
+@dataclass
+class LoadCounts:
+    """What an upsert did with the rows it read, summed across chunks."""
+
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    def __add__(self, other: "LoadCounts") -> "LoadCounts":
+        return LoadCounts(
+            self.rows + other.rows,
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged,
+            self.deleted + other.deleted,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.inserted} inserted, {self.updated} updated, "
+            f"{self.unchanged} unchanged, {self.deleted} deleted"
+        )
+
 
 class PostgresLoader:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        load_method: str = "copy",
+        workers: int | None = None,
+        prune: bool = False,
+        partitions: int | None = None,
+        snapshot_dir: Path | None = SNAPSHOT_DIR,
+    ) -> None:
+        if load_method not in LOAD_METHODS:
+            raise ValueError(f"Unknown load method {load_method!r}, expected one of {LOAD_METHODS}")
         self.host = os.getenv("POSTGRES_HOST", "postgres")
         self.port = int(os.getenv("POSTGRES_PORT", "5432"))
         self.database = os.getenv("POSTGRES_DB", "cit444")
         self.user = os.getenv("POSTGRES_USER", "cit444")
         self.password = os.getenv("POSTGRES_PASSWORD", "cit444")
+        self.load_method = load_method
+        self.workers = workers or int(os.getenv("POSTGRES_LOAD_WORKERS", DEFAULT_LOAD_WORKERS))
+        self.prune = prune
+        # None keeps whatever partition count the database already has;
+        # REVIEW_PARTITIONS is only read by the command line (see main)
+        self.partitions = partitions
+        # None skips the startup snapshot (ratings_snapshot.py) at the end of run()
+        self.snapshot_dir = snapshot_dir
+        self.bulk = False
+        self.timings: dict[str, float] = {}
         self.conn: psycopg.Connection | None = None
+        self.pool: ConnectionPool | None = None
 
     # ------------------------------------------------------------------
+    def _open_connection(self) -> psycopg.Connection:
+        conn = psycopg.connect(
+            host=self.host,
+            port=self.port,
+            dbname=self.database,
+            user=self.user,
+            password=self.password,
+        )
+        conn.execute("SET client_encoding TO 'UTF8'")
+        # End the implicit transaction so conn.transaction() blocks really commit
+        conn.commit()
+        return conn
+
     def connect(self) -> None:
         if self.conn is None:
-            self.conn = psycopg.connect(
-                host=self.host,
-                port=self.port,
-                dbname=self.database,
-                user=self.user,
-                password=self.password,
-            )
-            self.conn.execute("SET client_encoding TO 'UTF8'")
+            self.conn = self._open_connection()
+        if self.pool is None:
+            self.pool = ConnectionPool(self._open_connection, self.workers)
 
     # ------------------------------------------------------------------
     def run_schema(self) -> None:
-        if not SCHEMA_FILE.exists():
-            raise FileNotFoundError(f"Schema file not found: {SCHEMA_FILE}")
+        """Apply pending migrations; an up-to-date database is left untouched."""
+        applied = MigrationRunner(self.conn).migrate()
+        if applied:
+            print(f"✅ Schema migrated ({len(applied)} migration(s) applied)")
+        else:
+            print("✅ Schema is up to date")
+        if self.partitions:
+            changed = self.conn.execute(
+                "SELECT partition_reviews_and_ratings(%s)", (self.partitions,)
+            ).fetchone()[0]
+            self.conn.commit()
+            if changed:
+                print(f"✅ reviews and ratings repartitioned into {self.partitions} hash partitions")
+
+    def check_schema(self) -> None:
+        """Raise MigrationError unless every migration is applied; nothing is migrated or repartitioned."""
+        pending = MigrationRunner(self.conn).pending()
+        if pending:
+            raise MigrationError(
+                f"{len(pending)} migration(s) pending ({', '.join(m.name for m in pending)}); "
+                f"run postgres_loader.py or migrations.py first"
+            )
 
-        sql_text = SCHEMA_FILE.read_text(encoding="utf-8")
-        statements = _split_sql_statements(sql_text)
+    def table_partitions(self, table: str) -> list[str]:
+        """Partitions of ``table`` indexed by hash remainder; empty if it is not partitioned."""
+        rows = self.conn.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass "
+            "ORDER BY (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'remainder (\\d+)'))[1]::int",
+            (table,),
+        ).fetchall()
+        self.conn.commit()
+        return [name for (name,) in rows]
 
-        with self.conn.cursor() as cur:
-            for stmt in statements:
-                cur.execute(stmt)
+    def _hotel_partitions(self, table: str, modulus: int) -> dict[int, int]:
+        """Map each hotel_id to the remainder of the ``table`` partition its rows belong in."""
+        rows = self.conn.execute(
+            "SELECT h.hotel_id, r FROM hotels h CROSS JOIN generate_series(0, %s - 1) AS r "
+            "WHERE satisfies_hash_partition(%s::regclass, %s, r, h.hotel_id)",
+            (modulus, table, modulus),
+        ).fetchall()
+        self.conn.commit()
+        return dict(rows)
+
+    # ------------------------------------------------------------------
+    def begin_bulk_load(self) -> None:
+        """Drop review/rating keys, FKs and indexes so loads hit bare tables."""
+        self.conn.execute(_read_sql_file(BULK_LOAD_BEGIN_FILE))
         self.conn.commit()
-        print("✅ Schema applied successfully")
+        self.bulk = True
+        print("✅ Bulk-load mode: reviews/ratings indexes and constraints dropped")
+
+    def finish_bulk_load(self) -> None:
+        """Build keys and indexes partition by partition in parallel, attach them, then validate FKs."""
+        started = time.perf_counter()
+        index_statements = _sql_lines(BULK_LOAD_INDEXES_FILE)
+        partitions = {table: self.table_partitions(table) for table in PARTITIONED_TABLES}
+        partition_statements = [
+            part_stmt for stmt in index_statements for part_stmt in _partition_statements(stmt, partitions)
+        ]
+        if partition_statements:
+            # Every build touches a single partition, so they do not wait on
+            # each other; the parent statements below then only attach them
+            with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+                elapsed = sum(executor.map(self._run_timed, partition_statements))
+            print(
+                f"  ✓ {len(partition_statements)} partition keys/indexes built on {self.pool.size} "
+                f"connections ({time.perf_counter() - started:.2f}s, {elapsed:.2f}s of work)"
+            )
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = {executor.submit(self._run_timed, stmt): stmt for stmt in index_statements}
+            for future in as_completed(futures):
+                print(f"  ✓ {_describe(futures[future])} ({future.result():.2f}s)")
+
+        constraints_started = time.perf_counter()
+        self.conn.execute(_read_sql_file(BULK_LOAD_CONSTRAINTS_FILE))
+        self.conn.commit()
+        print(
+            f"  ✓ Keys attached and foreign keys validated "
+            f"({time.perf_counter() - constraints_started:.2f}s)"
+        )
+        self.bulk = False
+        self.timings["constraints"] = time.perf_counter() - started
+        print(f"✅ Indexes and constraints rebuilt ({self.timings['constraints']:.2f}s)")
+
+    def _run_timed(self, stmt: str) -> float:
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            with conn.transaction():
+                conn.execute(stmt)
+        return time.perf_counter() - started
 
     # ------------------------------------------------------------------
     def load_hotels(self) -> None:
@@ -54,33 +285,12 @@ class PostgresLoader:
             print(f"⚠️ Skipping hotels load, file missing: {hotels_csv}")
             return
 
-        insert_sql = (
-            "INSERT INTO hotels (hotel_id, name, city, country, source_folder) "
-            "VALUES (%s, %s, %s, %s, %s) "
-            "ON CONFLICT (hotel_id) DO UPDATE SET "
-            "name = EXCLUDED.name, "
-            "city = EXCLUDED.city, "
-            "country = EXCLUDED.country, "
-            "source_folder = EXCLUDED.source_folder"
-        )
-
-        with hotels_csv.open("r", encoding="utf-8") as fh, self.conn.cursor() as cur:
-            reader = csv.DictReader(fh)
-            count = 0
-            for row in reader:
-                cur.execute(
-                    insert_sql,
-                    (
-                        _to_int(row.get("HOTELID")),
-                        row.get("NAME"),
-                        row.get("CITY"),
-                        row.get("COUNTRY"),
-                        row.get("SOURCE_FOLDER"),
-                    ),
-                )
-                count += 1
-            self.conn.commit()
-        print(f"✅ Loaded {count} hotels")
+        started = time.perf_counter()
+        with self.conn.cursor() as cur:
+            counts = self._upsert(cur, "hotels", HOTEL_COLUMNS, HOTEL_KEY, _hotel_rows(hotels_csv))
+        self.conn.commit()
+        self.timings["hotels"] = time.perf_counter() - started
+        print(f"✅ Loaded {counts.rows} hotels ({self.timings['hotels']:.2f}s): {counts}")
 
     # ------------------------------------------------------------------
     def load_reviews(self) -> None:
@@ -89,37 +299,41 @@ class PostgresLoader:
             print("⚠️ No review chunk files found")
             return
 
-        insert_sql = (
-            "INSERT INTO reviews (review_id, hotel_id, review_text, file_source, line_number) "
-            "VALUES (%s, %s, %s, %s, %s) "
-            "ON CONFLICT (review_id) DO UPDATE SET "
-            "hotel_id = EXCLUDED.hotel_id, "
-            "review_text = EXCLUDED.review_text, "
-            "file_source = EXCLUDED.file_source, "
-            "line_number = EXCLUDED.line_number"
+        # Chunks are independent, so they load concurrently on pooled
+        # connections with one transaction per chunk. Hotels must already be
+        # loaded and ratings wait for this method to return.
+        started = time.perf_counter()
+        total = LoadCounts()
+        # A bulk load starts from empty tables, so there is nothing to prune
+        seen = set() if self.prune and not self.bulk else None
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            futures = {
+                executor.submit(self._load_review_chunk, path, seen): path for path in chunk_files
+            }
+            for future in as_completed(futures):
+                counts, elapsed = future.result()
+                total += counts
+                print(
+                    f"  ✓ {futures[future].name}: {counts.rows} reviews in {elapsed:.2f}s "
+                    f"({counts.rows / elapsed:,.0f} rows/s; {counts})"
+                )
+        if seen is not None:
+            total.deleted = self._prune_missing("reviews", REVIEW_KEY, seen)
+        self.timings["reviews"] = time.perf_counter() - started
+        print(
+            f"✅ Loaded {total.rows} reviews from {len(chunk_files)} chunks on "
+            f"{self.pool.size} connections ({self.timings['reviews']:.2f}s, "
+            f"{total.rows / self.timings['reviews']:,.0f} rows/s): {total}"
         )
 
-        total = 0
-        for chunk_path in chunk_files:
-            with chunk_path.open("r", encoding="utf-8") as fh, self.conn.cursor() as cur:
-                reader = csv.DictReader(fh)
-                line_no = 1
-                for row in reader:
-                    cur.execute(
-                        insert_sql,
-                        (
-                            _to_int(row.get("IDREVIEW")),
-                            _to_int(row.get("HOTELID")),
-                            row.get("REVIEW"),
-                            chunk_path.name,
-                            line_no,
-                        ),
-                    )
-                    total += 1
-                    line_no += 1
-            self.conn.commit()
-            print(f"  ✓ {chunk_path.name}: {line_no - 1} reviews")
-        print(f"✅ Loaded {total} reviews from {len(chunk_files)} chunks")
+    def _load_review_chunk(self, chunk_path: Path, seen: set | None) -> tuple[LoadCounts, float]:
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            with conn.transaction(), conn.cursor() as cur:
+                counts = self._upsert(
+                    cur, "reviews", REVIEW_COLUMNS, REVIEW_KEY, _review_rows(chunk_path), seen
+                )
+        return counts, time.perf_counter() - started
 
     # ------------------------------------------------------------------
     def load_ratings(self) -> None:
@@ -131,107 +345,399 @@ class PostgresLoader:
             print("⚠️ No ratings CSV found (expected final_ratings*.csv)")
             return
 
-        insert_sql = (
-            "INSERT INTO ratings (review_id, hotel_id, service_score, price_score, "
-            "room_score, location_score, overall_score) "
-            "VALUES (%s, %s, %s, %s, %s, %s, %s) "
-            "ON CONFLICT (review_id) DO UPDATE SET "
-            "hotel_id = EXCLUDED.hotel_id, "
-            "service_score = EXCLUDED.service_score, "
-            "price_score = EXCLUDED.price_score, "
-            "room_score = EXCLUDED.room_score, "
-            "location_score = EXCLUDED.location_score, "
-            "overall_score = EXCLUDED.overall_score"
-        )
-
-        with ratings_csv.open("r", encoding="utf-8") as fh, self.conn.cursor() as cur:
-            reader = csv.DictReader(fh)
-            count = 0
-            for row in reader:
-                cur.execute(
-                    insert_sql,
-                    (
-                        _to_int(row.get("REVIEWID")),
-                        _to_int(row.get("HOTELID")),
-                        _to_int(row.get("SERVICE")) or _to_int(row.get("SERVICE_SCORE")),
-                        _to_int(row.get("PRICE")) or _to_int(row.get("PRICE_SCORE")),
-                        _to_int(row.get("ROOM")) or _to_int(row.get("ROOM_SCORE")),
-                        _to_int(row.get("LOCATION")) or _to_int(row.get("LOCATION_SCORE")),
-                        _to_int(row.get("OVERALL")) or _to_int(row.get("OVERALL_SCORE")),
-                    ),
+        started = time.perf_counter()
+        seen = set() if self.prune and not self.bulk else None
+        if self.bulk:
+            counts = self._copy_partitions("ratings", RATING_COLUMNS, _rating_rows(ratings_csv))
+        else:
+            with self.conn.cursor() as cur:
+                counts = self._upsert(
+                    cur, "ratings", RATING_COLUMNS, RATING_KEY, _rating_rows(ratings_csv), seen
                 )
-                count += 1
             self.conn.commit()
-        print(f"✅ Loaded {count} ratings from {ratings_csv.name}")
+        if seen is not None:
+            counts.deleted = self._prune_missing("ratings", RATING_KEY, seen)
+        self.timings["ratings"] = time.perf_counter() - started
+        print(
+            f"✅ Loaded {counts.rows} ratings from {ratings_csv.name} "
+            f"({self.timings['ratings']:.2f}s): {counts}"
+        )
+
+    def upsert_ratings(self, rows: Iterable[Sequence]) -> LoadCounts:
+        """Upsert scored rows (in ``RATING_COLUMNS`` order) in one transaction.
+
+        Used by the scoring pipeline to stream ratings in as they are produced;
+        the matching hotels and reviews must already be loaded.
+        """
+        with self.conn.transaction(), self.conn.cursor() as cur:
+            return self._upsert(cur, "ratings", RATING_COLUMNS, RATING_KEY, rows)
 
     # ------------------------------------------------------------------
-    def refresh_rating_averages(self) -> None:
-        with self.conn.cursor() as cur:
-            cur.execute("TRUNCATE ratings_average")
+    def _upsert(
+        self,
+        cur: psycopg.Cursor,
+        table: str,
+        columns: Sequence[str],
+        key: Sequence[str],
+        rows: Iterable[Sequence],
+        seen: set | None = None,
+    ) -> LoadCounts:
+        if self.bulk:
+            # Bulk loads start from empty tables, so there is nothing to prune
+            return _copy_into(cur, table, columns, rows)
+        if seen is not None:
+            rows = _record_keys(rows, [columns.index(col) for col in key], seen)
+        if self.load_method == "rows":
+            return _upsert_row_by_row(cur, table, columns, key, rows)
+        return _copy_upsert(cur, table, columns, key, rows)
+
+    def _copy_partitions(self, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> LoadCounts:
+        """Bulk-load ``rows`` straight into the partitions of ``table``, one connection per partition.
+
+        Rows are routed client-side, so each COPY fills a single partition
+        and none of them pays for tuple routing or waits on another.
+        """
+        partitions = self.table_partitions(table)
+        if len(partitions) < 2:
+            with self.conn.transaction(), self.conn.cursor() as cur:
+                return _copy_into(cur, table, columns, rows)
+
+        partition_of = self._hotel_partitions(table, len(partitions))
+        hotel_col = columns.index("hotel_id")
+        buckets: dict[str, list[Sequence]] = {}
+        for row in rows:
+            remainder = partition_of.get(row[hotel_col])
+            # Rows of unknown hotels go through the parent and are then
+            # rejected by the foreign keys, exactly as before
+            target = table if remainder is None else partitions[remainder]
+            buckets.setdefault(target, []).append(row)
+
+        total = LoadCounts()
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            for counts in executor.map(lambda item: self._copy_bucket(item[0], columns, item[1]), buckets.items()):
+                total += counts
+        return total
+
+    def _copy_bucket(self, target: str, columns: Sequence[str], rows: list[Sequence]) -> LoadCounts:
+        with self.pool.connection() as conn:
+            with conn.transaction(), conn.cursor() as cur:
+                return _copy_into(cur, target, columns, rows)
+
+    def _prune_missing(self, table: str, key: Sequence[str], seen: set) -> int:
+        """Delete rows of ``table`` whose key was not in this load's source files."""
+        key_list = ", ".join(key)
+        with self.conn.transaction(), self.conn.cursor() as cur:
             cur.execute(
-                """
-                INSERT INTO ratings_average (
-                    hotel_id,
-                    avg_service,
-                    avg_price,
-                    avg_room,
-                    avg_location,
-                    avg_overall,
-                    total_reviews,
-                    last_updated
-                )
-                SELECT
-                    hotel_id,
-                    ROUND(AVG(service_score)::numeric, 2),
-                    ROUND(AVG(price_score)::numeric, 2),
-                    ROUND(AVG(room_score)::numeric, 2),
-                    ROUND(AVG(location_score)::numeric, 2),
-                    ROUND(AVG(overall_score)::numeric, 2),
-                    COUNT(*),
-                    NOW()
-                FROM ratings
-                GROUP BY hotel_id
-                """
+                f"CREATE TEMP TABLE seen_{table} ON COMMIT DROP AS "
+                f"SELECT {key_list} FROM {table} WITH NO DATA"
+            )
+            with cur.copy(f"COPY seen_{table} ({key_list}) FROM STDIN") as copy:
+                for row in seen:
+                    copy.write_row(row)
+            match = " AND ".join(f"s.{col} = t.{col}" for col in key)
+            cur.execute(
+                f"DELETE FROM {table} t WHERE NOT EXISTS (SELECT 1 FROM seen_{table} s WHERE {match})"
             )
+            return cur.rowcount
+
+    # ------------------------------------------------------------------
+    def refresh_rating_averages(self, verify: bool = False) -> None:
+        """Report ratings_average, which triggers on ratings keep current.
+
+        With ``verify`` the averages are recomputed from scratch and any
+        hotel whose incremental figures drifted is corrected and counted.
+        """
+        if verify:
+            started = time.perf_counter()
+            corrected = self.conn.execute("SELECT rebuild_ratings_average()").fetchone()[0]
+            self.conn.commit()
+            self.timings["verify averages"] = time.perf_counter() - started
+            status = "no drift" if corrected == 0 else f"{corrected} hotel(s) corrected"
+            print(
+                f"✅ ratings_average verified against a full rebuild: {status} "
+                f"({self.timings['verify averages']:.2f}s)"
+            )
+            return
+        hotels, last_updated = self.conn.execute(
+            "SELECT COUNT(*), MAX(last_updated) FROM ratings_average"
+        ).fetchone()
+        self.conn.commit()
+        print(f"✅ ratings_average maintained incrementally ({hotels} hotels, last change {last_updated})")
+
+    def refresh_views(self) -> None:
+        """Refresh the materialized views concurrently, so readers are never blocked, and rating_rollups."""
+        started = time.perf_counter()
+        self.conn.execute(_read_sql_file(REFRESH_VIEWS_FILE))
         self.conn.commit()
-        print("✅ ratings_average table refreshed")
+        self.timings["refresh views"] = time.perf_counter() - started
+        print(f"✅ hotel_ratings_view, hotel_leaderboard and rating_rollups refreshed ({self.timings['refresh views']:.2f}s)")
+
+    def write_snapshot(self) -> None:
+        """Write the GUI startup snapshot for the load_version refresh_views() just set."""
+        started = time.perf_counter()
+        snapshot = write_snapshot(self.conn, self.snapshot_dir)
+        self.timings["snapshot"] = time.perf_counter() - started
+        print(
+            f"✅ Snapshot of load_version {snapshot.load_version} written to {self.snapshot_dir} "
+            f"({self.timings['snapshot']:.2f}s)"
+        )
+
+    def _bulk_load_interrupted(self) -> bool:
+        # bulk_load_begin.sql disables the ratings triggers until
+        # bulk_load_constraints.sql re-enables them
+        disabled = self.conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_trigger "
+            "WHERE tgrelid = 'ratings'::regclass AND NOT tgisinternal AND tgenabled = 'D')"
+        ).fetchone()[0]
+        self.conn.commit()
+        return disabled
 
     # ------------------------------------------------------------------
     def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
         if self.conn is not None:
             self.conn.close()
             self.conn = None
 
     # ------------------------------------------------------------------
-    def run(self) -> None:
+    def run(self, bulk: bool = False, verify_averages: bool = False) -> None:
+        """Apply the schema and load everything.
+
+        With ``bulk`` the reviews and ratings tables are emptied and loaded
+        without indexes or constraints, which are rebuilt afterwards.
+        """
+        started = time.perf_counter()
         self.connect()
         self.run_schema()
+        if not bulk and self._bulk_load_interrupted():
+            raise RuntimeError(
+                "A previous bulk load did not finish (ratings triggers are disabled); "
+                "rerun with --bulk to complete it"
+            )
         self.load_hotels()
+        if bulk:
+            self.begin_bulk_load()
         self.load_reviews()
         self.load_ratings()
-        self.refresh_rating_averages()
-        print("🎉 Postgres load complete")
-
-
-def _split_sql_statements(sql_text: str) -> Iterable[str]:
-    statements: list[str] = []
-    buffer: list[str] = []
-    in_string = False
-
-    for char in sql_text:
-        if char == "'":
-            in_string = not in_string
-        if char == ";" and not in_string:
-            stmt = "".join(buffer).strip()
-            if stmt:
-                statements.append(stmt)
-            buffer = []
+        if bulk:
+            self.finish_bulk_load()
+        self.refresh_rating_averages(verify=verify_averages)
+        self.refresh_views()
+        if self.snapshot_dir is not None:
+            self.write_snapshot()
+        self.timings["total"] = time.perf_counter() - started
+        print(f"🎉 Postgres load complete ({self.timings['total']:.2f}s)")
+
+
+def _copy_upsert(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    key: Sequence[str],
+    rows: Iterable[Sequence],
+) -> LoadCounts:
+    """Stream ``rows`` into a temp staging table with COPY, then upsert them in one statement.
+
+    When the source repeats a key the last occurrence wins, exactly as it did
+    when each row was upserted on its own. Rows whose content is unchanged
+    are left alone, so a re-load only writes what is new or different.
+    """
+    stage = f"stage_{table}"
+    column_list = ", ".join(columns)
+    key_list = ", ".join(key)
+
+    cur.execute(f"DROP TABLE IF EXISTS {stage}")
+    cur.execute(
+        f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table} WITH NO DATA"
+    )
+    cur.execute(f"ALTER TABLE {stage} ADD COLUMN stage_seq BIGSERIAL")
+    count = 0
+    with cur.copy(f"COPY {stage} ({column_list}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+
+    # Rows already stored (as of the statement's snapshot) tell updates from
+    # inserts; xmax would too, but partitioned tables cannot return it
+    cur.execute(
+        f"WITH source AS ("
+        f"SELECT DISTINCT ON ({key_list}) {column_list} FROM {stage} "
+        f"ORDER BY {key_list}, stage_seq DESC), "
+        f"existing AS ("
+        f"SELECT {key_list}, TRUE AS found FROM {table} JOIN source USING ({key_list})), "
+        f"upserted AS ("
+        f"INSERT INTO {table} AS t ({column_list}) SELECT {column_list} FROM source "
+        f"ON CONFLICT ({key_list}) DO UPDATE SET {_update_set(columns, key)} "
+        f"WHERE {_changed(table, columns, key)} "
+        f"RETURNING {', '.join(f't.{col}' for col in key)}) "
+        f"SELECT (SELECT COUNT(*) FROM source), "
+        f"COUNT(*) FILTER (WHERE e.found IS NULL), COUNT(*) FILTER (WHERE e.found) "
+        f"FROM upserted LEFT JOIN existing e USING ({key_list})"
+    )
+    distinct, inserted, updated = cur.fetchone()
+    return LoadCounts(count, inserted, updated, distinct - inserted - updated)
+
+
+def _copy_into(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence],
+) -> LoadCounts:
+    """COPY ``rows`` straight into ``table``; only used on bare bulk-load tables."""
+    count = 0
+    with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return LoadCounts(count, inserted=count)
+
+
+def _upsert_row_by_row(
+    cur: psycopg.Cursor,
+    table: str,
+    columns: Sequence[str],
+    key: Sequence[str],
+    rows: Iterable[Sequence],
+) -> LoadCounts:
+    """Original one-statement-per-row upsert, kept for timing comparisons."""
+    # Same insert/update test as _copy_upsert, with the row's key passed twice
+    insert_sql = (
+        f"WITH existing AS ("
+        f"SELECT 1 FROM {table} WHERE ({', '.join(key)}) = ({', '.join(['%s'] * len(key))})), "
+        f"upserted AS ("
+        f"INSERT INTO {table} AS t ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {_update_set(columns, key)} "
+        f"WHERE {_changed(table, columns, key)} "
+        f"RETURNING 1) "
+        f"SELECT (SELECT COUNT(*) FROM upserted), (SELECT COUNT(*) FROM existing)"
+    )
+    key_positions = [columns.index(col) for col in key]
+    counts = LoadCounts()
+    for row in rows:
+        cur.execute(insert_sql, [*(row[i] for i in key_positions), *row])
+        written, existed = cur.fetchone()
+        counts.rows += 1
+        if not written:
+            counts.unchanged += 1
+        elif existed:
+            counts.updated += 1
         else:
-            buffer.append(char)
-    trailing = "".join(buffer).strip()
-    if trailing:
-        statements.append(trailing)
-    return statements
+            counts.inserted += 1
+    return counts
+
+
+def _update_set(columns: Sequence[str], key: Sequence[str]) -> str:
+    return ", ".join(f"{col} = EXCLUDED.{col}" for col in columns if col not in key)
+
+
+def _changed(table: str, columns: Sequence[str], key: Sequence[str]) -> str:
+    """Upsert condition that holds only when the incoming row differs from the stored one."""
+    if table in HASHED_TABLES:
+        return "t.row_hash IS DISTINCT FROM EXCLUDED.row_hash"
+    values = [col for col in columns if col not in key]
+    return (
+        f"({', '.join(f't.{col}' for col in values)}) IS DISTINCT FROM "
+        f"({', '.join(f'EXCLUDED.{col}' for col in values)})"
+    )
+
+
+def _record_keys(rows: Iterable[Sequence], positions: Sequence[int], seen: set) -> Iterator[Sequence]:
+    for row in rows:
+        seen.add(tuple(row[i] for i in positions))
+        yield row
+
+
+def _hotel_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            yield (
+                _to_int(row.get("HOTELID")),
+                row.get("NAME"),
+                row.get("CITY"),
+                row.get("COUNTRY"),
+                row.get("SOURCE_FOLDER"),
+            )
+
+
+def _review_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8") as fh:
+        for line_no, row in enumerate(csv.DictReader(fh), 1):
+            text = _clean_text(row.get("REVIEW"))
+            review_date, title = header_from_columns(row, text)
+            yield (
+                _to_int(row.get("IDREVIEW")),
+                _to_int(row.get("HOTELID")),
+                text,
+                path.name,
+                line_no,
+                review_date,
+                _clean_text(title),
+            )
+
+
+def _rating_rows(path: Path) -> Iterator[tuple]:
+    with path.open("r", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            yield (
+                _to_int(row.get("REVIEWID")),
+                _to_int(row.get("HOTELID")),
+                _score(row, "SERVICE"),
+                _score(row, "PRICE"),
+                _score(row, "ROOM"),
+                _score(row, "LOCATION"),
+                _score(row, "OVERALL"),
+            )
+
+
+def _clean_text(value: str | None) -> str | None:
+    # Postgres text cannot hold NUL; emit_reviews_csv.py drops them the same way
+    if value is None:
+        return None
+    return value.replace("\x00", "")
+
+
+def _score(row: dict, name: str) -> int | None:
+    return _to_int(row.get(name)) or _to_int(row.get(f"{name}_SCORE"))
+
+
+def _read_sql_file(path: Path) -> str:
+    if not path.exists():
+        raise FileNotFoundError(f"SQL file not found: {path}")
+    return path.read_text(encoding="utf-8")
+
+
+def _sql_lines(path: Path) -> list[str]:
+    """Statements of a one-statement-per-line file, skipping comments and blanks."""
+    return [
+        line.strip()
+        for line in _read_sql_file(path).splitlines()
+        if line.strip() and not line.lstrip().startswith("--")
+    ]
+
+
+def _partition_statements(stmt: str, partitions: dict[str, list[str]]) -> list[str]:
+    """Rewrite a CREATE INDEX or ADD CONSTRAINT on a partitioned parent for each of its partitions.
+
+    Returns an empty list for other statements and unpartitioned tables.
+    """
+    match = PARTITION_INDEX_DDL.match(stmt)
+    if match:
+        create, name, table, rest = match.groups()
+        return [f"{create} {part}_{name} ON {part} {rest}" for part in partitions.get(table, [])]
+    match = PARTITION_CONSTRAINT_DDL.match(stmt)
+    if match:
+        table, name, rest = match.groups()
+        return [f"ALTER TABLE {part} ADD CONSTRAINT {part}_{name} {rest}" for part in partitions.get(table, [])]
+    return []
+
+
+def _describe(stmt: str) -> str:
+    return " ".join(stmt.split())[:90]
 
 
 def _to_int(value: str | None) -> int | None:
@@ -253,9 +759,101 @@ def _pick_first_existing(*candidates: Path) -> Path | None:
     return None
 
 
-if __name__ == "__main__":
-    loader = PostgresLoader()
+BENCHMARK_MODES = (("rows", False), ("copy", False), ("copy", True))
+
+
+def benchmark(workers: int | None = None) -> None:
+    """Run a full load per mode and compare per-phase wall time."""
+    results: dict[str, dict[str, float]] = {}
+    for method, bulk in BENCHMARK_MODES:
+        label = f"{method}+bulk" if bulk else method
+        print(f"\n=== Load mode: {label} ===")
+        loader = PostgresLoader(load_method=method, workers=workers)
+        try:
+            loader.run(bulk=bulk)
+        finally:
+            loader.close()
+        results[label] = loader.timings
+
+    print("\n=== Load timing (seconds) ===")
+    print(f"{'phase':<12}" + "".join(f"{label:>12}" for label in results))
+    for phase in ("hotels", "reviews", "ratings", "constraints", "total"):
+        cells = "".join(
+            f"{results[label][phase]:>12.2f}" if phase in results[label] else f"{'-':>12}"
+            for label in results
+        )
+        print(f"{phase:<12}{cells}")
+    baseline = results["copy"]["total"]
+    saved = baseline - results["copy+bulk"]["total"]
+    print(f"\nDeferring indexes/constraints saved {saved:.2f}s ({saved / baseline:.0%}) over copy")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--method",
+        choices=LOAD_METHODS,
+        default="copy",
+        help="copy: COPY into staging + one set-based upsert (default); rows: one INSERT per row",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="empty reviews/ratings, load into bare tables, then rebuild indexes and constraints",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="load with each method/mode and print a timing comparison",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"connections used to load review chunks concurrently "
+        f"(default: $POSTGRES_LOAD_WORKERS or {DEFAULT_LOAD_WORKERS})",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete reviews and ratings that are no longer in the source files",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=None,
+        help="hash partitions for reviews and ratings; repartitions when the count differs "
+        "(default: $REVIEW_PARTITIONS, else keep the current count)",
+    )
+    parser.add_argument(
+        "--verify-averages",
+        action="store_true",
+        help="recompute ratings_average from scratch and report hotels whose incremental figures drifted",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help=f"do not write the startup snapshot (ratings_snapshot.*) to {SNAPSHOT_DIR}",
+    )
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.workers)
+        return
+
+    env_partitions = os.getenv("REVIEW_PARTITIONS")
+    loader = PostgresLoader(
+        load_method=args.method,
+        workers=args.workers,
+        prune=args.prune,
+        partitions=args.partitions or (int(env_partitions) if env_partitions else None),
+        snapshot_dir=None if args.no_snapshot else SNAPSHOT_DIR,
+    )
     try:
-        loader.run()
+        loader.run(bulk=args.bulk, verify_averages=args.verify_averages)
     finally:
         loader.close()
+
+
+if __name__ == "__main__":
+    main()
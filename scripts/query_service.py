@@ -0,0 +1,691 @@
+"""Cached read-side queries over the loaded hotel ratings.
+
+``QueryService`` answers the questions the GUI and scripts keep asking
+(best hotels in a city for an aspect, one hotel's figures, a hotel's
+reviews a page at a time, city and country rollups, Bayesian-ranked
+leaderboards, a hotel's ratings by month or year) from a small
+connection pool, with every statement prepared server-side on each pooled
+connection. Results are kept in an LRU cache whose entries also expire
+after a TTL, and the whole cache is dropped as soon as
+``load_version.version`` moves, which refresh_views.sql bumps at the end of
+every load.
+
+    python scripts/query_service.py top --city London --aspect service
+    python scripts/query_service.py hotel 42
+    python scripts/query_service.py reviews 42 --after 120
+    python scripts/query_service.py regions --level city --aspect service
+    python scripts/query_service.py leaderboard --city London --aspect room
+    python scripts/query_service.py trend 42 --period year
+    python scripts/query_service.py serve --port 8444
+    python scripts/query_service.py benchmark
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, is_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from postgres_loader import PostgresLoader
+
+ASPECTS = ("overall", "service", "price", "room", "location")
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHE_ENTRIES = 1024
+DEFAULT_CACHE_TTL = 300.0
+# How often load_version is re-read; between checks cached results are served as-is
+VERSION_CHECK_SECONDS = 1.0
+DEFAULT_TOP_LIMIT = 10
+DEFAULT_REVIEW_PAGE = 20
+MAX_LIMIT = 500
+DEFAULT_PORT = 8444
+
+HOTEL_COLUMNS = """
+    hotel_id, hotel_name, city, country, avg_overall, avg_service, avg_price,
+    avg_room, avg_location, total_reviews, rating_category
+"""
+
+# One statement per aspect, so the ORDER BY column is never a parameter
+TOP_HOTELS_SQL = {
+    aspect: f"""
+        SELECT {HOTEL_COLUMNS}
+        FROM hotel_ratings_view
+        WHERE (%(city)s::text IS NULL OR lower(city) = lower(%(city)s::text))
+          AND total_reviews >= %(min_reviews)s
+        ORDER BY avg_{aspect} DESC NULLS LAST, total_reviews DESC, hotel_id
+        LIMIT %(limit)s
+    """
+    for aspect in ASPECTS
+}
+
+HOTEL_SQL = f"""
+    SELECT {HOTEL_COLUMNS}, last_updated
+    FROM hotel_ratings_view
+    WHERE hotel_id = %(hotel_id)s
+"""
+
+# Keyset pagination: the page starts after the last review_id already seen
+# (review ids start at 1 within each hotel), so deep pages cost the same as
+# the first and never skip or repeat rows when reviews are added.
+REVIEWS_SQL = """
+    SELECT r.review_id, r.review_text, r.review_date, r.review_title, ra.service_score, ra.price_score,
+           ra.room_score, ra.location_score, ra.overall_score
+    FROM reviews r
+    LEFT JOIN ratings ra ON ra.hotel_id = r.hotel_id AND ra.review_id = r.review_id
+    WHERE r.hotel_id = %(hotel_id)s AND r.review_id > %(after)s
+    ORDER BY r.review_id
+    LIMIT %(limit)s
+"""
+
+REGION_LEVELS = ("city", "country", "global")
+REGION_COLUMNS = """
+    level, country, city, hotels, total_reviews, avg_overall, avg_service, avg_price,
+    avg_room, avg_location, hist_overall, hist_service, hist_price, hist_room, hist_location
+"""
+
+# Reads the precomputed rating_rollups (migration 0007) rather than aggregating ratings
+REGIONS_SQL = {
+    aspect: f"""
+        SELECT {REGION_COLUMNS}
+        FROM rating_rollups
+        WHERE level = %(level)s
+          AND (%(country)s::text IS NULL OR lower(country) = lower(%(country)s::text))
+          AND total_reviews >= %(min_reviews)s
+        ORDER BY avg_{aspect} DESC NULLS LAST, total_reviews DESC, country, city
+        LIMIT %(limit)s
+    """
+    for aspect in ASPECTS
+}
+
+LEADERBOARD_COLUMNS = """
+    aspect, hotel_id, hotel_name, city, country, reviews, raw_avg, score,
+    city_rank, country_rank, global_rank
+"""
+
+# hotel_leaderboard (migration 0009) has one index per level whose leading
+# columns match these statements, so a page is a single index range scan
+LEADERBOARD_SQL = {
+    "city": f"""
+        SELECT {LEADERBOARD_COLUMNS} FROM hotel_leaderboard
+        WHERE aspect = %(aspect)s AND lower(city) = lower(%(region)s)
+        ORDER BY city_rank, hotel_id
+        LIMIT %(limit)s
+    """,
+    "country": f"""
+        SELECT {LEADERBOARD_COLUMNS} FROM hotel_leaderboard
+        WHERE aspect = %(aspect)s AND lower(country) = lower(%(region)s)
+        ORDER BY country_rank, hotel_id
+        LIMIT %(limit)s
+    """,
+    "global": f"""
+        SELECT {LEADERBOARD_COLUMNS} FROM hotel_leaderboard
+        WHERE aspect = %(aspect)s
+        ORDER BY global_rank, hotel_id
+        LIMIT %(limit)s
+    """,
+}
+
+TREND_PERIODS = ("month", "year")
+
+# Folds hotel_monthly_ratings (migration 0010) into the requested period;
+# averages are weighted by each month's number of scores
+TREND_SQL = {
+    period: f"""
+        SELECT date_trunc('{period}', month)::date AS period,
+               SUM(total_reviews),
+               {", ".join(
+                   f"ROUND(SUM(sum_{aspect})::numeric / NULLIF(SUM(cnt_{aspect}), 0), 2)" for aspect in ASPECTS
+               )}
+        FROM hotel_monthly_ratings
+        WHERE hotel_id = %(hotel_id)s
+        GROUP BY 1
+        ORDER BY 1
+    """
+    for period in TREND_PERIODS
+}
+
+LOAD_VERSION_SQL = "SELECT version FROM load_version"
+
+
+@dataclass(frozen=True)
+class HotelRating:
+    hotel_id: int
+    name: str
+    city: str | None
+    country: str | None
+    avg_overall: Decimal | None
+    avg_service: Decimal | None
+    avg_price: Decimal | None
+    avg_room: Decimal | None
+    avg_location: Decimal | None
+    total_reviews: int | None
+    rating_category: str
+
+
+@dataclass(frozen=True)
+class HotelDetail(HotelRating):
+    last_updated: datetime | None
+
+
+@dataclass(frozen=True)
+class Review:
+    review_id: int
+    text: str | None
+    review_date: date | None
+    title: str | None
+    service_score: int | None
+    price_score: int | None
+    room_score: int | None
+    location_score: int | None
+    overall_score: int | None
+
+
+@dataclass(frozen=True)
+class RegionRating:
+    """Review-weighted averages for a city, a country or everything.
+
+    ``hist_<aspect>[i]`` is the number of reviews that scored ``i + 1``.
+    """
+
+    level: str
+    country: str
+    city: str
+    hotels: int
+    total_reviews: int
+    avg_overall: Decimal | None
+    avg_service: Decimal | None
+    avg_price: Decimal | None
+    avg_room: Decimal | None
+    avg_location: Decimal | None
+    hist_overall: list[int]
+    hist_service: list[int]
+    hist_price: list[int]
+    hist_room: list[int]
+    hist_location: list[int]
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    """A hotel's shrinkage-adjusted ``score`` for one aspect and its dense ranks."""
+
+    aspect: str
+    hotel_id: int
+    name: str
+    city: str | None
+    country: str | None
+    reviews: int
+    raw_avg: Decimal
+    score: Decimal
+    city_rank: int
+    country_rank: int
+    global_rank: int
+
+
+@dataclass(frozen=True)
+class TrendPoint:
+    """A hotel's averages over the reviews written in one month or year."""
+
+    period: date
+    reviews: int
+    avg_overall: Decimal | None
+    avg_service: Decimal | None
+    avg_price: Decimal | None
+    avg_room: Decimal | None
+    avg_location: Decimal | None
+
+
+@dataclass(frozen=True)
+class ReviewPage:
+    hotel_id: int
+    reviews: list[Review]
+    next_after: int | None
+
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries also expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, ttl: float = DEFAULT_CACHE_TTL) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryService:
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+    ) -> None:
+        # PostgresLoader owns the connection settings and the pool
+        self.loader = PostgresLoader(workers=pool_size)
+        self.cache = ResultCache(cache_entries, cache_ttl)
+        self.load_version: int | None = None
+        self.invalidations = 0
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+
+    def open(self) -> "QueryService":
+        self.loader.connect()
+        return self
+
+    def close(self) -> None:
+        self.loader.close()
+
+    def __enter__(self) -> "QueryService":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    def top_hotels(
+        self,
+        city: str | None = None,
+        aspect: str = "overall",
+        limit: int = DEFAULT_TOP_LIMIT,
+        min_reviews: int = 1,
+    ) -> list[HotelRating]:
+        """Best-rated hotels for ``aspect``, optionally within one city (case-insensitive)."""
+        if aspect not in ASPECTS:
+            raise ValueError(f"Unknown aspect {aspect!r}, expected one of {ASPECTS}")
+        params = {"city": city, "min_reviews": min_reviews, "limit": _limit(limit)}
+        return self._cached(
+            ("top", city and city.lower(), aspect, params["limit"], min_reviews),
+            lambda: [HotelRating(*row) for row in self._fetch(TOP_HOTELS_SQL[aspect], params)],
+        )
+
+    def hotel(self, hotel_id: int) -> HotelDetail | None:
+        def load() -> HotelDetail | None:
+            rows = self._fetch(HOTEL_SQL, {"hotel_id": hotel_id})
+            return HotelDetail(*rows[0]) if rows else None
+
+        return self._cached(("hotel", hotel_id), load)
+
+    def reviews(self, hotel_id: int, after: int = 0, limit: int = DEFAULT_REVIEW_PAGE) -> ReviewPage:
+        """One page of a hotel's reviews after review id ``after``; pass ``next_after`` on for the next."""
+        limit = _limit(limit)
+
+        def load() -> ReviewPage:
+            # Fetch one extra row to know whether another page follows
+            rows = self._fetch(REVIEWS_SQL, {"hotel_id": hotel_id, "after": after, "limit": limit + 1})
+            reviews = [Review(*row) for row in rows[:limit]]
+            next_after = reviews[-1].review_id if len(rows) > limit else None
+            return ReviewPage(hotel_id, reviews, next_after)
+
+        return self._cached(("reviews", hotel_id, after, limit), load)
+
+    def regions(
+        self,
+        level: str = "city",
+        aspect: str = "overall",
+        country: str | None = None,
+        limit: int = DEFAULT_TOP_LIMIT,
+        min_reviews: int = 1,
+    ) -> list[RegionRating]:
+        """Cities or countries ranked by their review-weighted ``aspect`` average."""
+        if level not in REGION_LEVELS:
+            raise ValueError(f"Unknown level {level!r}, expected one of {REGION_LEVELS}")
+        if aspect not in ASPECTS:
+            raise ValueError(f"Unknown aspect {aspect!r}, expected one of {ASPECTS}")
+        params = {"level": level, "country": country, "min_reviews": min_reviews, "limit": _limit(limit)}
+        return self._cached(
+            ("regions", level, aspect, country and country.lower(), params["limit"], min_reviews),
+            lambda: [RegionRating(*row) for row in self._fetch(REGIONS_SQL[aspect], params)],
+        )
+
+    def overall(self) -> RegionRating | None:
+        """The global rollup across every rated hotel."""
+        rows = self.regions(level="global")
+        return rows[0] if rows else None
+
+    def leaderboard(
+        self,
+        aspect: str = "overall",
+        city: str | None = None,
+        country: str | None = None,
+        limit: int = DEFAULT_TOP_LIMIT,
+    ) -> list[LeaderboardEntry]:
+        """Hotels ranked by Bayesian ``aspect`` score within a city, a country or overall."""
+        if aspect not in ASPECTS:
+            raise ValueError(f"Unknown aspect {aspect!r}, expected one of {ASPECTS}")
+        if city and country:
+            raise ValueError("Rank within a city or a country, not both")
+        level = "city" if city else "country" if country else "global"
+        region = city or country
+        params = {"aspect": aspect, "region": region, "limit": _limit(limit)}
+        return self._cached(
+            ("leaderboard", aspect, level, region and region.lower(), params["limit"]),
+            lambda: [LeaderboardEntry(*row) for row in self._fetch(LEADERBOARD_SQL[level], params)],
+        )
+
+    def trend(self, hotel_id: int, period: str = "year") -> list[TrendPoint]:
+        """A hotel's averages per ``period`` ("month" or "year") of review date, oldest first."""
+        if period not in TREND_PERIODS:
+            raise ValueError(f"Unknown period {period!r}, expected one of {TREND_PERIODS}")
+        return self._cached(
+            ("trend", hotel_id, period),
+            lambda: [TrendPoint(*row) for row in self._fetch(TREND_SQL[period], {"hotel_id": hotel_id})],
+        )
+
+    def stats(self) -> dict:
+        return {
+            "load_version": self.load_version,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "invalidations": self.invalidations,
+        }
+
+    # ------------------------------------------------------------------
+    def _cached(self, key: tuple, load: Callable[[], Any]) -> Any:
+        self._check_version()
+        found, value = self.cache.get(key)
+        if not found:
+            value = load()
+            self.cache.put(key, value)
+        return value
+
+    def _check_version(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._version_checked < VERSION_CHECK_SECONDS:
+            return
+        with self._version_lock:
+            if not force and now - self._version_checked < VERSION_CHECK_SECONDS:
+                return
+            version = self._fetch(LOAD_VERSION_SQL, None)[0][0]
+            if version != self.load_version:
+                if self.load_version is not None:
+                    self.invalidations += 1
+                self.cache.clear()
+                self.load_version = version
+            self._version_checked = time.monotonic()
+
+    def _fetch(self, sql: str, params: dict | None) -> list[tuple]:
+        with self.loader.pool.connection() as conn:
+            # prepare=True makes psycopg prepare the statement on this
+            # connection the first time and reuse the plan afterwards
+            rows = conn.execute(sql, params, prepare=True).fetchall()
+            conn.commit()
+        return rows
+
+
+def _limit(limit: int) -> int:
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+# ----------------------------------------------------------------------
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def to_json(value: Any) -> bytes:
+    if is_dataclass(value):
+        value = asdict(value)
+    elif isinstance(value, list):
+        value = [asdict(item) if is_dataclass(item) else item for item in value]
+    return json.dumps(value, default=_json_default).encode("utf-8")
+
+
+def make_handler(service: QueryService) -> type[BaseHTTPRequestHandler]:
+    """Build a read-only JSON handler for ``service``.
+
+    Routes: ``/hotels/top?city=&aspect=&limit=``, ``/hotels/<id>``,
+    ``/hotels/<id>/reviews?after=&limit=``, ``/hotels/<id>/trend?period=``,
+    ``/regions/<city|country|global>?aspect=&country=``,
+    ``/leaderboard?aspect=&city=&country=&limit=`` and ``/stats``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split("/") if part]
+            try:
+                result = self._route(parts, query)
+            except ValueError as e:
+                self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+                return
+            if result is None:
+                self._send(HTTPStatus.NOT_FOUND, {"error": f"Not found: {url.path}"})
+            else:
+                self._send(HTTPStatus.OK, result)
+
+        def _route(self, parts: list[str], query: dict[str, str]) -> Any:
+            if parts == ["stats"]:
+                return service.stats()
+            if parts == ["hotels", "top"]:
+                return service.top_hotels(
+                    city=query.get("city"),
+                    aspect=query.get("aspect", "overall"),
+                    limit=int(query.get("limit", DEFAULT_TOP_LIMIT)),
+                    min_reviews=int(query.get("min_reviews", 1)),
+                )
+            if parts == ["leaderboard"]:
+                return service.leaderboard(
+                    aspect=query.get("aspect", "overall"),
+                    city=query.get("city"),
+                    country=query.get("country"),
+                    limit=int(query.get("limit", DEFAULT_TOP_LIMIT)),
+                )
+            if len(parts) == 2 and parts[0] == "regions":
+                return service.regions(
+                    level=parts[1],
+                    aspect=query.get("aspect", "overall"),
+                    country=query.get("country"),
+                    limit=int(query.get("limit", DEFAULT_TOP_LIMIT)),
+                    min_reviews=int(query.get("min_reviews", 1)),
+                )
+            if len(parts) == 2 and parts[0] == "hotels":
+                return service.hotel(int(parts[1]))
+            if len(parts) == 3 and parts[0] == "hotels" and parts[2] == "reviews":
+                return service.reviews(
+                    int(parts[1]),
+                    after=int(query.get("after", 0)),
+                    limit=int(query.get("limit", DEFAULT_REVIEW_PAGE)),
+                )
+            if len(parts) == 3 and parts[0] == "hotels" and parts[2] == "trend":
+                return service.trend(int(parts[1]), period=query.get("period", "year"))
+            return None
+
+        def _send(self, status: HTTPStatus, body: Any) -> None:
+            payload = to_json(body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def serve(service: QueryService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving hotel ratings on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ----------------------------------------------------------------------
+def benchmark(service: QueryService, runs: int = 200) -> None:
+    """Compare a fresh connection per query with pooled, prepared and cached calls."""
+    import psycopg
+
+    cities = [row[0] for row in service._fetch(
+        "SELECT city FROM hotel_ratings_view GROUP BY city ORDER BY COUNT(*) DESC LIMIT 20", None
+    )]
+    loader = service.loader
+    sql = TOP_HOTELS_SQL["overall"]
+
+    def params(i: int) -> dict:
+        return {"city": cities[i % len(cities)], "min_reviews": 1, "limit": DEFAULT_TOP_LIMIT}
+
+    def ad_hoc(i: int) -> None:
+        with psycopg.connect(
+            host=loader.host, port=loader.port, dbname=loader.database, user=loader.user, password=loader.password
+        ) as conn:
+            conn.execute(sql, params(i)).fetchall()
+
+    def pooled(i: int) -> None:
+        service._fetch(sql, params(i))
+
+    def cached(i: int) -> None:
+        service.top_hotels(city=cities[i % len(cities)])
+
+    print(f"=== top_hotels latency over {runs} calls, {len(cities)} cities ===")
+    for label, call, count in (
+        ("new connection per query", ad_hoc, max(1, runs // 10)),
+        ("pooled + prepared", pooled, runs),
+        ("cached", cached, runs),
+    ):
+        timings = []
+        for i in range(count):
+            started = time.perf_counter()
+            call(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{label:<28}median {statistics.median(timings):8.3f} ms   mean {statistics.fmean(timings):8.3f} ms")
+    print(f"cache: {service.stats()}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Query loaded hotel ratings through a cached service.")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, help="seconds a cached result stays valid")
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    top = commands.add_parser("top", help="best hotels for an aspect")
+    top.add_argument("--city")
+    top.add_argument("--aspect", choices=ASPECTS, default="overall")
+    top.add_argument("--limit", type=int, default=DEFAULT_TOP_LIMIT)
+    top.add_argument("--min-reviews", type=int, default=1)
+
+    hotel = commands.add_parser("hotel", help="one hotel's ratings")
+    hotel.add_argument("hotel_id", type=int)
+
+    reviews = commands.add_parser("reviews", help="a page of a hotel's reviews")
+    reviews.add_argument("hotel_id", type=int)
+    reviews.add_argument("--after", type=int, default=0, help="last review id of the previous page")
+    reviews.add_argument("--limit", type=int, default=DEFAULT_REVIEW_PAGE)
+
+    regions = commands.add_parser("regions", help="cities or countries ranked by an aspect")
+    regions.add_argument("--level", choices=REGION_LEVELS, default="city")
+    regions.add_argument("--aspect", choices=ASPECTS, default="overall")
+    regions.add_argument("--country")
+    regions.add_argument("--limit", type=int, default=DEFAULT_TOP_LIMIT)
+    regions.add_argument("--min-reviews", type=int, default=1)
+
+    board = commands.add_parser("leaderboard", help="hotels ranked by Bayesian score")
+    board.add_argument("--aspect", choices=ASPECTS, default="overall")
+    scope = board.add_mutually_exclusive_group()
+    scope.add_argument("--city")
+    scope.add_argument("--country")
+    board.add_argument("--limit", type=int, default=DEFAULT_TOP_LIMIT)
+
+    trend = commands.add_parser("trend", help="a hotel's ratings by month or year of review")
+    trend.add_argument("hotel_id", type=int)
+    trend.add_argument("--period", choices=TREND_PERIODS, default="year")
+
+    server = commands.add_parser("serve", help="serve the queries as JSON over HTTP")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    bench = commands.add_parser("benchmark", help="compare ad hoc, pooled and cached query latency")
+    bench.add_argument("--runs", type=int, default=200)
+
+    args = parser.parse_args(argv)
+
+    with QueryService(args.pool_size, args.cache_entries, args.cache_ttl) as service:
+        if args.command == "serve":
+            serve(service, args.host, args.port)
+        elif args.command == "benchmark":
+            benchmark(service, args.runs)
+        elif args.command == "top":
+            for h in service.top_hotels(args.city, args.aspect, args.limit, args.min_reviews):
+                score = getattr(h, f"avg_{args.aspect}")
+                print(f"{score!s:>5}  {h.name} ({h.city}, {h.country}) - {h.total_reviews} reviews")
+        elif args.command == "regions":
+            for r in service.regions(args.level, args.aspect, args.country, args.limit, args.min_reviews):
+                name = ", ".join(part for part in (r.city, r.country) if part) or "All hotels"
+                score = getattr(r, f"avg_{args.aspect}")
+                histogram = " ".join(f"{i + 1}:{n}" for i, n in enumerate(getattr(r, f"hist_{args.aspect}")))
+                print(f"{score!s:>5}  {name:<24} {r.total_reviews:>7} reviews, {r.hotels:>4} hotels  [{histogram}]")
+        elif args.command == "leaderboard":
+            entries = service.leaderboard(args.aspect, args.city, args.country, args.limit)
+            rank = "city_rank" if args.city else "country_rank" if args.country else "global_rank"
+            for e in entries:
+                print(
+                    f"#{getattr(e, rank):<3} {e.score:.3f} (raw {e.raw_avg}, {e.reviews:>4} reviews)  "
+                    f"{e.name} ({e.city}, {e.country})"
+                )
+        elif args.command == "trend":
+            label = "%Y-%m" if args.period == "month" else "%Y"
+            for point in service.trend(args.hotel_id, args.period):
+                averages = "  ".join(f"{aspect} {getattr(point, f'avg_{aspect}')!s:>5}" for aspect in ASPECTS)
+                print(f"{point.period.strftime(label):<8}{point.reviews:>6} reviews  {averages}")
+        elif args.command == "hotel":
+            detail = service.hotel(args.hotel_id)
+            if detail is None:
+                print(f"❌ Hotel {args.hotel_id} not found")
+                return 1
+            print(json.dumps(asdict(detail), default=_json_default, indent=2))
+        else:
+            page = service.reviews(args.hotel_id, args.after, args.limit)
+            for review in page.reviews:
+                text = " ".join((review.text or "").split())
+                print(f"#{review.review_id} [{review.overall_score}] {text[:100]}")
+            if page.next_after is not None:
+                print(f"\nNext page: --after {page.next_after}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Versioned snapshot of what the GUI loads at startup.
+
+Before its first paint the GUI reads every hotel ordered by name, all of
+ratings_average, the distinct cities and countries and a row count per
+table, each over its own connection. The Python loader writes the same data
+at the end of every load, stamped with ``load_version.version``, in two
+forms:
+
+* ``ratings_snapshot.json.gz``: gzip-compressed JSON, column-oriented
+  (one list per column), for consumers that only have a JSON parser,
+* ``ratings_snapshot.npz``: compressed NumPy arrays, one per column, which
+  load without parsing text.
+
+A consumer starts from the file and later compares ``load_version`` with the
+database (``is_current``) to learn whether a newer load has happened.
+
+    python scripts/ratings_snapshot.py write
+    python scripts/ratings_snapshot.py show
+    python scripts/ratings_snapshot.py check
+    python scripts/ratings_snapshot.py benchmark
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import psycopg
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIR = Path("processed_data")
+JSON_NAME = "ratings_snapshot.json.gz"
+NPZ_NAME = "ratings_snapshot.npz"
+
+HOTEL_FIELDS = ("hotel_id", "name", "city", "country")
+AVERAGE_FIELDS = ("hotel_id", "avg_service", "avg_price", "avg_room", "avg_location", "avg_overall", "total_reviews")
+COUNTED_TABLES = ("hotels", "reviews", "ratings", "ratings_average")
+
+# The statements GUIApp runs before its first paint
+HOTELS_SQL = "SELECT hotel_id, name, city, country FROM hotels ORDER BY name"
+AVERAGES_SQL = f"SELECT {', '.join(AVERAGE_FIELDS)} FROM ratings_average ORDER BY hotel_id"
+CITIES_SQL = "SELECT DISTINCT city FROM hotels ORDER BY city"
+COUNTRIES_SQL = "SELECT DISTINCT country FROM hotels ORDER BY country"
+LOAD_VERSION_SQL = "SELECT version, loaded_at FROM load_version"
+
+
+@dataclass
+class Snapshot:
+    """Startup data in column form: ``hotels[field]`` and ``averages[field]`` are equal-length lists."""
+
+    load_version: int
+    loaded_at: str
+    created_at: str
+    counts: dict[str, int]
+    cities: list[str | None]
+    countries: list[str | None]
+    hotels: dict[str, list]
+    averages: dict[str, list]
+
+    def to_json(self) -> dict:
+        return {"format": SNAPSHOT_FORMAT, **self.__dict__}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Snapshot":
+        _check_format(data.pop("format", None))
+        return cls(**data)
+
+
+def take_snapshot(conn: psycopg.Connection) -> Snapshot:
+    """Read everything in one repeatable-read transaction, so the version and rows agree."""
+    conn.commit()
+    conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+    try:
+        version, loaded_at = conn.execute(LOAD_VERSION_SQL).fetchone()
+        hotels = conn.execute(HOTELS_SQL).fetchall()
+        averages = conn.execute(AVERAGES_SQL).fetchall()
+        cities = [city for (city,) in conn.execute(CITIES_SQL)]
+        countries = [country for (country,) in conn.execute(COUNTRIES_SQL)]
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in COUNTED_TABLES}
+    finally:
+        conn.commit()
+    return Snapshot(
+        load_version=version,
+        loaded_at=loaded_at.isoformat(),
+        created_at=datetime.now(timezone.utc).isoformat(),
+        counts=counts,
+        cities=cities,
+        countries=countries,
+        hotels=_columns(HOTEL_FIELDS, hotels),
+        averages={
+            field: [None if value is None else float(value) for value in values] if field.startswith("avg_") else values
+            for field, values in _columns(AVERAGE_FIELDS, averages).items()
+        },
+    )
+
+
+def write_snapshot(conn: psycopg.Connection, directory: Path = SNAPSHOT_DIR) -> Snapshot:
+    """Take a snapshot and write both files to ``directory``, each replaced atomically."""
+    snapshot = take_snapshot(conn)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    payload = json.dumps(snapshot.to_json(), separators=(",", ":")).encode("utf-8")
+    _replace(directory / JSON_NAME, lambda fh: fh.write(gzip.compress(payload, compresslevel=9, mtime=0)))
+
+    arrays = {
+        "format": np.array(SNAPSHOT_FORMAT),
+        "load_version": np.array(snapshot.load_version, dtype=np.int64),
+        "loaded_at": np.array(snapshot.loaded_at),
+        "created_at": np.array(snapshot.created_at),
+        "count_tables": np.array(list(snapshot.counts)),
+        "count_rows": np.array(list(snapshot.counts.values()), dtype=np.int64),
+        "cities": _strings(snapshot.cities),
+        "countries": _strings(snapshot.countries),
+        "hotels.hotel_id": np.array(snapshot.hotels["hotel_id"], dtype=np.int64),
+        "averages.hotel_id": np.array(snapshot.averages["hotel_id"], dtype=np.int64),
+        "averages.total_reviews": np.array(snapshot.averages["total_reviews"], dtype=np.int32),
+    }
+    for field in ("name", "city", "country"):
+        arrays[f"hotels.{field}"] = _strings(snapshot.hotels[field])
+    for field in AVERAGE_FIELDS[1:-1]:
+        # NULL averages become NaN
+        arrays[f"averages.{field}"] = np.array(snapshot.averages[field], dtype=np.float32)
+    _replace(directory / NPZ_NAME, lambda fh: np.savez_compressed(fh, **arrays))
+    return snapshot
+
+
+def read_snapshot(path: Path = SNAPSHOT_DIR / JSON_NAME) -> Snapshot:
+    """Load a snapshot from either file; the format follows the file name."""
+    if path.name.endswith(".npz"):
+        return _read_npz(path)
+    with gzip.open(path, "rb") as fh:
+        return Snapshot.from_json(json.loads(fh.read()))
+
+
+def is_current(conn: psycopg.Connection, snapshot: Snapshot) -> bool:
+    """Whether no load has finished since ``snapshot`` was taken."""
+    version = conn.execute("SELECT version FROM load_version").fetchone()[0]
+    conn.commit()
+    return version == snapshot.load_version
+
+
+def _read_npz(path: Path) -> Snapshot:
+    with np.load(path, allow_pickle=False) as data:
+        _check_format(int(data["format"]))
+        hotels = {"hotel_id": data["hotels.hotel_id"].tolist()}
+        hotels.update({field: _nullable(data[f"hotels.{field}"]) for field in ("name", "city", "country")})
+        averages = {"hotel_id": data["averages.hotel_id"].tolist()}
+        for field in AVERAGE_FIELDS[1:-1]:
+            values = data[f"averages.{field}"].astype(np.float64)
+            averages[field] = [None if np.isnan(value) else round(value, 2) for value in values.tolist()]
+        averages["total_reviews"] = data["averages.total_reviews"].tolist()
+        return Snapshot(
+            load_version=int(data["load_version"]),
+            loaded_at=str(data["loaded_at"]),
+            created_at=str(data["created_at"]),
+            counts=dict(zip(data["count_tables"].tolist(), data["count_rows"].tolist())),
+            cities=_nullable(data["cities"]),
+            countries=_nullable(data["countries"]),
+            hotels=hotels,
+            averages=averages,
+        )
+
+
+def _check_format(found) -> None:
+    if found != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {found!r}, expected {SNAPSHOT_FORMAT}")
+
+
+def _columns(fields: tuple[str, ...], rows: list[tuple]) -> dict[str, list]:
+    return {field: [row[i] for row in rows] for i, field in enumerate(fields)}
+
+
+def _strings(values: list[str | None]) -> np.ndarray:
+    # NumPy string arrays cannot hold None; NULL is stored as "" and read back as None
+    return np.array(["" if value is None else value for value in values], dtype=np.str_)
+
+
+def _nullable(array: np.ndarray) -> list[str | None]:
+    return [value or None for value in array.tolist()]
+
+
+def _replace(path: Path, write) -> None:
+    # Readers never see a half-written file: write aside, then rename over
+    partial = path.with_name(path.name + ".partial")
+    with partial.open("wb") as fh:
+        write(fh)
+    os.replace(partial, path)
+
+
+# ----------------------------------------------------------------------
+def benchmark(loader, directory: Path = SNAPSHOT_DIR, runs: int = 10) -> None:
+    """Compare the GUI's startup queries, a connection each, with reading either snapshot file."""
+
+    def queries() -> None:
+        # One connection per statement and the row counts, as GUIApp does
+        for sql in (HOTELS_SQL, "SELECT COUNT(*) FROM hotels", CITIES_SQL, COUNTRIES_SQL, AVERAGES_SQL,
+                    "SELECT COUNT(*) FROM ratings_average"):
+            with loader._open_connection() as conn:
+                conn.execute(sql).fetchall()
+
+    print(f"=== Startup data, median of {runs} runs ===")
+    for label, load in (
+        ("database queries", queries),
+        (JSON_NAME, lambda: read_snapshot(directory / JSON_NAME)),
+        (NPZ_NAME, lambda: read_snapshot(directory / NPZ_NAME)),
+    ):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            load()
+            timings.append((time.perf_counter() - started) * 1000)
+        size = ""
+        if label != "database queries":
+            size = f"  ({(directory / label).stat().st_size / 1024:.0f} KiB)"
+        print(f"{label:<26}{statistics.median(timings):>9.2f} ms{size}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    from postgres_loader import PostgresLoader
+
+    parser = argparse.ArgumentParser(description="Write or inspect the GUI startup snapshot.")
+    parser.add_argument("command", choices=("write", "show", "check", "benchmark"))
+    parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR, help=f"snapshot directory (default: {SNAPSHOT_DIR})")
+    parser.add_argument("--runs", type=int, default=10, help="timed runs for benchmark")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        snapshot = read_snapshot(args.dir / JSON_NAME)
+        print(f"load_version {snapshot.load_version} (loaded {snapshot.loaded_at}, snapshot {snapshot.created_at})")
+        print(", ".join(f"{table}: {rows}" for table, rows in snapshot.counts.items()))
+        print(f"{len(snapshot.cities)} cities, {len(snapshot.countries)} countries")
+        return 0
+
+    loader = PostgresLoader()
+    try:
+        loader.connect()
+        if args.command == "write":
+            snapshot = write_snapshot(loader.conn, args.dir)
+            print(f"✅ Snapshot of load_version {snapshot.load_version} written to {args.dir}")
+        elif args.command == "check":
+            snapshot = read_snapshot(args.dir / JSON_NAME)
+            if not is_current(loader.conn, snapshot):
+                print(f"⚠️ Snapshot is of load_version {snapshot.load_version}; the database has moved on")
+                return 1
+            print(f"✅ Snapshot matches load_version {snapshot.load_version}")
+        else:
+            benchmark(loader, args.dir, args.runs)
+    finally:
+        loader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
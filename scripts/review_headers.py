@@ -0,0 +1,43 @@
+"""Date and title headers at the start of review text.
+
+Reviews in the source files begin with the date they were written and their
+title, e.g. ``Nov 17 2009 \\tGreat location\\tThe room was...``. The chunk CSVs
+written by data_processor.py carry them as REVIEW_DATE (ISO, empty when the
+review has no header) and TITLE columns; chunks written before those columns
+existed are parsed here row by row by the loaders instead.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+
+# Group 1 is the date, group 2 the title (possibly the whole review if it has no body).
+# Titles are trimmed of spaces only, as btrim() does in migration 0010's backfill,
+# so a title is stored the same whichever side parsed it.
+REVIEW_HEADER_PATTERN = r"^([A-Z][a-z]{2} \d{1,2} \d{4}) *\t([^\t\r\n]*)"
+REVIEW_DATE_FORMAT = "%b %d %Y"
+REVIEW_HEADER = re.compile(REVIEW_HEADER_PATTERN)
+
+DATE_COLUMN = "REVIEW_DATE"
+TITLE_COLUMN = "TITLE"
+
+
+def parse_review_header(text: str | None) -> tuple[date | None, str | None]:
+    """Return ``(review_date, title)`` from the start of ``text``, or Nones without a header."""
+    match = REVIEW_HEADER.match(text or "")
+    if match is None:
+        return None, None
+    try:
+        review_date = datetime.strptime(match.group(1), REVIEW_DATE_FORMAT).date()
+    except ValueError:
+        return None, None
+    return review_date, match.group(2).strip(" ") or None
+
+
+def header_from_columns(row: dict, text: str | None) -> tuple[date | None, str | None]:
+    """``(review_date, title)`` for a chunk row, from its columns when the chunk has them."""
+    if DATE_COLUMN not in row:
+        return parse_review_header(text)
+    value = row.get(DATE_COLUMN)
+    review_date = date.fromisoformat(value) if value else None
+    return review_date, row.get(TITLE_COLUMN) or None
@@ -0,0 +1,226 @@
+"""Ranked, paginated full-text search over review text.
+
+Queries go through ``websearch_to_tsquery``, so they can be typed the way a
+search box expects (``bed bugs``, ``"front desk" rude``, ``noisy -street``),
+and are answered from the GIN index on ``reviews.search_vector`` added by
+migration 0005. Results can be narrowed to a hotel, city or country and come
+back a page at a time, best match first, with a highlighted snippet.
+
+    python scripts/review_search.py "bed bugs" --city Chicago
+    python scripts/review_search.py --benchmark --scale 10
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+
+import psycopg
+
+SEARCH_CONFIG = "english"
+DEFAULT_PAGE_SIZE = 20
+SNIPPET_OPTIONS = "MaxWords=30, MinWords=12, MaxFragments=1"
+IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+BENCHMARK_TABLE = "reviews_search_bench"
+BENCHMARK_QUERIES = (
+    ("bed bugs", {}),
+    ("bed bugs", {"city": "Chicago"}),
+    ('"front desk" rude', {}),
+    ("noisy street", {"country": "China"}),
+    ("breakfast", {}),
+    ("breakfast", {"city": "London"}),
+)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    hotel_id: int
+    review_id: int
+    hotel_name: str
+    city: str | None
+    country: str | None
+    rank: float
+    snippet: str
+
+
+@dataclass(frozen=True)
+class SearchPage:
+    hits: list[SearchHit]
+    page: int
+    page_size: int
+    has_more: bool
+    elapsed_ms: float
+
+
+class ReviewSearch:
+    """Full-text queries against ``table`` (reviews, or a table shaped like it)."""
+
+    def __init__(self, conn: psycopg.Connection, table: str = "reviews") -> None:
+        if not IDENTIFIER.match(table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.conn = conn
+        self.table = table
+
+    def search(
+        self,
+        query: str,
+        *,
+        hotel_id: int | None = None,
+        city: str | None = None,
+        country: str | None = None,
+        page: int = 1,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> SearchPage:
+        if page < 1 or page_size < 1:
+            raise ValueError("page and page_size must be positive")
+
+        conditions = ["r.search_vector @@ q.query"]
+        params: dict[str, object] = {"config": SEARCH_CONFIG, "query": query}
+        # Filters are only added when given, so each combination gets its own plan
+        if hotel_id is not None:
+            conditions.append("r.hotel_id = %(hotel_id)s")
+            params["hotel_id"] = hotel_id
+        if city:
+            conditions.append("lower(h.city) = lower(%(city)s)")
+            params["city"] = city
+        if country:
+            conditions.append("lower(h.country) = lower(%(country)s)")
+            params["country"] = country
+        # One extra row tells whether another page exists without counting every match
+        params["limit"] = page_size + 1
+        params["offset"] = (page - 1) * page_size
+        params["snippet_options"] = SNIPPET_OPTIONS
+
+        sql = f"""
+            WITH q AS (SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS query),
+            matches AS (
+                SELECT r.hotel_id, r.review_id, r.review_text, h.name, h.city, h.country,
+                       ts_rank_cd(r.search_vector, q.query) AS rank
+                FROM {self.table} r
+                JOIN hotels h ON h.hotel_id = r.hotel_id
+                CROSS JOIN q
+                WHERE {" AND ".join(conditions)}
+                ORDER BY rank DESC, r.hotel_id, r.review_id
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT m.hotel_id, m.review_id, m.name, m.city, m.country, m.rank,
+                   ts_headline(%(config)s::regconfig, m.review_text, q.query, %(snippet_options)s)
+            FROM matches m CROSS JOIN q
+            ORDER BY m.rank DESC, m.hotel_id, m.review_id
+        """
+        started = time.perf_counter()
+        rows = self.conn.execute(sql, params).fetchall()
+        self.conn.commit()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        hits = [SearchHit(*row) for row in rows[:page_size]]
+        return SearchPage(hits, page, page_size, len(rows) > page_size, elapsed_ms)
+
+
+# ----------------------------------------------------------------------
+def build_synthetic_table(conn: psycopg.Connection, scale: int) -> int:
+    """Create ``BENCHMARK_TABLE`` holding ``scale`` copies of reviews, with its own GIN index."""
+    started = time.perf_counter()
+    conn.execute(f"DROP TABLE IF EXISTS {BENCHMARK_TABLE}")
+    conn.execute(
+        f"CREATE UNLOGGED TABLE {BENCHMARK_TABLE} AS "
+        f"SELECT r.hotel_id, r.review_id + n * 1000000 AS review_id, r.review_text, r.search_vector "
+        f"FROM reviews r CROSS JOIN generate_series(0, %s - 1) AS n",
+        (scale,),
+    )
+    conn.execute(f"CREATE INDEX ON {BENCHMARK_TABLE} USING GIN (search_vector)")
+    conn.execute(f"ANALYZE {BENCHMARK_TABLE}")
+    rows = conn.execute(f"SELECT COUNT(*) FROM {BENCHMARK_TABLE}").fetchone()[0]
+    conn.commit()
+    print(f"Built {BENCHMARK_TABLE}: {rows} rows ({time.perf_counter() - started:.1f}s)")
+    return rows
+
+
+def _ilike_ms(conn: psycopg.Connection, table: str, phrase: str) -> float:
+    # Counts every match, as ranking does, so an early LIMIT cannot flatter it
+    started = time.perf_counter()
+    conn.execute(f"SELECT COUNT(*) FROM {table} WHERE review_text ILIKE %s", (f"%{phrase}%",)).fetchone()
+    conn.commit()
+    return (time.perf_counter() - started) * 1000
+
+
+def benchmark(conn: psycopg.Connection, scale: int = 1, runs: int = 10, keep: bool = False) -> None:
+    """Print median and p95 latency of the first page for each benchmark query."""
+    table = "reviews"
+    if scale > 1:
+        build_synthetic_table(conn, scale)
+        table = BENCHMARK_TABLE
+    rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.commit()
+    search = ReviewSearch(conn, table)
+
+    print(f"\n=== Full-text search latency on {table} ({rows} reviews, {runs} runs each) ===")
+    print(f"{'query':<24}{'filter':<22}{'median ms':>10}{'p95 ms':>10}{'hits':>6}")
+    try:
+        for query, filters in BENCHMARK_QUERIES:
+            timings = []
+            for _ in range(runs):
+                page = search.search(query, **filters)
+                timings.append(page.elapsed_ms)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))]
+            label = ", ".join(f"{k}={v}" for k, v in filters.items()) or "-"
+            print(f"{query:<24}{label:<22}{statistics.median(timings):>10.1f}{p95:>10.1f}{len(page.hits):>6}")
+        # Unindexed substring search, for comparison with what the index replaced
+        ilike = statistics.median(_ilike_ms(conn, table, "bed bug") for _ in range(3))
+        print(f"{'ILIKE %bed bug%':<24}{'-':<22}{ilike:>10.1f}")
+    finally:
+        if table == BENCHMARK_TABLE and not keep:
+            conn.execute(f"DROP TABLE {BENCHMARK_TABLE}")
+            conn.commit()
+
+
+def main(argv: list[str] | None = None) -> int:
+    from postgres_loader import PostgresLoader
+
+    parser = argparse.ArgumentParser(description="Search reviews by text.")
+    parser.add_argument("query", nargs="?", help='search terms, e.g. "bed bugs" or "front desk" rude')
+    parser.add_argument("--hotel-id", type=int)
+    parser.add_argument("--city")
+    parser.add_argument("--country")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--benchmark", action="store_true", help="report query latency instead of searching")
+    parser.add_argument("--scale", type=int, default=1, help="benchmark on N copies of the reviews (default 1)")
+    parser.add_argument("--runs", type=int, default=10, help="timed runs per benchmark query")
+    parser.add_argument("--keep", action="store_true", help=f"keep {BENCHMARK_TABLE} after a scaled benchmark")
+    args = parser.parse_args(argv)
+    if not args.benchmark and not args.query:
+        parser.error("a query is required unless --benchmark is given")
+
+    loader = PostgresLoader()
+    try:
+        loader.connect()
+        if args.benchmark:
+            benchmark(loader.conn, args.scale, args.runs, args.keep)
+            return 0
+        result = ReviewSearch(loader.conn).search(
+            args.query,
+            hotel_id=args.hotel_id,
+            city=args.city,
+            country=args.country,
+            page=args.page,
+            page_size=args.page_size,
+        )
+    finally:
+        loader.close()
+
+    for hit in result.hits:
+        print(f"[{hit.rank:.3f}] {hit.hotel_name} ({hit.city}, {hit.country}) review {hit.review_id}")
+        print(f"    {' '.join(hit.snippet.split())}")
+    more = ", more on the next page" if result.has_more else ""
+    print(f"\n{len(result.hits)} result(s) on page {result.page} in {result.elapsed_ms:.1f} ms{more}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,58 @@
 """
 Simple runner script - Use this to run everything
 """
-import os
+import subprocess
 import sys
+import threading
+from dataclasses import replace
 from pathlib import Path
 
+from pipeline import (
+    DATA_PROCESSING, DEFAULT_WORKERS, SENTIMENT_ANALYSIS, WORD_FREQUENCY, PipelineScheduler, Step,
+)
+
+PROJECT_SETUP = Step("Project Setup", "setup_project.py")
+# The pipeline without the database; sentiment and word frequency overlap
+STEPS = (
+    PROJECT_SETUP,
+    replace(DATA_PROCESSING, depends_on=(PROJECT_SETUP.name,)),
+    SENTIMENT_ANALYSIS,
+    WORD_FREQUENCY,
+)
+# Steps run concurrently; each one's output is printed as a block
+_print_lock = threading.Lock()
+
 def run_script(script_name, description):
     """Run a Python script with nice output"""
-    print(f"\n{'='*50}")
-    print(f"🚀 {description}")
-    print(f"{'='*50}")
-    
     script_path = Path(__file__).parent / script_name
     
     if not script_path.exists():
-        print(f"❌ Script not found: {script_path}")
+        with _print_lock:
+            print(f"❌ Script not found: {script_path}")
         return False
     
+    with _print_lock:
+        print(f"\n🚀 {description} started", flush=True)
+    
     try:
-        # Use system Python to run the script
-        exit_code = os.system(f'python "{script_path}"')
-        if exit_code == 0:
-            print(f"✅ {description} completed successfully!")
-            return True
-        else:
-            print(f"❌ {description} failed with exit code: {exit_code}")
-            return False
+        # Output is captured so concurrent steps don't interleave
+        result = subprocess.run([sys.executable, str(script_path)], capture_output=True, text=True)
     except Exception as e:
-        print(f"💥 Error running {script_name}: {e}")
+        with _print_lock:
+            print(f"💥 Error running {script_name}: {e}")
+        return False
+    
+    with _print_lock:
+        print(f"\n{'='*50}")
+        print(f"🚀 {description}")
+        print(f"{'='*50}")
+        print(result.stdout, end="")
+        if result.stderr:
+            print(result.stderr, end="")
+        if result.returncode == 0:
+            print(f"✅ {description} completed successfully!", flush=True)
+            return True
+        print(f"❌ {description} failed with exit code: {result.returncode}", flush=True)
         return False
 
 def main():
@@ -40,17 +65,11 @@ def main():
         print("❌ Please run this from the scripts directory!")
         return
     
-    steps = [
-        ("setup_project.py", "Project Setup"),
-        ("data_processor.py", "Data Processing"), 
-        ("sentiment_analyzer.py", "Sentiment Analysis"),
-        ("word_dictionary.py", "Word Frequency Analysis")
-    ]
-    
-    for script, description in steps:
-        if not run_script(script, description):
-            print(f"\n⏹️ Stopping pipeline due to error in {description}")
-            break
+    result = PipelineScheduler(STEPS, DEFAULT_WORKERS).run(lambda step: run_script(step.script, step.name))
+    result.report()
+    if not result.ok:
+        failed = [name for name, timing in result.timings.items() if not timing.ok]
+        print(f"\n⏹️ Stopping pipeline due to error in {', '.join(failed)}")
     else:
         print(f"\n{'🎉'*20}")
         print("ALL STEPS COMPLETED SUCCESSFULLY!")
@@ -3,20 +3,30 @@ CIT444 Final Project - VS Code Integrated Runner
 Run this file to execute the entire project pipeline
 """
 
+import argparse
+import importlib
 import subprocess
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
 
+from pipeline import DEFAULT_WORKERS, PIPELINE_STEPS, PipelineScheduler, StepCache, find_step, missing_inputs
+
 class ProjectRunner:
     def __init__(self):
         self.scripts_dir = Path(__file__).parent
         self.project_root = self.scripts_dir.parent
+        # Steps run concurrently; each one's output is printed as a block
+        self._print_lock = threading.Lock()
+        # Data passed between steps run in this process (see run_in_process)
+        self.handoff = {}
         
     def run_step(self, step_name, script_path, args=None):
         """Run a project step with nice formatting"""
-        print(f"\n{'='*60}")
-        print(f"🚀 {step_name}")
-        print(f"{'='*60}")
+        with self._print_lock:
+            print(f"\n🚀 {step_name} started", flush=True)
         
         try:
             if args:
@@ -26,37 +36,102 @@ class ProjectRunner:
                 result = subprocess.run([sys.executable, script_path], 
                                       cwd=self.scripts_dir, capture_output=True, text=True)
             
+        except Exception as e:
+            with self._print_lock:
+                print(f"💥 Error running {step_name}: {e}")
+            return False
+        
+        with self._print_lock:
+            print(f"\n{'='*60}")
+            print(f"🚀 {step_name}")
+            print(f"{'='*60}")
             if result.returncode == 0:
                 print(f"✅ {step_name} completed successfully!")
-                print(result.stdout)
+                print(result.stdout, flush=True)
                 return True
-            else:
-                print(f"❌ {step_name} failed!")
-                print("STDOUT:", result.stdout)
-                print("STDERR:", result.stderr)
-                return False
-                
-        except Exception as e:
-            print(f"💥 Error running {step_name}: {e}")
+            print(f"❌ {step_name} failed!")
+            print("STDOUT:", result.stdout)
+            print("STDERR:", result.stderr, flush=True)
+            return False
+    
+    def run_in_process(self, step):
+        """Run a step by calling its script's run_in_pipeline(handoff) in this interpreter
+        
+        Modules are imported once and shared by every step, DataFrames are
+        handed over through ``self.handoff`` instead of being read back from
+        disk, and output is printed as it happens.
+        """
+        print(f"\n{'='*60}")
+        print(f"🚀 {step.name} (in process)")
+        print(f"{'='*60}", flush=True)
+        
+        module_name = Path(step.script).stem
+        try:
+            started = time.perf_counter()
+            fresh = module_name not in sys.modules
+            module = importlib.import_module(module_name)
+            if fresh:
+                print(f"⏱️ Imported {module_name} in {time.perf_counter() - started:.2f}s")
+            ok = module.run_in_pipeline(self.handoff)
+        except Exception:
+            print(f"💥 Error running {step.name}:")
+            traceback.print_exc()
+            return False
+        
+        print(f"{'✅' if ok else '❌'} {step.name} {'completed successfully!' if ok else 'failed!'}", flush=True)
+        return bool(ok)
+    
+    def run_pipeline_step(self, step, in_process=False):
+        """Run a declared pipeline step once its input files are in place
+        
+        Only inputs made by upstream steps are checked: a step without
+        dependencies reads source data (raw_data/) and explains a missing
+        or misshapen folder better than a bare "no files match".
+        """
+        missing = missing_inputs(step, self.project_root) if step.depends_on else []
+        if missing:
+            with self._print_lock:
+                print(f"❌ {step.name} cannot start, no files match: {', '.join(missing)}")
             return False
+        if in_process:
+            return self.run_in_process(step)
+        return self.run_step(step.name, step.script, list(step.args) or None)
     
-    def run_complete_pipeline(self):
-        """Run the complete project pipeline"""
+    def run_complete_pipeline(self, workers=DEFAULT_WORKERS, force=(), use_cache=True, in_process=False, skip=()):
+        """Run the complete project pipeline, independent steps side by side
+        
+        Steps whose inputs and code are unchanged since they last succeeded
+        are skipped unless listed in ``force`` (step names or scripts, or "all").
+        Steps listed in ``skip`` are left out, such as Database Setup for runs
+        that should not touch the database.
+        With ``in_process`` the steps run in this interpreter rather than in
+        a new Python each.
+        """
         print("🎯 CIT444 Hotel Analysis Project - Complete Pipeline")
         print("📁 Running from VS Code Integrated Environment")
+        print(f"⚙️ Up to {workers} step(s) at a time")
         
-        steps = [
-            ("Data Processing", "data_processor.py", None),
-            ("Sentiment Analysis", "sentiment_analyzer.py", None),
-            ("Word Frequency Analysis", "word_dictionary.py", None),
-            ("Database Setup", "database_manager.py", None)
-        ]
+        skipped = {find_step(PIPELINE_STEPS, label).name for label in skip}
+        steps = [step for step in PIPELINE_STEPS if step.name not in skipped]
+        for step in steps:
+            needed = skipped.intersection(step.depends_on)
+            if needed:
+                raise ValueError(f"Cannot skip {', '.join(sorted(needed))}: {step.name} depends on it")
+        if skipped:
+            print(f"⏭️ Skipping {', '.join(sorted(skipped))}")
         
-        for step_name, script, args in steps:
-            success = self.run_step(step_name, script, args)
-            if not success:
-                print(f"⏹️ Pipeline stopped at {step_name}")
-                return False
+        if "all" in force:
+            forced = [step.name for step in steps]
+        else:
+            forced = [find_step(steps, label).name for label in force]
+        cache = StepCache() if use_cache else None
+        scheduler = PipelineScheduler(steps, workers, cache, forced)
+        result = scheduler.run(lambda step: self.run_pipeline_step(step, in_process))
+        result.report()
+        if not result.ok:
+            failed = [name for name, timing in result.timings.items() if not timing.ok]
+            print(f"⏹️ Pipeline stopped at {', '.join(failed)}")
+            return False
         
         print(f"\n{'🎉'*20}")
         print("ALL STEPS COMPLETED SUCCESSFULLY!")
@@ -70,15 +145,32 @@ class ProjectRunner:
         return self.run_step("Create Sample Data", "data_processor.py", ["--sample"])
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the CIT444 project pipeline.")
+    parser.add_argument("command", nargs="?", help="sample, db, or omit for the complete pipeline")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"steps to run at the same time (default {DEFAULT_WORKERS}, or PIPELINE_WORKERS)")
+    parser.add_argument("--force", action="append", default=[], metavar="STEP",
+                        help="re-run STEP (name or script, e.g. sentiment_analyzer) even if up to date, "
+                             "such as database_manager after the database was wiped; repeatable, or 'all'")
+    parser.add_argument("--skip", action="append", default=[], metavar="STEP",
+                        help="leave STEP out, e.g. database_manager for a run that must not "
+                             "touch the database; repeatable")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="run every step and do not record fingerprints")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run the steps in this interpreter, passing data between them in memory")
+    args = parser.parse_args()
     runner = ProjectRunner()
     
-    # Check for command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "sample":
-            runner.create_sample_project()
-        elif sys.argv[1] == "db":
-            runner.run_step("Database Setup", "database_manager.py")
-        else:
-            runner.run_complete_pipeline()
+    if args.command == "sample":
+        runner.create_sample_project()
+    elif args.command == "db":
+        runner.run_step("Database Setup", "database_manager.py")
     else:
-        runner.run_complete_pipeline()
\ No newline at end of file
+        try:
+            ok = runner.run_complete_pipeline(
+                args.workers, args.force, not args.no_cache, args.in_process, args.skip
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(0 if ok else 1)
\ No newline at end of file
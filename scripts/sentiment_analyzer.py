@@ -1,4 +1,8 @@
+import argparse
+import csv
+from abc import ABC, abstractmethod
 import os
+import sys
 import pandas as pd
 import torch
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
@@ -7,6 +11,8 @@ import time
 import logging
 from pathlib import Path
 
+from sharding import parse_shard
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +23,106 @@ logging.basicConfig(
     ]
 )
 
+RATING_FIELDS = ['REVIEWID', 'HOTELID', 'SERVICE', 'PRICE', 'ROOM', 'LOCATION', 'OVERALL']
+
+
+class RatingsSink(ABC):
+    """Destination for scored reviews, fed one batch of rating dicts at a time"""
+
+    @abstractmethod
+    def write(self, rows):
+        ...
+
+    def close(self, ok=True):
+        """Finish up; ``ok`` is False when the run failed"""
+
+
+class CsvRatingsSink(RatingsSink):
+    """Write scored reviews to a CSV file such as final_ratings.csv
+
+    Rows are appended to a .partial file as batches complete and the file is
+    renamed into place on close, so readers never pick up a half-written file.
+    A failed run, or one that scored nothing, leaves the existing file alone
+    unless ``allow_empty`` (a shard may own no reviews at all).
+    """
+
+    def __init__(self, path, allow_empty=False):
+        self.path = Path(path)
+        self.allow_empty = allow_empty
+        self.rows = 0
+        self._partial = self.path.with_name(self.path.name + '.partial')
+        self._file = self._partial.open('w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=RATING_FIELDS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self, ok=True):
+        if self._file.closed:
+            return
+        self._file.close()
+        if ok and (self.rows or self.allow_empty):
+            self._partial.replace(self.path)
+        else:
+            self._partial.unlink(missing_ok=True)
+
+
+class PostgresRatingsSink(RatingsSink):
+    """Stream scored reviews straight into the ratings table over COPY
+
+    Rows are buffered and flushed every ``flush_rows`` rows or ``flush_seconds``
+    seconds; each flush is one COPY + upsert transaction, so new scores show up
+    in the database within seconds. Hotels and reviews must already be loaded,
+    and the schema current: scoring never migrates or repartitions the tables.
+    """
+
+    def __init__(self, flush_rows=500, flush_seconds=5.0):
+        # Only this sink needs psycopg, so the loader is imported on demand
+        from postgres_loader import LoadCounts, PostgresLoader
+
+        # partitions=None: leave the tables as they are, whatever REVIEW_PARTITIONS says
+        self.loader = PostgresLoader(partitions=None, snapshot_dir=None)
+        try:
+            self.loader.connect()
+            self.loader.check_schema()
+        except Exception:
+            self.loader.close()
+            raise
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.counts = LoadCounts()
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def write(self, rows):
+        self._pending.extend(rows)
+        if (len(self._pending) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.counts += self.loader.upsert_ratings(
+                tuple(int(row[field]) for field in RATING_FIELDS) for row in self._pending
+            )
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self, ok=True):
+        # Flushed batches are already in the table, so the rest go in too; the
+        # views (and load_version, which read-side caches key on) only move on
+        # once the whole run succeeded
+        try:
+            self.flush()
+            if ok:
+                self.loader.refresh_views()
+            logging.info(f"Postgres ratings: {self.counts}")
+        finally:
+            self.loader.close()
+
+
 class EnhancedReviewAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -118,11 +224,17 @@ class EnhancedReviewAnalyzer:
         
         return category_scores
     
-    def process_review_batch(self, reviews_df, batch_size=8):
-        """Process a batch of reviews with progress tracking"""
+    def process_review_batch(self, reviews_df, batch_size=8, sinks=()):
+        """Process a batch of reviews with progress tracking
+
+        Each completed batch is handed to every sink in ``sinks`` right away.
+        """
         if self.sentiment_analyzer is None:
             self.logger.info("Model not available, using default scores")
-            return self._create_default_scores(reviews_df)
+            default_df = self._create_default_scores(reviews_df)
+            for sink in sinks:
+                sink.write(default_df.to_dict('records'))
+            return default_df
         
         results = []
         total_reviews = len(reviews_df)
@@ -162,6 +274,8 @@ class EnhancedReviewAnalyzer:
                     })
             
             results.extend(batch_results)
+            for sink in sinks:
+                sink.write(batch_results)
             
             # Small delay to avoid overwhelming the system
             if i + batch_size < total_reviews:
@@ -202,59 +316,110 @@ def find_review_chunks(processed_data_path):
     
     return chunk_files
 
-def process_all_chunks(processed_data_path, output_file='final_ratings.csv'):
-    """Process all review chunks and combine results"""
-    analyzer = EnhancedReviewAnalyzer()
-    all_results = []
-    
-    # Find all review chunks
-    chunk_files = find_review_chunks(processed_data_path)
+def process_all_chunks(processed_data_path, output_file='final_ratings.csv', sinks=None, chunks=None):
+    """Process all review chunks and combine results
+
+    Scored rows go to ``sinks`` as each batch completes; by default that is a
+    single CSV sink writing ``output_file`` in ``processed_data_path``.
+    ``chunks`` takes (name, DataFrame) pairs already in memory in place of
+    the chunk files.
+    """
+    if chunks is None:
+        # Find all review chunks
+        chunk_files = find_review_chunks(processed_data_path)
+        
+        if not chunk_files:
+            logging.error(f"No review chunks found in {processed_data_path}!")
+            logging.info(f"Files in directory: {list(processed_data_path.iterdir()) if processed_data_path.exists() else 'Directory not found'}")
+            for sink in sinks or ():
+                sink.close(ok=False)
+            return None
+        chunks = [(chunk_file.name, chunk_file) for chunk_file in chunk_files]
     
-    if not chunk_files:
-        logging.error(f"No review chunks found in {processed_data_path}!")
-        logging.info(f"Files in directory: {list(processed_data_path.iterdir()) if processed_data_path.exists() else 'Directory not found'}")
-        return None
+    logging.info(f"Found {len(chunks)} review chunks to process")
     
-    logging.info(f"Found {len(chunk_files)} review chunks to process")
+    all_results = []
+    if sinks is None:
+        sinks = [CsvRatingsSink(processed_data_path / output_file)]
     
     total_reviews = 0
-    for chunk_file in chunk_files:
-        logging.info(f"\nProcessing {chunk_file.name}...")
-        
-        try:
-            reviews_df = pd.read_csv(chunk_file)
-            logging.info(f"  Loaded {len(reviews_df)} reviews from {chunk_file.name}")
+    failed_chunks = 0
+    ok = False
+    try:
+        analyzer = EnhancedReviewAnalyzer()
+        for chunk_name, chunk in chunks:
+            logging.info(f"\nProcessing {chunk_name}...")
             
-            results_df = analyzer.process_review_batch(reviews_df)
-            all_results.append(results_df)
-            total_reviews += len(reviews_df)
-            
-        except Exception as e:
-            logging.error(f"Error processing chunk {chunk_file}: {e}")
-            continue
+            try:
+                reviews_df = chunk if isinstance(chunk, pd.DataFrame) else pd.read_csv(chunk)
+                logging.info(f"  Loaded {len(reviews_df)} reviews from {chunk_name}")
+                if reviews_df.empty:
+                    continue
+                
+                results_df = analyzer.process_review_batch(reviews_df, sinks=sinks)
+                all_results.append(results_df)
+                total_reviews += len(reviews_df)
+                
+            except Exception as e:
+                logging.error(f"Error processing chunk {chunk_name}: {e}")
+                failed_chunks += 1
+                continue
+        # Failed only if chunks errored and nothing was scored
+        ok = bool(all_results) or not failed_chunks
+    finally:
+        for sink in sinks:
+            sink.close(ok)
     
     # Combine all results
     if all_results:
         final_df = pd.concat(all_results, ignore_index=True)
-        output_path = processed_data_path / output_file
-        final_df.to_csv(output_path, index=False)
         
         # Print summary statistics
         logging.info(f"\n=== Analysis Complete ===")
         logging.info(f"Processed {total_reviews} total reviews")
-        logging.info(f"Output file: {output_path}")
+        for sink in sinks:
+            if isinstance(sink, CsvRatingsSink):
+                logging.info(f"Output file: {sink.path}")
         logging.info(f"Average scores:")
         for column in ['SERVICE', 'PRICE', 'ROOM', 'LOCATION', 'OVERALL']:
             avg_score = final_df[column].mean()
             logging.info(f"  {column}: {avg_score:.2f}")
         
         return final_df
+    elif ok:
+        logging.info("No reviews to score")
+        return pd.DataFrame(columns=RATING_FIELDS)
     else:
         logging.error("No results generated!")
         return None
 
-def main():
+def run_in_pipeline(handoff):
+    """Pipeline entry point for run_project.py --in-process
+    
+    Scores the chunk frames data_processor left in ``handoff`` (or the chunk
+    files, when that step was skipped) and writes final_ratings.csv, which
+    the database step loads.
+    """
+    processed_data_path = Path(__file__).parent.parent / "processed_data"
+    results_df = process_all_chunks(processed_data_path, chunks=handoff.get('review_chunks'))
+    if results_df is None:
+        return False
+    print(f"Successfully processed {len(results_df)} reviews!")
+    return True
+
+def main(argv=None):
     """Main function to run sentiment analysis"""
+    parser = argparse.ArgumentParser(description="Score review chunks with the sentiment model.")
+    parser.add_argument('--postgres', action='store_true',
+                        help="stream scores into the Postgres ratings table as batches complete "
+                             "(hotels and reviews must already be loaded)")
+    parser.add_argument('--no-csv', action='store_true',
+                        help="do not write processed_data/final_ratings.csv")
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help="score only the chunks of shard I of N into "
+                             "processed_data/shards/final_ratings.shard-I-of-N.csv (see sharding.py)")
+    args = parser.parse_args(argv)
+
     print("Starting CIT444 Sentiment Analysis")
     print("=" * 60)
     
@@ -268,7 +433,7 @@ def main():
     if not processed_data_path.exists():
         print(f"Error: Processed data directory not found: {processed_data_path}")
         print("Please run data_processor.py first to generate review chunks.")
-        return
+        return 1
     
     # Check what files exist
     files = list(processed_data_path.iterdir())
@@ -282,18 +447,51 @@ def main():
         print("No review chunks found!")
         print("Expected files: reviews_chunk_1.csv, reviews_chunk_2.csv, etc.")
         print(f"Available files: {[f.name for f in csv_files[:10]]}...")  # Show first 10
-        return
+        return 1
     
     print(f"Found {len(chunk_files)} review chunks")
     
+    chunks = None
+    output_path = processed_data_path / 'final_ratings.csv'
+    if args.shard:
+        # Split by hotel rather than by chunk: thousands of hotels balance
+        # the shards far better than a hundred or so chunks
+        chunks = []
+        for chunk_file in find_review_chunks(processed_data_path):
+            reviews_df = pd.read_csv(chunk_file)
+            chunks.append((chunk_file.name, reviews_df[reviews_df['HOTELID'].astype(str).map(args.shard.owns)]))
+        output_path = args.shard.path(processed_data_path, 'final_ratings')
+        output_path.parent.mkdir(exist_ok=True)
+        print(f"Shard {args.shard}: scoring {sum(len(df) for _, df in chunks)} reviews")
+    
+    sinks = []
+    try:
+        if not args.no_csv:
+            sinks.append(CsvRatingsSink(output_path, allow_empty=bool(args.shard)))
+        if args.postgres:
+            sinks.append(PostgresRatingsSink())
+    except Exception:
+        for sink in sinks:
+            sink.close(ok=False)
+        raise
+    if not sinks:
+        print("Nothing to write: pass --postgres or drop --no-csv")
+        return 1
+    
     # Run the analysis with the correct absolute path
-    results_df = process_all_chunks(processed_data_path)
+    results_df = process_all_chunks(processed_data_path, sinks=sinks, chunks=chunks)
     
     if results_df is not None:
         print(f"\nSuccessfully processed {len(results_df)} reviews!")
-        print(f"Results saved to: {processed_data_path / 'final_ratings.csv'}")
-    else:
-        print("\nSentiment analysis failed!")
+        if results_df.empty and not args.shard:
+            print(f"Nothing scored; {output_path} left as it was")
+        elif not args.no_csv:
+            print(f"Results saved to: {output_path}")
+        if args.postgres:
+            print("Scores streamed into the Postgres ratings table")
+        return 0
+    print("\nSentiment analysis failed!")
+    return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""Split ingestion and scoring across machines with ``--shard i/N``.
+
+Every node gets the same ``raw_data`` (or the same canonical chunks) and one
+shard number; nothing else is coordinated. Work is assigned by a stable
+hash (CRC-32, unlike ``hash()`` the same on every machine and run):
+
+* ``data_processor.py --shard i/N`` extracts the reviews of the hotels
+  whose ``city/file`` path hashes to shard i,
+* ``sentiment_analyzer.py --shard i/N`` scores, from the canonical
+  ``reviews_chunk_*.csv`` files, the reviews of the hotels whose
+  ``HOTELID`` hashes to shard i.
+
+Shard outputs go to ``processed_data/shards`` with the shard in the name
+(``reviews_chunk_1.shard-2-of-4.csv``, ``final_ratings.shard-2-of-4.csv``),
+so the files of all nodes can be copied into one directory. ``merge`` then
+writes the canonical ``hotels.csv``, ``reviews_chunk_*.csv`` and
+``final_ratings.csv``, the same files an unsharded run produces, after
+checking that every shard is present and every review was scored exactly
+once.
+
+    python scripts/data_processor.py --shard 2/4
+    python scripts/sentiment_analyzer.py --shard 2/4
+    python scripts/sharding.py merge
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import sys
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+PROCESSED_DATA_DIR = Path(__file__).resolve().parent.parent / "processed_data"
+SHARDS_DIR_NAME = "shards"
+CHUNK_SIZE = 500
+SHARD_FILE = re.compile(r"^(?P<stem>.+)\.shard-(?P<index>\d+)-of-(?P<count>\d+)\.csv$")
+CHUNK_NUMBER = re.compile(r"^reviews_chunk_(\d+)\.csv$")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard ``index`` of ``count``, numbered from 1 like the chunk files."""
+
+    index: int
+    count: int
+
+    @property
+    def suffix(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+    def owns(self, key: str) -> bool:
+        return shard_of(key, self.count) == self.index
+
+    def path(self, directory: Path, stem: str) -> Path:
+        """Where this shard's ``<stem>.csv`` goes under ``directory``."""
+        return directory / SHARDS_DIR_NAME / f"{stem}.{self.suffix}.csv"
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def shard_of(key: str, count: int) -> int:
+    """The shard (1..count) ``key`` belongs to, identical on every machine."""
+    return zlib.crc32(key.encode("utf-8")) % count + 1
+
+
+def parse_shard(text: str) -> Shard:
+    """Parse ``i/N`` as given to ``--shard``; also usable as an argparse ``type``."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", text or "")
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected i/N with 1 <= i <= N, got {text!r}")
+    return Shard(int(match.group(1)), int(match.group(2)))
+
+
+def chunk_number(path: Path) -> int:
+    return int(CHUNK_NUMBER.match(path.name).group(1))
+
+
+def _shard_files(shards_dir: Path, stem_pattern: str) -> dict[Shard, list[Path]]:
+    files: dict[Shard, list[Path]] = {}
+    for path in sorted(shards_dir.glob("*.csv")):
+        match = SHARD_FILE.match(path.name)
+        if match and re.fullmatch(stem_pattern, match.group("stem")):
+            files.setdefault(Shard(int(match.group("index")), int(match.group("count"))), []).append(path)
+    return files
+
+
+def _complete(files: dict[Shard, list[Path]], what: str) -> list[Shard]:
+    """The shards of one complete run, or ValueError naming what is missing or mixed."""
+    counts = {shard.count for shard in files}
+    if len(counts) != 1:
+        raise ValueError(f"{what} from runs with different shard counts: {sorted(counts)}; remove the stale ones")
+    count = counts.pop()
+    missing = [str(Shard(index, count)) for index in range(1, count + 1) if Shard(index, count) not in files]
+    if missing:
+        raise ValueError(f"{what} missing for shard(s) {', '.join(missing)}")
+    return [Shard(index, count) for index in range(1, count + 1)]
+
+
+def _read(path: Path) -> pd.DataFrame:
+    # Text as-is, through the python engine so reviews with embedded NULs survive
+    return pd.read_csv(path, dtype=str, keep_default_na=False, engine="python")
+
+
+def merge_reviews(directory: Path = PROCESSED_DATA_DIR, chunk_size: int = CHUNK_SIZE) -> int | None:
+    """Write hotels.csv and reviews_chunk_*.csv from the data_processor shards.
+
+    Returns the number of reviews, or None if there are no review shards.
+    """
+    shards_dir = directory / SHARDS_DIR_NAME
+    hotel_files = _shard_files(shards_dir, "hotels")
+    chunk_files = _shard_files(shards_dir, r"reviews_chunk_\d+")
+    if not hotel_files:
+        return None
+    shards = _complete(hotel_files, "hotels")
+
+    hotels = [_read(hotel_files[shard][0]) for shard in shards]
+    if any(not frame.equals(hotels[0]) for frame in hotels[1:]):
+        raise ValueError("hotels differ between shards; every node needs the same raw_data")
+
+    per_shard = {}
+    frames = []
+    for shard in shards:
+        shard_frames = [_read(path) for path in chunk_files.get(shard, [])]
+        per_shard[shard] = sum(len(frame) for frame in shard_frames)
+        frames.extend(shard_frames)
+    reviews = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["IDREVIEW", "HOTELID"])
+
+    keys = list(zip(reviews["HOTELID"], reviews["IDREVIEW"]))
+    duplicated = [key for key, seen in Counter(keys).items() if seen > 1]
+    if duplicated:
+        raise ValueError(f"{len(duplicated)} review(s) extracted by more than one shard, e.g. {duplicated[0]}")
+
+    # Hotel then review order, as an unsharded run writes them
+    order = sorted(range(len(reviews)), key=lambda i: (int(keys[i][0]), int(keys[i][1])))
+    reviews = reviews.iloc[order]
+
+    hotels[0].to_csv(directory / "hotels.csv", index=False)
+    written = 0
+    for start in range(0, len(reviews), chunk_size):
+        written += 1
+        reviews.iloc[start:start + chunk_size].to_csv(directory / f"reviews_chunk_{written}.csv", index=False)
+    for stale in directory.glob("reviews_chunk_*.csv"):
+        if CHUNK_NUMBER.match(stale.name) and chunk_number(stale) > written:
+            stale.unlink()
+
+    print(f"✅ Merged {len(reviews)} reviews of {len(hotels[0])} hotels into {written} chunks "
+          f"({', '.join(f'{shard}: {rows}' for shard, rows in per_shard.items())})")
+    return len(reviews)
+
+
+def merge_ratings(directory: Path = PROCESSED_DATA_DIR) -> int | None:
+    """Write final_ratings.csv from the sentiment_analyzer shards.
+
+    Every review in the canonical chunks must be scored by exactly one shard.
+    Returns the number of ratings, or None if there are no rating shards.
+    """
+    rating_files = _shard_files(directory / SHARDS_DIR_NAME, "final_ratings")
+    if not rating_files:
+        return None
+    shards = _complete(rating_files, "final_ratings")
+
+    ratings = {}
+    scored = Counter()
+    per_shard = {}
+    fields = None
+    for shard in shards:
+        with rating_files[shard][0].open(encoding="utf-8", newline="") as fh:
+            reader = csv.DictReader(fh)
+            fields = reader.fieldnames
+            per_shard[shard] = 0
+            for row in reader:
+                key = (row["HOTELID"], row["REVIEWID"])
+                scored[key] += 1
+                ratings[key] = row
+                per_shard[shard] += 1
+
+    expected = []
+    chunks = sorted(
+        (path for path in directory.glob("reviews_chunk_*.csv") if CHUNK_NUMBER.match(path.name)),
+        key=chunk_number,
+    )
+    for path in chunks:
+        chunk = _read(path)
+        expected.extend(zip(chunk["HOTELID"], chunk["IDREVIEW"]))
+
+    missing = [key for key in expected if key not in scored]
+    twice = [key for key, seen in scored.items() if seen > 1]
+    unknown = set(scored) - set(expected)
+    if missing or twice or unknown:
+        raise ValueError(
+            f"ratings do not cover the reviews exactly once: {len(missing)} unscored, "
+            f"{len(twice)} scored more than once, {len(unknown)} not in the chunks"
+        )
+
+    path = directory / "final_ratings.csv"
+    partial = path.with_name(path.name + ".partial")
+    with partial.open("w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields)
+        writer.writeheader()
+        # Chunk order, as an unsharded run writes them
+        writer.writerows(ratings[key] for key in expected)
+    partial.replace(path)
+
+    print(f"✅ Merged {len(expected)} ratings, each review scored once "
+          f"({', '.join(f'{shard}: {rows}' for shard, rows in per_shard.items())})")
+    return len(expected)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge shard outputs into the canonical processed_data files.")
+    parser.add_argument("command", choices=("merge",))
+    parser.add_argument("--dir", type=Path, default=PROCESSED_DATA_DIR,
+                        help="processed_data directory holding shards/ (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        reviews = merge_reviews(args.dir)
+        ratings = merge_ratings(args.dir)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if reviews is None and ratings is None:
+        print(f"Nothing to merge in {args.dir / SHARDS_DIR_NAME}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,89 +1,123 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import pandas as pd
 from collections import Counter
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
 import os
+import sys
+
+from nltk_resources import NltkResources
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-except:
-    print("NLTK downloads may require internet connection")
+CUSTOM_STOP_WORDS = ['hotel', 'room', 'stay', 'stayed', 'would', 'could', 'also', 'us', 'we', 'i', 'the', 'a', 'an']
 
 class WordFrequencyAnalyzer:
-    def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
-        
-        # Add custom stop words
-        self.stop_words.update(['hotel', 'room', 'stay', 'stayed', 'would', 'could', 'also', 'us', 'we', 'i', 'the', 'a', 'an'])
+    def __init__(self, resources=None):
+        # NLTK data is resolved lazily on first use (see nltk_resources.py)
+        self.resources = resources or NltkResources()
+        self._stop_words = None
+    
+    @property
+    def lemmatizer(self):
+        return self.resources.lemmatizer()
+    
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            self._stop_words = self.resources.stop_words() | set(CUSTOM_STOP_WORDS)
+        return self._stop_words
     
     def process_review_text(self, review_text):
         """Process and tokenize review text"""
         if not isinstance(review_text, str):
             return []
         
-        try:
-            tokens = word_tokenize(review_text.lower())
-            
-            processed_tokens = [
-                self.lemmatizer.lemmatize(word)
-                for word in tokens 
-                if word.isalnum() 
-                and word not in self.stop_words
-                and len(word) > 2  # Remove very short words
-            ]
-            
-            return processed_tokens
-        except:
-            return []
+        # No blanket except here: a missing NLTK table (LookupError) must stop
+        # the run instead of turning every review into zero words
+        tokenize = self.resources.tokenizer()
+        lemmatize = self.lemmatizer.lemmatize
+        stop_words = self.stop_words
+        
+        tokens = tokenize(review_text.lower())
+        
+        processed_tokens = [
+            lemmatize(word)
+            for word in tokens 
+            if word.isalnum() 
+            and word not in stop_words
+            and len(word) > 2  # Remove very short words
+        ]
+        
+        return processed_tokens
     
     def analyze_reviews_file(self, reviews_file):
         """Analyze word frequencies in reviews file"""
         print(f"Analyzing word frequencies in: {reviews_file}")
         
         try:
-            reviews_df = pd.read_csv(reviews_file)
-            
-            if 'REVIEW' not in reviews_df.columns:
-                print("Error: 'REVIEW' column not found in the file")
-                return None
-            
-            word_counter = Counter()
-            total_reviews = len(reviews_df)
-            
-            print(f"Processing {total_reviews} reviews...")
-            
-            for review in reviews_df['REVIEW']:
-                tokens = self.process_review_text(review)
-                word_counter.update(tokens)
-            
-            return word_counter
-            
+            return self.analyze_reviews(pd.read_csv(reviews_file))
         except Exception as e:
             print(f"Error processing file {reviews_file}: {e}")
             return None
     
-    def analyze_all_chunks(self, input_dir='../processed_data', output_file='word_frequency_analysis.csv'):
-        """Analyze all review chunks and combine results"""
-        chunk_files = [f for f in os.listdir(input_dir) if f.startswith('reviews_chunk_') and f.endswith('.csv')]
+    def analyze_reviews(self, reviews_df):
+        """Count words in the REVIEW column of a reviews DataFrame"""
+        if 'REVIEW' not in reviews_df.columns:
+            print("Error: 'REVIEW' column not found in the file")
+            return None
+        
+        word_counter = Counter()
+        total_reviews = len(reviews_df)
+        
+        print(f"Processing {total_reviews} reviews...")
+        
+        for review in reviews_df['REVIEW']:
+            tokens = self.process_review_text(review)
+            word_counter.update(tokens)
+        
+        return word_counter
+    
+    def analyze_all_chunks(self, input_dir='../processed_data', output_file='word_frequency_analysis.csv', chunks=None):
+        """Analyze all review chunks and combine results
         
-        if not chunk_files:
+        ``chunks`` takes (file name, DataFrame) pairs already in memory in
+        place of the chunk files in ``input_dir``.
+        """
+        if chunks is None:
+            chunk_files = [f for f in os.listdir(input_dir) if f.startswith('reviews_chunk_') and f.endswith('.csv')]
+            chunks = [(f, os.path.join(input_dir, f)) for f in chunk_files]
+        
+        if not chunks:
             print("No review chunks found!")
             return None
         
-        print(f"Found {len(chunk_files)} review chunks to analyze")
+        print(f"Found {len(chunks)} review chunks to analyze")
+        
+        try:
+            # Resolve the NLTK data before the per-chunk error handling, which would hide a missing table
+            self.resources.tokenizer()
+            self.lemmatizer
+            self.stop_words
+        except (LookupError, OSError) as e:  # OSError: a partially copied data directory
+            print(f"❌ {e}")
+            return None
         
         combined_counter = Counter()
         total_words = 0
         
-        for chunk_file in sorted(chunk_files):
-            chunk_path = os.path.join(input_dir, chunk_file)
-            chunk_counter = self.analyze_reviews_file(chunk_path)
+        # Same order either way, so tied counts rank the same
+        for chunk_file, chunk in sorted(chunks, key=lambda pair: pair[0]):
+            if isinstance(chunk, pd.DataFrame):
+                print(f"Analyzing word frequencies in: {chunk_file}")
+                try:
+                    chunk_counter = self.analyze_reviews(chunk)
+                except Exception as e:
+                    print(f"Error processing {chunk_file}: {e}")
+                    chunk_counter = None
+            else:
+                chunk_counter = self.analyze_reviews_file(chunk)
             
             if chunk_counter:
                 combined_counter.update(chunk_counter)
@@ -115,9 +149,21 @@ class WordFrequencyAnalyzer:
         
         return results_df
 
+def run_in_pipeline(handoff):
+    """Pipeline entry point for run_project.py --in-process, reading chunks from ``handoff`` when present"""
+    input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed_data')
+    analyzer = WordFrequencyAnalyzer()
+    results_df = analyzer.analyze_all_chunks(input_dir, chunks=handoff.get('review_chunks'))
+    print(f"⏱️ NLTK resources: {analyzer.resources.report()}")
+    return results_df is not None
+
 def main():
+    started = time.perf_counter()
     analyzer = WordFrequencyAnalyzer()
-    analyzer.analyze_all_chunks()
+    print(f"⏱️ Import {IMPORT_SECONDS:.2f}s, startup {IMPORT_SECONDS + time.perf_counter() - started:.2f}s")
+    results_df = analyzer.analyze_all_chunks()
+    print(f"⏱️ NLTK resources: {analyzer.resources.report()}")
+    return 0 if results_df is not None else 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file